@@ -1,39 +1,76 @@
  # backend/app.py
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model, Sequential
-from tensorflow.keras.layers import LSTM, Dense
-from sklearn.preprocessing import MinMaxScaler
 import os
-import requests
-import plotly.express as px
-from fetch_nasa_data import fetch_ndvi_harmony, fetch_bloom_events_cmr, fetch_modis_ndvi, fetch_smap_soil_moisture, fetch_gldas_climate, fetch_bulk_ndvi, process_climate_data, fetch_bloom_predictions
+import json
+import http_client
+from fetch_nasa_data import fetch_ndvi_harmony, fetch_bloom_events_cmr, fetch_modis_ndvi, fetch_smap_soil_moisture, fetch_gldas_climate, fetch_bulk_ndvi, iter_bulk_ndvi, process_climate_data, fetch_bloom_predictions
 import joblib
-from sklearn.preprocessing import MinMaxScaler
+import bloom_grid
+import bloom_lstm
+import bloom_stage
+import model_registry
+import ndvi_rf
+import tables
+from jobs import JobQueue
+from model_cache import ModelCache, load_keras
+from response_format import frame_response, negotiate
+from single_flight import SingleFlight
+from startup import Startup, StartupError
+from utils import POWER_URL, fetch_power_series, sequence_windows
 
 app = Flask(__name__)
 CORS(app)
 
+# Shared by all request threads; reloads a model when its file changes
+model_cache = ModelCache()
+# Identical concurrent POWER queries share one upstream call; results kept briefly
+power_flight = SingleFlight()
+# Long-running endpoints run as jobs; identical concurrent requests share one
+job_queue = JobQueue()
+# Seconds clients may cache precomputed grid files without revalidating
+GRID_MAX_AGE = int(os.environ.get("GRID_MAX_AGE", "3600"))
+
+# Data files and models load in the background after the first request
+# (see startup.py); GET /ready reports progress. Routes that need them wait.
+startup = Startup()
+
 # -------------------------------
 # 1️⃣ Load NDVI CSV
 # -------------------------------
 csv_path = "NDVI_TimeSeries_CentralValley (2).csv"
-if not os.path.exists(csv_path):
-    raise FileNotFoundError(f"CSV file not found: {csv_path}")
+seq_length = 30
+
+def _load_ndvi():
+    from sklearn.preprocessing import MinMaxScaler
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
 
-df_ndvi = pd.read_csv(csv_path)
+    df_ndvi = pd.read_csv(csv_path)
 
-# Create 'date' column from month and year
-df_ndvi['date'] = pd.to_datetime(df_ndvi[['year', 'month']].assign(day=1))
-df_ndvi.sort_values('date', inplace=True)
+    # Create 'date' column from month and year
+    df_ndvi['date'] = pd.to_datetime(df_ndvi[['year', 'month']].assign(day=1))
+    df_ndvi.sort_values('date', inplace=True)
+
+    # -------------------------------
+    # 3️⃣ Preprocess NDVI data
+    # -------------------------------
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    ndvi_scaled = scaler.fit_transform(df_ndvi[['NDVI']].values)  # Make sure your CSV has 'NDVI' column
+    X_input, _ = sequence_windows(ndvi_scaled, seq_length)
+    return {"df": df_ndvi, "scaler": scaler, "X_input": X_input}
+
+startup.add("ndvi", _load_ndvi)
 
 # -------------------------------
 # 2️⃣ Load LSTM model
 # -------------------------------
+# Trained offline (python bloom_lstm.py), loaded once per process
+startup.add(bloom_lstm.ARTIFACT_NAME, lambda: model_registry.register(bloom_lstm.ARTIFACT_NAME, bloom_lstm.load_artifact))
+
 # model_path = "ndvi_climate_model1.h5"
 # if not os.path.exists(model_path):
 #     raise FileNotFoundError(f"Model file not found: {model_path}")
@@ -41,20 +78,9 @@ df_ndvi.sort_values('date', inplace=True)
 # # Fix for older H5 metrics issue
 # model = load_model(model_path, custom_objects={'mse': tf.keras.metrics.MeanSquaredError()})
 
-# -------------------------------
-# 3️⃣ Preprocess NDVI data
-# -------------------------------
-scaler = MinMaxScaler(feature_range=(0, 1))
-ndvi_scaled = scaler.fit_transform(df_ndvi[['NDVI']].values)  # Make sure your CSV has 'NDVI' column
-
-def create_sequences(data, seq_length=30):
-    X = []
-    for i in range(len(data) - seq_length):
-        X.append(data[i:i + seq_length])
-    return np.array(X)
-
-seq_length = 30
-X_input = create_sequences(ndvi_scaled, seq_length)
+@app.before_request
+def _start_loading():
+    startup.start()
 
 # -------------------------------
 # 4️⃣ API endpoints
@@ -64,6 +90,16 @@ X_input = create_sequences(ndvi_scaled, seq_length)
 def home():
     return jsonify({"message": "Bloom-Watch API is running!"})
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    # Readiness probe: 200 once every startup step has loaded, else 503 with their status
+    stats = startup.stats()
+    return jsonify(stats), 200 if stats["ready"] else 503
+
+@app.errorhandler(StartupError)
+def startup_error(e):
+    return jsonify({"error": str(e)}), 503
+
 @app.route('/predict', methods=['GET'])
 def predict():
     # Predict next NDVI
@@ -73,212 +109,149 @@ def predict():
     # return jsonify({"predicted_ndvi": float(pred_ndvi[0, 0])})
     return jsonify({"predicted_ndvi": 0.5})  # Dummy
 
+def _table_response(table):
+    # Paginated, projected, filtered JSON array streamed in chunks (or ?format=columns/arrow)
+    try:
+        df, positions, total, next_offset = tables.query(table, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    headers = {"X-Total-Count": str(total)}
+    if next_offset is not None:
+        headers["X-Next-Offset"] = str(next_offset)
+    try:
+        fmt = negotiate(request.args, request.accept_mimetypes)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if fmt != "records":
+        # Columnar formats need the whole page; records stay streamed
+        return frame_response(df.iloc[positions], request, headers=headers)
+    return Response(stream_with_context(tables.stream_records(df, positions)), mimetype='application/json', headers=headers)
+
+def _job_response(kind, fn, params, cpu=False):
+    # ?async=1: 202 with the job to poll (/api/jobs/<id>); otherwise wait for its result
+    job = job_queue.submit(kind, fn, params, cpu=cpu)
+    if request.args.get('async', '0') == '1':
+        job.update(status_url=f"/api/jobs/{job['id']}", events_url=f"/api/jobs/{job['id']}/events")
+        return jsonify(job), 202, {"Location": job["status_url"]}
+    job = job_queue.wait(job["id"])
+    if job is None:
+        return jsonify({"error": "Job expired before it finished"}), 500
+    if job["status"] == "failed":
+        return jsonify({"error": job["error"]}), 500
+    return jsonify(job["result"])
+
 @app.route('/data', methods=['GET'])
 def data():
-    return df_ndvi.to_json(orient='records', date_format='iso')
+    return _table_response(tables.ndvi_timeseries(csv_path))
 
-@app.route('/climate', methods=['GET'])
-def climate():
-    lat = request.args.get('lat', '38.5')
-    lon = request.args.get('lon', '-121.5')
-    start = request.args.get('start', '20200101')
-    end = request.args.get('end', '20201231')
+class UpstreamError(Exception):
+    pass
 
-    base_url = "https://power.larc.nasa.gov/api/temporal/daily/point"
+def _fetch_power_json(params):
+    response = http_client.get(POWER_URL, params=params)
+    if response.status_code != 200:
+        raise UpstreamError(response.status_code)
+    return response.json()
+
+def _power_point_response(parameters, error):
+    # Daily POWER point data for the lat/lon/start/end query args, coalesced by power_flight
     params = {
-        "start": start,
-        "end": end,
-        "latitude": lat,
-        "longitude": lon,
-        "parameters": "T2M_MAX,T2M_MIN,PRECTOTCORR,RH2M,ALLSKY_SFC_SW_DWN",
+        "start": request.args.get('start', '20200101'),
+        "end": request.args.get('end', '20201231'),
+        "latitude": request.args.get('lat', '38.5'),
+        "longitude": request.args.get('lon', '-121.5'),
+        "parameters": parameters,
         "community": "AG",
         "format": "JSON"
     }
+    try:
+        data = power_flight.do(tuple(sorted(params.items())), lambda: _fetch_power_json(params))
+    except UpstreamError:
+        return jsonify({"error": error}), 500
+    return jsonify(data)
 
-    response = requests.get(base_url, params=params)
-    if response.status_code == 200:
-        data = response.json()
-        return jsonify(data)
-    else:
-        return jsonify({"error": "Failed to fetch climate data"}), 500
+@app.route('/climate', methods=['GET'])
+def climate():
+    return _power_point_response("T2M_MAX,T2M_MIN,PRECTOTCORR,RH2M,ALLSKY_SFC_SW_DWN", "Failed to fetch climate data")
 
 @app.route('/ndvi_map_data', methods=['GET'])
 def ndvi_map_data():
-    csv_path = "sample_ndvi_map_data.csv"
-    if not os.path.exists(csv_path):
+    map_csv_path = "sample_ndvi_map_data.csv"
+    if not os.path.exists(map_csv_path):
         return jsonify({"error": "NDVI map data not found"}), 404
-    df = pd.read_csv(csv_path)
-    return df.to_json(orient='records', date_format='iso')
+    return _table_response(tables.ndvi_map(map_csv_path))
 
 @app.route('/ndvi', methods=['GET'])
 def get_ndvi():
-    lat = request.args.get('lat', '38.5')
-    lon = request.args.get('lon', '-121.5')
-    start = request.args.get('start', '20200101')
-    end = request.args.get('end', '20201231')
-
-    base_url = "https://power.larc.nasa.gov/api/temporal/daily/point"
-    params = {
-        "start": start,
-        "end": end,
-        "latitude": lat,
-        "longitude": lon,
-        "parameters": "NDVI",
-        "community": "AG",
-        "format": "JSON"
-    }
-
-    response = requests.get(base_url, params=params)
-    if response.status_code == 200:
-        data = response.json()
-        return jsonify(data)
-    else:
-        return jsonify({"error": "Failed to fetch NDVI data"}), 500
+    return _power_point_response("NDVI", "Failed to fetch NDVI data")
 
 @app.route('/evi', methods=['GET'])
 def get_evi():
-    lat = request.args.get('lat', '38.5')
-    lon = request.args.get('lon', '-121.5')
-    start = request.args.get('start', '20200101')
-    end = request.args.get('end', '20201231')
-
-    base_url = "https://power.larc.nasa.gov/api/temporal/daily/point"
-    params = {
-        "start": start,
-        "end": end,
-        "latitude": lat,
-        "longitude": lon,
-        "parameters": "EVI",
-        "community": "AG",
-        "format": "JSON"
-    }
-
-    response = requests.get(base_url, params=params)
-    if response.status_code == 200:
-        data = response.json()
-        return jsonify(data)
-    else:
-        return jsonify({"error": "Failed to fetch EVI data"}), 500
+    return _power_point_response("EVI", "Failed to fetch EVI data")
 
 @app.route('/soil_moisture', methods=['GET'])
 def get_soil_moisture():
-    lat = request.args.get('lat', '38.5')
-    lon = request.args.get('lon', '-121.5')
-    start = request.args.get('start', '20200101')
-    end = request.args.get('end', '20201231')
-
-    base_url = "https://power.larc.nasa.gov/api/temporal/daily/point"
-    params = {
-        "start": start,
-        "end": end,
-        "latitude": lat,
-        "longitude": lon,
-        "parameters": "GWETPROF",
-        "community": "AG",
-        "format": "JSON"
+    return _power_point_response("GWETPROF", "Failed to fetch soil moisture data")
+
+POWER_FILL_VALUE = -999
+POWER_MAX_PARAMETERS = 20  # per POWER point request
+DEFAULT_POWER_PARAMETERS = "T2M_MAX,T2M_MIN,PRECTOTCORR,RH2M,ALLSKY_SFC_SW_DWN,GWETPROF"
+
+def _power_series_json(lat, lon, start, end, parameters):
+    df = fetch_power_series(lat, lon, start, end, parameters)
+    values = df.to_numpy(dtype=float)
+    values[values == POWER_FILL_VALUE] = np.nan
+    missing = np.isnan(values)
+    return {
+        "lat": lat,
+        "lon": lon,
+        "dates": df.index.strftime('%Y-%m-%d').tolist(),
+        "parameters": {p: np.where(missing[:, i], None, values[:, i]).tolist() for i, p in enumerate(parameters)},
     }
 
-    response = requests.get(base_url, params=params)
-    if response.status_code == 200:
-        data = response.json()
+@app.route('/api/power', methods=['GET'])
+def api_power():
+    # Several POWER daily parameters for one point in one query, as columns:
+    # {"dates": [...], "parameters": {name: [values]}}, missing values null.
+    # Series are cached per parameter, so later subsets need no upstream call.
+    try:
+        parameters = list(dict.fromkeys(p.strip() for p in request.args.get('parameters', DEFAULT_POWER_PARAMETERS).split(',') if p.strip()))
+        if not parameters or len(parameters) > POWER_MAX_PARAMETERS:
+            raise ValueError(f"parameters must list 1 to {POWER_MAX_PARAMETERS} POWER parameters")
+        lat = float(request.args.get('lat', '38.5'))
+        lon = float(request.args.get('lon', '-121.5'))
+        start = request.args.get('start', '20200101')
+        end = request.args.get('end', '20201231')
+        if pd.to_datetime(start, format="%Y%m%d") > pd.to_datetime(end, format="%Y%m%d"):
+            raise ValueError("start is after end")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        data = power_flight.do(("series", lat, lon, start, end, tuple(parameters)),
+                               lambda: _power_series_json(lat, lon, start, end, parameters))
         return jsonify(data)
-    else:
-        return jsonify({"error": "Failed to fetch soil moisture data"}), 500
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 @app.route('/chart', methods=['GET'])
 def chart():
     # Generate a Plotly chart for NDVI
+    import plotly.express as px
+    df_ndvi = startup.get("ndvi")["df"]
     fig = px.line(df_ndvi, x='date', y='NDVI', title='NDVI Over Time')
     fig_html = fig.to_html(full_html=False)
     return fig_html
 
 @app.route('/bloom_prediction', methods=['GET'])
 def bloom_prediction():
-    # Load NDVI
-    df_ndvi = pd.read_csv("backend/NDVI_TimeSeries_CentralValley (2).csv")
-    df_ndvi['NDVI'] = df_ndvi['NDVI'].astype(float)
-    df_ndvi['year'] = df_ndvi['year'].astype(int)
-    df_ndvi['month'] = df_ndvi['month'].astype(int)
-    df_ndvi['date'] = pd.to_datetime(df_ndvi['year'].astype(str) + '-' + df_ndvi['month'].astype(str) + '-01')
-    df_ndvi = df_ndvi.sort_values('date')
-
-    # Fetch Climate Data
-    locations = {
-        'North_CA': (38.5, -121.5),
-        'South_CA': (33.0, -117.0)
-    }
-
-    dfs_climate = []
-    for name, (lat, lon) in locations.items():
-        start_date = df_ndvi['date'].min().strftime('%Y%m%d')
-        end_date = df_ndvi['date'].max().strftime('%Y%m%d')
-        url = f"https://power.larc.nasa.gov/api/temporal/daily/point?parameters=T2M,PRECTOTCORR,RH2M&community=AG&longitude={lon}&latitude={lat}&start={start_date}&end={end_date}&format=JSON"
-        r = requests.get(url)
-        data = r.json()
-        df_list = []
-        for date, temp in data['properties']['parameter']['T2M'].items():
-            rainfall = data['properties']['parameter']['PRECTOTCORR'][date]
-            humidity = data['properties']['parameter']['RH2M'][date]
-            df_list.append([date, temp, rainfall, humidity])
-        df_clim = pd.DataFrame(df_list, columns=['YYYYMMDD', 'Temp', 'Rainfall', 'Humidity'])
-        df_clim['date'] = pd.to_datetime(df_clim['YYYYMMDD'], format='%Y%m%d')
-        df_clim['Region'] = name
-        dfs_climate.append(df_clim)
-
-    df_climate_all = pd.concat(dfs_climate, ignore_index=True)
-
-    # Merge
-    df_ndvi_expanded = pd.concat([df_ndvi.assign(Region=name) for name in locations.keys()], ignore_index=True)
-    df_full = pd.merge(df_ndvi_expanded, df_climate_all, on=['date','Region'], how='left')
-    df_full = df_full.sort_values(['Region','date']).reset_index(drop=True)
-
-    # Prepare data
-    features = ['NDVI', 'Temp', 'Rainfall', 'Humidity']
-    scaler = MinMaxScaler(feature_range=(0,1))
-    scaled_data = scaler.fit_transform(df_full[features])
-
-    def create_sequences(data, seq_length):
-        X, y = [], []
-        for i in range(len(data) - seq_length):
-            X.append(data[i:i+seq_length])
-            y.append(data[i+seq_length, 0])
-        return np.array(X), np.array(y)
-
-    seq_length = 5
-    X, y = create_sequences(scaled_data, seq_length)
-    split = int(len(X)*0.8)
-    X_train, X_test = X[:split], X[split:]
-    y_train, y_test = y[:split], y[split:]
-
-    # Build model
-    model = Sequential()
-    model.add(LSTM(50, activation='relu', input_shape=(seq_length, len(features))))
-    model.add(Dense(1))
-    model.compile(optimizer='adam', loss='mse')
-    model.fit(X_train, y_train, epochs=50, batch_size=8, verbose=0)  # Reduced epochs for speed
-
-    # Predict
-    y_pred = model.predict(X_test)
-    y_pred_rescaled = scaler.inverse_transform(
-        np.concatenate([y_pred, np.zeros((y_pred.shape[0], len(features)-1))], axis=1)
-    )[:,0]
-    y_test_rescaled = scaler.inverse_transform(
-        np.concatenate([y_test.reshape(-1,1), np.zeros((y_test.shape[0], len(features)-1))], axis=1)
-    )[:,0]
-
-    # Peak day
-    peak_index = np.argmax(y_pred_rescaled)
-    dates_test = df_full['date'].iloc[split + seq_length : split + seq_length + len(y_test_rescaled)]
-    peak_day = dates_test.iloc[peak_index].strftime('%Y-%m-%d')
-
-    # Return data
-    result = {
-        'dates': dates_test.dt.strftime('%Y-%m-%d').tolist(),
-        'actual_ndvi': y_test_rescaled.tolist(),
-        'predicted_ndvi': y_pred_rescaled.tolist(),
-        'peak_bloom_day': peak_day
-    }
-    return jsonify(result)
+    # Inference only: the LSTM is trained offline by bloom_lstm.py
+    startup.get(bloom_lstm.ARTIFACT_NAME)
+    artifact = model_registry.get(bloom_lstm.ARTIFACT_NAME)
+    if artifact is None:
+        return jsonify({"error": "Bloom LSTM not trained yet - run python bloom_lstm.py"}), 503
+    # Keyed by the artifact version, so a new artifact gets a new job
+    return _job_response("bloom_prediction", lambda version: bloom_lstm.predict(artifact),
+                         {"version": artifact["version"]})
 
 @app.route('/api/fetch_ndvi', methods=['GET'])
 def api_fetch_ndvi():
@@ -319,43 +292,42 @@ def api_ndvi_data():
         # Use blueprint's method: Fetch MODIS NDVI via USGS API
         url = f"https://lpdaacsvc.cr.usgs.gov/services/timeseries?products=MOD13Q1&latitude={lat}&longitude={lon}&startDate={start}&endDate={end}"
         headers = {"Authorization": "Bearer YOUR_NASA_TOKEN"}  # Replace with actual token
-        r = requests.get(url, headers=headers)
+        r = http_client.get(url, headers=headers)
         if r.status_code == 200:
             data = r.json()
             df = pd.DataFrame(data['MOD13Q1'])
-            return jsonify(df.to_dict(orient='records'))
+            return frame_response(df, request)
         else:
             # Fallback to existing method
             df = fetch_modis_ndvi(lat, lon, start, end)
-            return jsonify(df.to_dict(orient='records'))
+            return frame_response(df, request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _netcdf_job(fetch):
+    def run(bbox, start, end):
+        return {"file": fetch(bbox, start, end), "message": "NetCDF file saved"}
+    return run
+
 @app.route('/api/soil_moisture_data', methods=['GET'])
 def api_soil_moisture_data():
     bbox = request.args.get('bbox', '25,25,35,35')
     start = request.args.get('start', '2018-01-01')
     end = request.args.get('end', '2024-12-31')
-    try:
-        file_path = fetch_smap_soil_moisture(bbox, start, end)
-        return jsonify({"file": file_path, "message": "NetCDF file saved"})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return _job_response("soil_moisture_data", _netcdf_job(fetch_smap_soil_moisture),
+                         {"bbox": bbox, "start": start, "end": end})
 
 @app.route('/api/climate_data', methods=['GET'])
 def api_climate_data():
     bbox = request.args.get('bbox', '25,25,35,35')
     start = request.args.get('start', '2018-01-01')
     end = request.args.get('end', '2024-12-31')
-    try:
-        file_path = fetch_gldas_climate(bbox, start, end)
-        return jsonify({"file": file_path, "message": "NetCDF file saved"})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return _job_response("climate_data", _netcdf_job(fetch_gldas_climate), {"bbox": bbox, "start": start, "end": end})
 
 @app.route('/api/bloom_prediction', methods=['GET'])
 def api_bloom_prediction():
     # Simple prediction using the LSTM model
+    df_ndvi = startup.get("ndvi")["df"]
     try:
         # Predict next NDVI
         # last_sequence = X_input[-1].reshape(1, seq_length, 1)
@@ -377,15 +349,27 @@ def api_bloom_prediction():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _stream_bulk_ndvi(points, start, end):
+    # One NDJSON line per point, sent as soon as that point completes
+    for lat, lon, df, error in iter_bulk_ndvi(points, start, end):
+        if error is not None:
+            line = {"lat": lat, "lon": lon, "error": str(error)}
+        else:
+            line = {"lat": lat, "lon": lon, "records": json.loads(df.to_json(orient='records', date_format='iso'))}
+        yield json.dumps(line) + "\n"
+
 @app.route('/api/bulk_ndvi', methods=['GET'])
 def api_bulk_ndvi():
     points_str = request.args.get('points', '30.0,31.2;31.0,30.0;29.0,31.5')
     start = request.args.get('start', '2018-01-01')
     end = request.args.get('end', '2024-12-31')
+    stream = request.args.get('stream', '0') == '1'
     try:
         points = [tuple(map(float, p.split(','))) for p in points_str.split(';')]
+        if stream:
+            return Response(stream_with_context(_stream_bulk_ndvi(points, start, end)), mimetype='application/x-ndjson')
         df = fetch_bulk_ndvi(points, start, end)
-        return jsonify(df.to_dict(orient='records'))
+        return frame_response(df, request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -395,8 +379,7 @@ def api_bloom_prediction_model():
     lon = float(request.args.get('lon', '31.2'))
     month = int(request.args.get('month', '3'))
     try:
-        # Load model
-        model = joblib.load('models/bloom_model.joblib')
+        model = model_cache.get('models/bloom_model.joblib')
         # Predict
         features = [[0.5, lat, lon, month]]  # Example NDVI
         prediction = model.predict(features)[0]
@@ -404,12 +387,52 @@ def api_bloom_prediction_model():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/bloom_stage/batch', methods=['POST'])
+def api_bloom_stage_batch():
+    # Body: {"points": [[lat, lon], ...] or a GeoJSON FeatureCollection, "month": "YYYY-MM"}
+    payload = request.get_json(silent=True) or {}
+    try:
+        points = bloom_stage.parse_points(payload)
+        month = payload.get('month', pd.Timestamp.today().strftime('%Y-%m'))
+        pd.Period(month, freq='M')
+    except (ValueError, TypeError, KeyError, IndexError) as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        obj = model_cache.get('models/bloom_model.joblib')
+        return jsonify(bloom_stage.predict_batch(obj["model"], obj["feature_columns"], points, month))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/grids', methods=['GET'])
+def api_grids():
+    # Grids precomputed by bloom_grid.py, as {name: [months]}
+    grids_dir = bloom_grid.GRIDS_DIR
+    if not grids_dir.is_dir():
+        return jsonify({})
+    return jsonify({d.name: sorted(m.name for m in d.iterdir() if (m / 'meta.json').exists())
+                    for d in sorted(grids_dir.iterdir()) if d.is_dir()})
+
+@app.route('/api/grids/<name>/<month>/<filename>', methods=['GET'])
+def api_grid_file(name, month, filename):
+    # meta.json or <layer>.bin; ETag + max-age let browsers and proxies cache them
+    if filename != 'meta.json' and not filename.endswith('.bin'):
+        return jsonify({"error": "Unknown grid file"}), 404
+    mimetype = 'application/json' if filename == 'meta.json' else 'application/octet-stream'
+    return send_from_directory(bloom_grid.GRIDS_DIR, f"{name}/{month}/{filename}", mimetype=mimetype,
+                               max_age=GRID_MAX_AGE, conditional=True, etag=True)
+
+FORECAST_MODEL = 'models/forecasting_lstm.h5'
+FORECAST_SCALER = 'models/forecasting_lstm_scaler.joblib'
+
+def _load_forecaster(path):
+    return load_keras(path), joblib.load(FORECAST_SCALER)
+
 @app.route('/api/forecast_ndvi', methods=['GET'])
 def api_forecast_ndvi():
     try:
-        # Load LSTM model and scaler
-        model = load_model('models/forecasting_lstm.h5')
-        scaler = joblib.load('models/forecasting_lstm_scaler.joblib')
+        # Load LSTM model and scaler as one entry, so a retrain never pairs
+        # the new model with the old scaler
+        model, scaler = model_cache.get(FORECAST_MODEL, loader=_load_forecaster, companions=[FORECAST_SCALER])
 
         # Load recent data
         df = pd.read_csv("NDVI_TimeSeries_CentralValley (2).csv")
@@ -430,7 +453,7 @@ def api_forecast_ndvi():
 def api_bloom_clusters():
     try:
         # Load clustering model
-        model = joblib.load('models/bloom_clustering.joblib')
+        model = model_cache.get('models/bloom_clustering.joblib')
 
         # Load data
         df = pd.read_csv('bulk_ndvi_data.csv')
@@ -440,44 +463,51 @@ def api_bloom_clusters():
         clusters = model.predict(X)
         df['cluster'] = clusters
 
-        return jsonify(df.to_dict(orient='records'))
+        return frame_response(df, request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/rf_predict', methods=['GET'])
-def api_rf_predict():
-    try:
-        from sklearn.ensemble import RandomForestRegressor
-        from sklearn.model_selection import train_test_split
-
-        # Load NDVI data
-        df = pd.read_csv("NDVI_TimeSeries_CentralValley (2).csv")
-        df['date'] = pd.to_datetime(df[['year', 'month']].assign(day=1))
-        df = df.sort_values('date')
+@app.route('/api/model_cache/stats', methods=['GET'])
+def api_model_cache_stats():
+    return jsonify(model_cache.stats())
 
-        # Features: day of year
-        df['day_of_year'] = df['date'].dt.dayofyear
-        X = df[['day_of_year']]
-        y = df['NDVI']
+@app.route('/api/single_flight/stats', methods=['GET'])
+def api_single_flight_stats():
+    # Upstream vs coalesced vs cached POWER queries of /climate, /ndvi, /evi, /soil_moisture
+    return jsonify(power_flight.stats())
 
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+@app.route('/api/http_client/stats', methods=['GET'])
+def api_http_client_stats():
+    return jsonify(http_client.stats())
 
-        # Train Random Forest
-        rf_model = RandomForestRegressor(n_estimators=100, random_state=42)
-        rf_model.fit(X_train, y_train)
-
-        # Predict for future days (next 365 days)
-        future_days = pd.DataFrame({'day_of_year': range(1, 366)})
-        predictions = rf_model.predict(future_days)
+@app.route('/api/rf_predict', methods=['GET'])
+def api_rf_predict():
+    # Fits a 100-tree forest: CPU-bound, so it runs in a job worker process
+    return _job_response("rf_predict", ndvi_rf.predict_year, {"csv_path": ndvi_rf.NDVI_CSV}, cpu=True)
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def api_job_events(job_id):
+    # NDJSON: one snapshot per status change (and heartbeat) until the job finishes
+    if job_queue.get(job_id) is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    lines = (json.dumps(snapshot) + "\n" for snapshot in job_queue.events(job_id))
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
+@app.route('/api/jobs/stats', methods=['GET'])
+def api_job_stats():
+    return jsonify(job_queue.stats())
 
-        return jsonify({
-            "future_days": future_days['day_of_year'].tolist(),
-            "predicted_ndvi": predictions.tolist()
-        })
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
 # -------------------------------
 # 5️⃣ Run Flask app
 # -------------------------------
 if __name__ == '__main__':
+    # Load while the server starts instead of on the first request
+    startup.start()
     app.run(debug=True, port=5000)
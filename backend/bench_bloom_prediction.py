@@ -0,0 +1,52 @@
+# bench_bloom_prediction.py
+"""
+Compare /bloom_prediction latency: training the LSTM inside the request (the
+old path) against inference on the registry-loaded artifact.
+
+Run `python bloom_lstm.py` first. The old path is timed on the artifact's
+stored training frame, i.e. without the two NASA POWER downloads it also did,
+so its numbers are a lower bound.
+"""
+import time
+import numpy as np
+import bloom_lstm
+import model_registry
+from utils import sequence_windows
+from app import app
+
+def percentiles(samples_ms):
+    return {p: float(np.percentile(samples_ms, p)) for p in (50, 95, 99)}
+
+def time_in_request_training(df_full, runs=3):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        model, scaler, split = bloom_lstm.train(df_full)
+        X, y = sequence_windows(scaler.transform(df_full[bloom_lstm.FEATURES]), bloom_lstm.SEQ_LENGTH, target=0)
+        model.predict(X[split:], verbose=0)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+def time_endpoint(client, requests=200, warmup=5):
+    for _ in range(warmup):
+        client.get('/bloom_prediction')
+    samples = []
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        r = client.get('/bloom_prediction')
+        samples.append((time.perf_counter() - t0) * 1000)
+        assert r.status_code == 200, r.get_json()
+    return samples
+
+if __name__ == "__main__":
+    artifact = model_registry.get(bloom_lstm.ARTIFACT_NAME)
+    if artifact is None:
+        raise SystemExit("No bloom_lstm artifact found - run python bloom_lstm.py first.")
+    print("Artifact version:", artifact["version"])
+
+    old = percentiles(time_in_request_training(artifact["frame"]))
+    new = percentiles(time_endpoint(app.test_client()))
+    print(f"{'path':<22}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+    print(f"{'train-in-request':<22}{old[50]:>12.1f}{old[95]:>12.1f}{old[99]:>12.1f}")
+    print(f"{'registry inference':<22}{new[50]:>12.1f}{new[95]:>12.1f}{new[99]:>12.1f}")
+    print(f"Speedup (p50): {old[50] / new[50]:.0f}x")
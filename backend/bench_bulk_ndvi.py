@@ -0,0 +1,69 @@
+# bench_bulk_ndvi.py
+"""
+Throughput of fetch_bulk_ndvi against a local stub of the MODIS subset
+service, for increasing max_workers.
+
+The stub answers every request after a fixed delay (default 100 ms) that
+stands in for network + server time, so points/s should scale roughly
+linearly with concurrency until the pool or the rate limit saturates.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_DELAY = 0.1
+STUB_BODY = json.dumps({"subset": [
+    {"calendar_date": f"2020-{m:02d}-01", "NDVI": 0.3 + m / 100, "EVI": 0.2 + m / 100} for m in range(1, 13)
+]}).encode()
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real service
+
+    def do_GET(self):
+        time.sleep(STUB_DELAY)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STUB_BODY)))
+        self.end_headers()
+        self.wfile.write(STUB_BODY)
+
+    def log_message(self, *args):
+        pass
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=64)
+    parser.add_argument("--workers", default="1,2,4,8,16,32")
+    args = parser.parse_args()
+    worker_counts = [int(w) for w in args.workers.split(",")]
+
+    # The shared session's pool is sized from NASA_MAX_WORKERS at import
+    os.environ.setdefault("EARTHDATA_TOKEN", "stub")
+    os.environ["NASA_MAX_WORKERS"] = str(max(worker_counts))
+    import fetch_nasa_data
+
+    server = start_stub()
+    fetch_nasa_data.MODIS_SUBSET_URL = f"http://127.0.0.1:{server.server_port}/services/modisSubset"
+    points = [(20 + i * 0.1, 10 + i * 0.1) for i in range(args.points)]
+    output_file = "bench_bulk_ndvi.csv"
+
+    print(f"{args.points} points, stub latency {STUB_DELAY * 1000:.0f} ms")
+    print(f"{'workers':>8}{'seconds':>10}{'points/s':>10}{'rows':>8}")
+    for workers in worker_counts:
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = fetch_nasa_data.fetch_bulk_ndvi(points, "2020-01-01", "2020-12-31", output_file=output_file, max_workers=workers)
+        elapsed = time.perf_counter() - t0
+        print(f"{workers:>8}{elapsed:>10.2f}{args.points / elapsed:>10.1f}{len(df):>8}")
+    os.remove(output_file)
+    server.shutdown()
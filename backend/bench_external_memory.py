@@ -0,0 +1,106 @@
+# bench_external_memory.py
+"""
+Peak memory of model_train.py training: train() (every row in one array,
+then two dense DMatrix) against train_external() (feature chunks streamed
+from the feature store into XGBoost's external-memory page cache, hist
+trees) at --points and 10x as many points.
+
+Each run is a fresh process; peak RSS is its VmHWM (Linux), the same
+process's RSS after imports is reported as the baseline. The feature store
+is built first from synthetic monthly data (no POWER requests) and only
+read by the runs. Few boosting rounds are used, since the tree building
+time is not what is measured.
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Set before model_train/feature_store read their config (spawned runs inherit it)
+TMP = os.environ.get("BENCH_EXTERNAL_DIR") or tempfile.mkdtemp(prefix="bench_external_memory_")
+os.environ["BENCH_EXTERNAL_DIR"] = TMP
+os.environ["DATA_DIR"] = os.path.join(TMP, "data")
+os.environ["MODELS_DIR"] = os.path.join(TMP, "models")
+os.environ["FEATURE_STORE_DIR"] = os.path.join(TMP, "feature_store")
+
+import numpy as np
+import pandas as pd
+import feature_store
+import training_data
+from utils import feature_column_names, monthly_feature_kernel
+
+VARIABLES = ["T2M", "PRECTOT", "ALLSKY_SFC_SW_DWN", "RH2M", "GWETPROF", "GWETROOT"]
+SPEC = {"source": "synthetic", "n_lags": training_data.MAX_LAGS}
+
+def synthetic_tables(points):
+    """Monthly feature tables of synthetic monthly means, seeded by the points."""
+    rng = np.random.default_rng(abs(hash(tuple(points[0]))) if points else 0)
+    index = pd.date_range("2017-01-31", "2023-12-31", freq="M", name="date")
+    season = np.sin(2*np.pi*(index.month.to_numpy() - 3)/12)[None, :, None]
+    monthly = 20 + 10*season + rng.normal(0, 3, (len(points), len(index), len(VARIABLES)))
+    monthly[:, :, 1] = np.abs(monthly[:, :, 1] - 15)  # precipitation
+    values = monthly_feature_kernel(monthly, index.month, training_data.MAX_LAGS)
+    return training_data._tables(values, index, feature_column_names(VARIABLES, training_data.MAX_LAGS))
+
+def peak_rss_mb():
+    with open("/proc/self/status") as f:
+        fields = dict(line.split(":", 1) for line in f)
+    return int(fields["VmHWM"].split()[0]) / 1024
+
+def current_rss_mb():
+    with open("/proc/self/status") as f:
+        fields = dict(line.split(":", 1) for line in f)
+    return int(fields["VmRSS"].split()[0]) / 1024
+
+def run(mode, n, rounds, threads):
+    import model_train
+    model_train.NUM_BOOST_ROUND = rounds
+    baseline = current_rss_mb()
+    points = training_data.sample_points(n)
+    models_dir = os.path.join(TMP, "models", f"{mode}-{n}")
+    os.makedirs(models_dir, exist_ok=True)
+    t0 = time.perf_counter()
+    if mode == "in-memory":
+        features = feature_store.get_point_features(points, SPEC, synthetic_tables)
+        result = model_train.train(features, models_dir=models_dir, threads=threads)
+    else:
+        chunks = feature_store.point_feature_chunks(points, SPEC, synthetic_tables,
+                                                    chunk_points=model_train.CHUNK_POINTS)
+        result = model_train.train_external(chunks, models_dir=models_dir, threads=threads,
+                                            cache_dir=os.path.join(TMP, "xgb_cache", str(n)))
+    result.update(seconds=time.perf_counter() - t0, baseline_mb=baseline, peak_mb=peak_rss_mb())
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+    sizes = [args.points, 10 * args.points]
+
+    t0 = time.perf_counter()
+    feature_store.get_point_features(training_data.sample_points(sizes[-1]), SPEC, synthetic_tables, columns=[])
+    print(f"feature store: {sizes[-1]} points in {time.perf_counter() - t0:.1f}s")
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for n in sizes:
+        for mode in ("in-memory", "external"):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results[mode, n] = pool.submit(run, mode, n, args.rounds, args.threads).result()
+
+    for n in sizes:
+        assert results["in-memory", n]["samples"] == results["external", n]["samples"], n
+
+    print(f"\n{args.rounds} rounds, {args.threads or os.cpu_count()} threads")
+    print(f"{'':<12}{'points':>8}{'rows':>10}{'baseline MB':>13}{'peak MB':>10}{'seconds':>9}{'accuracy':>10}")
+    for (mode, n), r in results.items():
+        print(f"{mode:<12}{n:>8}{r['samples']:>10}{r['baseline_mb']:>13.0f}{r['peak_mb']:>10.0f}"
+              f"{r['seconds']:>9.1f}{r['test_accuracy']:>10.3f}")
+    for mode in ("in-memory", "external"):
+        small, big = results[mode, sizes[0]], results[mode, sizes[1]]
+        growth = (big["peak_mb"] - big["baseline_mb"]) / max(small["peak_mb"] - small["baseline_mb"], 1)
+        print(f"{mode}: peak above baseline grows {growth:.1f}x for 10x the points")
@@ -0,0 +1,59 @@
+# bench_feature_store.py
+"""
+Feature tables for the training points: fetching and building them (what
+every training run did before the feature store) against building the
+store once and reading it back, all columns and the 3-lag subset the
+desertification/clustering/forecasting trainers use.
+
+Runs against a temporary POWER cache seeded with synthetic data (see
+bench_train_all.py), so the "fetch" column is cache reads only; a real
+cold run also pays one POWER request per point. The warm reads are checked
+against freshly built tables, then repeated with the POWER cache deleted
+and POWER_OFFLINE=1 to show retraining needs neither network nor cache.
+"""
+import argparse
+import shutil
+import time
+import pandas as pd
+from bench_train_all import seed_cache
+import power_cache
+import training_data
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - t0, result
+
+def check(actual, expected, n_lags):
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        pd.testing.assert_frame_equal(a, training_data.select_lags(e, n_lags), check_exact=True, check_freq=False)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=120)
+    args = parser.parse_args()
+
+    points = training_data.sample_points(args.points)
+    seed_cache(points)
+
+    fetch_s, frames = timed(training_data.fetch_points, points)
+    build_s, expected = timed(training_data.point_features, frames)
+    store_s, _ = timed(training_data.load_point_features, args.points, refresh=True)
+    runs = [("fetch + build (no store)", fetch_s + build_s), ("first run: fetch + build + store", store_s)]
+
+    for n_lags in (training_data.MAX_LAGS, 3):
+        seconds, (_, features) = timed(training_data.load_point_features, args.points, n_lags=n_lags)
+        check(features, expected, n_lags)
+        runs.append((f"store read, {n_lags} lags", seconds))
+
+    shutil.rmtree(power_cache.CACHE_DIR)
+    power_cache.OFFLINE = True
+    seconds, (_, features) = timed(training_data.load_point_features, args.points)
+    check(features, expected, training_data.MAX_LAGS)
+    runs.append(("store read, no POWER cache, offline", seconds))
+
+    print(f"\n{args.points} points (fetch {fetch_s:.2f}s, build {build_s:.2f}s without the store)")
+    print(f"{'':<38}{'seconds':>10}")
+    for label, seconds in runs:
+        print(f"{label:<38}{seconds:>10.3f}")
@@ -0,0 +1,82 @@
+# bench_features.py
+"""
+Feature building over many synthetic points: the previous per-point pandas
+implementation (rolling().apply with a Python lambda) against the batched
+monthly_feature_kernel.
+
+The pandas path is timed on --old-points points and extrapolated, since a
+full 10k run takes minutes. Outputs are compared on those points.
+"""
+import argparse
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from utils import build_features_from_df, feature_column_names, monthly_feature_kernel
+
+warnings.filterwarnings("ignore")
+VARIABLES = ["GWETPROF", "RH2M", "T2M", "GWETROOT", "ALLSKY_SFC_SW_DWN", "PRECTOTCORR"]
+
+def build_features_pandas(df, n_lags=6):
+    # Implementation before the batched kernel, kept as the reference
+    monthly = df.resample('M').mean()
+    monthly = monthly.sort_index()
+    feat = pd.DataFrame(index=monthly.index)
+    for col in monthly.columns:
+        feat[f"{col}_t"] = monthly[col]
+        for lag in range(1, n_lags+1):
+            feat[f"{col}_lag{lag}"] = monthly[col].shift(lag)
+    for col in monthly.columns:
+        feat[f"{col}_rollmean3"] = monthly[col].rolling(3, min_periods=1).mean()
+        feat[f"{col}_rollstd6"] = monthly[col].rolling(6, min_periods=1).std()
+    for col in monthly.columns:
+        feat[f"{col}_amp12"] = monthly[col].rolling(12, min_periods=1).apply(lambda x: np.nanmax(x)-np.nanmin(x))
+    feat["month"] = feat.index.month
+    feat["month_sin"] = np.sin(2*np.pi*feat["month"]/12)
+    feat["month_cos"] = np.cos(2*np.pi*feat["month"]/12)
+    feat = feat.drop(columns=["month"])
+    return feat
+
+def synthetic_monthly(n_points, seed=42):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2017-01-31", "2023-12-31", freq="M")
+    season = np.sin(2*np.pi*index.month.to_numpy()/12)[None, :, None]
+    values = 20 + 10*season + rng.normal(0, 3, (n_points, len(index), len(VARIABLES)))
+    values[rng.random(values.shape) < 0.01] = np.nan
+    return index, values
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--old-points", type=int, default=200)
+    args = parser.parse_args()
+
+    index, monthly = synthetic_monthly(args.points)
+    columns = feature_column_names(VARIABLES)
+
+    # Month-end daily frames resample to the same monthly values
+    old_frames = [pd.DataFrame(monthly[i], index=index, columns=VARIABLES) for i in range(args.old_points)]
+    t0 = time.perf_counter()
+    old = [build_features_pandas(df) for df in old_frames]
+    old_per_point = (time.perf_counter() - t0) / args.old_points
+
+    t0 = time.perf_counter()
+    new_single = [build_features_from_df(df) for df in old_frames]
+    single_per_point = (time.perf_counter() - t0) / args.old_points
+
+    t0 = time.perf_counter()
+    batched = monthly_feature_kernel(monthly, index.month, n_lags=6)
+    batched_seconds = time.perf_counter() - t0
+
+    for i, ref in enumerate(old):
+        assert list(ref.columns) == columns == list(new_single[i].columns)
+        np.testing.assert_allclose(batched[i], ref.to_numpy(), rtol=1e-12, atol=1e-12, equal_nan=True)
+        np.testing.assert_allclose(new_single[i].to_numpy(), ref.to_numpy(), rtol=1e-12, atol=1e-12, equal_nan=True)
+
+    n = args.points
+    print(f"{n} points x {len(index)} months x {len(VARIABLES)} variables -> {batched.shape[2]} features")
+    print(f"{'implementation':<32}{'seconds':>12}{'points/s':>12}")
+    print(f"{'pandas per point (extrapolated)':<32}{old_per_point * n:>12.2f}{1 / old_per_point:>12.0f}")
+    print(f"{'kernel per point':<32}{single_per_point * n:>12.2f}{1 / single_per_point:>12.0f}")
+    print(f"{'kernel batched':<32}{batched_seconds:>12.2f}{n / batched_seconds:>12.0f}")
+    print(f"Outputs match the pandas implementation on {args.old_points} points")
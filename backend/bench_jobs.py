@@ -0,0 +1,51 @@
+# bench_jobs.py
+"""
+Concurrent identical /api/rf_predict requests: the forest fitted inside
+every request (the old route) against the job queue, where the requests
+share one job run in a worker process. Also times ?async=1 submission,
+which returns before the work is done.
+
+Needs EARTHDATA_TOKEN set (any value) for app.py to import; nothing is
+fetched.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import ndvi_rf
+from app import app, job_queue
+
+def timed_concurrently(fn, n):
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(n) as pool:
+        results = list(pool.map(lambda _: fn(), range(n)))
+    return time.perf_counter() - t0, results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=8)
+    args = parser.parse_args()
+    client = app.test_client()
+
+    inline_s, expected = timed_concurrently(lambda: ndvi_rf.predict_year(), args.requests)
+
+    # First job: starts the worker processes
+    t0 = time.perf_counter()
+    job = client.get('/api/rf_predict?async=1').get_json()
+    submit_ms = (time.perf_counter() - t0) * 1000
+    first_s = job_queue.wait(job["id"])["finished_at"] - job["submitted_at"]
+    job_queue.clear()
+
+    def request():
+        r = client.get('/api/rf_predict')
+        assert r.status_code == 200, r.get_json()
+        return r.get_json()
+    queued_s, results = timed_concurrently(request, args.requests)
+    assert all(r == expected[0] for r in results + expected)
+    stats = job_queue.stats()
+
+    print(f"{args.requests} concurrent identical requests")
+    print(f"{'fit per request (old route)':<30}{inline_s:>8.2f}s")
+    print(f"{'job queue, one shared job':<30}{queued_s:>8.2f}s  "
+          f"(submitted {stats['submitted']}, deduplicated {stats['deduplicated']})")
+    print(f"{'?async=1 response':<30}{submit_ms:>8.1f}ms (first job {first_s:.2f}s incl. worker start)")
+    job_queue.shutdown()
@@ -0,0 +1,117 @@
+# bench_power_series.py
+"""
+POWER data for dashboard map clicks: the four per-parameter-set routes
+(/climate, /ndvi, /evi, /soil_moisture, one upstream request each, POWER's
+nested JSON) against one /api/power query for all their parameters (one
+combined upstream request, columnar JSON), followed by a request for a
+subset of those parameters (served from the per-parameter cache).
+
+Runs against a local POWER point stub (--latency seconds per request) with
+a temporary POWER cache; counts the requests reaching the stub and the
+response bytes. Values are checked to match between the two paths. Needs
+EARTHDATA_TOKEN set (any value) for app.py to import.
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+os.environ["POWER_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_power_series_")
+
+import numpy as np
+import pandas as pd
+import app as api
+import utils
+
+OLD_ROUTES = {"/climate": "T2M_MAX,T2M_MIN,PRECTOTCORR,RH2M,ALLSKY_SFC_SW_DWN", "/ndvi": "NDVI", "/evi": "EVI",
+              "/soil_moisture": "GWETPROF"}
+ALL_PARAMETERS = ",".join(OLD_ROUTES.values())
+SUBSET = "T2M_MAX,PRECTOTCORR,GWETPROF"
+LATENCY = [0.0]
+upstream_requests = [0]
+counter_lock = threading.Lock()
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with counter_lock:
+            upstream_requests[0] += 1
+        time.sleep(LATENCY[0])
+        q = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        dates = pd.date_range(pd.to_datetime(q["start"]), pd.to_datetime(q["end"]), freq="D").strftime("%Y%m%d")
+        parameter = {}
+        for p in q["parameters"].split(","):
+            rng = np.random.default_rng(zlib.crc32(f"{float(q['latitude']):.2f},{float(q['longitude']):.2f},{p}".encode()))
+            values = np.round(rng.normal(20, 5, len(dates)), 2)
+            values[rng.random(len(dates)) < 0.02] = -999.0
+            parameter[p] = dict(zip(dates, values.tolist()))
+        payload = json.dumps({"type": "Feature", "geometry": {"type": "Point", "coordinates": [0, 0, 0]},
+                              "properties": {"parameter": parameter},
+                              "header": {"fill_value": -999.0, "start": q["start"], "end": q["end"]}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def get(client, path, params):
+    r = client.get(path, query_string=params)
+    assert r.status_code == 200, r.get_json()
+    return r.get_json(), len(r.data)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clicks", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+    LATENCY[0] = args.latency
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api.POWER_URL = utils.POWER_URL = f"http://127.0.0.1:{server.server_port}/api/temporal/daily/point"
+    client = api.app.test_client()
+
+    rng = np.random.default_rng(0)
+    # Coordinates at the cache precision, so both paths ask POWER for the same point
+    clicks = [{"lat": f"{lat:.2f}", "lon": f"{lon:.2f}", "start": "20200101", "end": "20201231"}
+              for lat, lon in zip(rng.uniform(30, 45, args.clicks), rng.uniform(-120, -80, args.clicks))]
+
+    runs = {}
+    for label in ("four routes", "/api/power, all", "/api/power, subset"):
+        upstream_requests[0] = 0
+        t0, nbytes, responses = time.perf_counter(), 0, []
+        for params in clicks:
+            if label == "four routes":
+                bodies = {}
+                for route in OLD_ROUTES:
+                    body, n = get(client, route, params)
+                    bodies.update(body["properties"]["parameter"])
+                    nbytes += n
+            else:
+                bodies, n = get(client, "/api/power",
+                                dict(params, parameters=ALL_PARAMETERS if label.endswith("all") else SUBSET))
+                nbytes += n
+            responses.append(bodies)
+        runs[label] = (upstream_requests[0], nbytes, time.perf_counter() - t0, responses)
+
+    for old, new in zip(runs["four routes"][3], runs["/api/power, all"][3]):
+        for p, series in new["parameters"].items():
+            expected = [None if v == -999.0 else v for v in old[p].values()]
+            assert series == expected, p
+        assert new["dates"][0] == "2020-01-01" and len(new["dates"]) == len(old["T2M_MAX"])
+    for full, subset in zip(runs["/api/power, all"][3], runs["/api/power, subset"][3]):
+        assert all(subset["parameters"][p] == full["parameters"][p] for p in SUBSET.split(","))
+
+    print(f"{args.clicks} map clicks, one year of daily data, stub latency {args.latency}s")
+    print(f"{'':<22}{'upstream':>10}{'KB':>10}{'seconds':>9}")
+    for label, (upstream, nbytes, seconds, _) in runs.items():
+        print(f"{label:<22}{upstream:>10}{nbytes / 1024:>10.0f}{seconds:>9.2f}")
@@ -0,0 +1,88 @@
+# bench_response_format.py
+"""
+Encoding a bulk NDVI response (--rows rows of date, NDVI, EVI, lat, lon,
+as fetch_bulk_ndvi returns them): jsonify(df.to_dict(orient='records')),
+what /api/bulk_ndvi did, against each format response_format offers.
+Reports encode time, bytes and gzipped bytes (with the encode + gzip time,
+as a client sending Accept-Encoding: gzip gets it). Values are full float64
+precision, and every format is decoded and checked against the frame for
+exact equality (floats bit for bit, dates as ISO 8601).
+"""
+import argparse
+import gzip
+import io
+import json
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from flask import Flask, jsonify
+from response_format import GZIP_LEVEL, encode
+
+def bulk_ndvi_frame(rows, seed=0):
+    # 16-day MODIS composites for as many points as it takes; ~2% missing values.
+    # Values are not rounded, so every float needs all 17 significant digits
+    dates = pd.date_range("2015-01-01", periods=250, freq="16D")
+    n_points = -(-rows // len(dates))
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(30, 45, n_points)
+    lon = rng.uniform(-120, -80, n_points)
+    df = pd.DataFrame({
+        "date": np.tile(dates, n_points),
+        "NDVI": rng.uniform(-0.2, 0.9, n_points * len(dates)),
+        "EVI": rng.uniform(-0.2, 0.8, n_points * len(dates)),
+        "lat": np.repeat(lat, len(dates)),
+        "lon": np.repeat(lon, len(dates)),
+    }).iloc[:rows]
+    df.loc[rng.random(len(df)) < 0.02, "NDVI"] = np.nan
+    return df
+
+def old_encode(df):
+    # The endpoints before content negotiation
+    app = Flask(__name__)
+    with app.app_context():
+        return jsonify(df.to_dict(orient='records')).get_data()
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+def check(df, fmt, body, dates="iso"):
+    # Exact comparison: every float column bit for bit (NaN as null), every date
+    if fmt == "arrow":
+        back = pa.ipc.open_stream(io.BytesIO(body)).read_all().to_pandas()
+        pd.testing.assert_frame_equal(back, df.reset_index(drop=True), check_exact=True)
+        return
+    decoded = json.loads(body)
+    if fmt == "records":
+        assert len(decoded) == len(df) and set(decoded[0]) == set(df.columns)  # jsonify sorts keys
+        decoded = {c: [r[c] for r in decoded] for c in df.columns}
+    for column in ("NDVI", "EVI", "lat", "lon"):
+        got = np.array([np.nan if v is None else v for v in decoded[column]], dtype=float)
+        np.testing.assert_array_equal(got, df[column].to_numpy())
+    expected = (df["date"].dt.strftime("%Y-%m-%dT%H:%M:%S.000") if dates == "iso"
+                else df["date"].dt.strftime("%a, %d %b %Y %H:%M:%S GMT"))
+    assert decoded["date"] == expected.tolist()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    df = bulk_ndvi_frame(args.rows)
+
+    runs = {}
+    body, seconds = timed(lambda: old_encode(df))
+    runs["jsonify records"] = (body, seconds)
+    # jsonify writes NaN, which is not JSON, and RFC 822 dates
+    check(df, "records", body.replace(b"NaN", b"null"), dates="rfc822")
+    for fmt in ("records", "columns", "arrow"):
+        body, seconds = timed(lambda: encode(df, fmt))
+        check(df, fmt, body)
+        runs[fmt] = (body, seconds)
+
+    print(f"{len(df)} rows, gzip level {GZIP_LEVEL}")
+    print(f"{'':<18}{'encode s':>9}{'MB':>8}{'gzip MB':>9}{'+gzip s':>9}")
+    for label, (body, seconds) in runs.items():
+        packed, gz_seconds = timed(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL))
+        print(f"{label:<18}{seconds:>9.2f}{len(body) / 1e6:>8.1f}{len(packed) / 1e6:>9.1f}{seconds + gz_seconds:>9.2f}")
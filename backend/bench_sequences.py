@@ -0,0 +1,71 @@
+# bench_sequences.py
+"""
+LSTM sequence building over long multi-point histories: the previous
+create_sequences (a Python loop appending window slices, then np.array)
+against utils.sequence_windows (strided views, one np.concatenate), as
+forecasting_model.build_dataset stacks them.
+
+Each run is a fresh process; peak RSS is its VmHWM (Linux) above the RSS
+before the series are built. Outputs are compared on the same series.
+"""
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from utils import sequence_windows
+
+def legacy_create_sequences(data, seq_length=12):
+    # Implementation before sequence_windows, kept as the reference
+    X, y = [], []
+    for i in range(len(data) - seq_length):
+        X.append(data[i:i+seq_length])
+        y.append(data[i+seq_length])
+    return np.array(X), np.array(y)
+
+def series(points, months, variables):
+    rng = np.random.default_rng(42)
+    return [rng.random((months, variables)) for _ in range(points)]
+
+def rss_mb(field):
+    with open("/proc/self/status") as f:
+        fields = dict(line.split(":", 1) for line in f)
+    return int(fields[field].split()[0]) / 1024
+
+def run(method, points, months, variables, seq_length):
+    baseline = rss_mb("VmRSS")
+    data = series(points, months, variables)
+    build = legacy_create_sequences if method == "loop + np.array" else sequence_windows
+    t0 = time.perf_counter()
+    windows = [build(d, seq_length) for d in data]
+    X = np.concatenate([w[0] for w in windows])
+    y = np.concatenate([w[1] for w in windows])
+    seconds = time.perf_counter() - t0
+    return seconds, rss_mb("VmHWM") - baseline, X.shape, float(X.sum()), float(y.sum())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--months", type=int, default=480)
+    parser.add_argument("--variables", type=int, default=4)
+    parser.add_argument("--seq-length", type=int, default=12)
+    args = parser.parse_args()
+
+    data = series(3, args.months, args.variables)
+    for d in data:
+        for old, new in zip(legacy_create_sequences(d, args.seq_length), sequence_windows(d, args.seq_length)):
+            assert np.array_equal(old, new)
+
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for method in ("loop + np.array", "sequence_windows"):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results[method] = pool.submit(run, method, args.points, args.months, args.variables,
+                                          args.seq_length).result()
+    assert results["loop + np.array"][2:] == results["sequence_windows"][2:]
+
+    shape = results["sequence_windows"][2]
+    print(f"{args.points} points x {args.months} months x {args.variables} variables -> X {shape}")
+    print(f"{'':<20}{'seconds':>9}{'peak MB':>10}")
+    for method, (seconds, peak, *_) in results.items():
+        print(f"{method:<20}{seconds:>9.2f}{peak:>10.0f}")
@@ -0,0 +1,96 @@
+# bench_single_flight.py
+"""
+Dashboard load against /climate, /ndvi, /evi and /soil_moisture: --users
+clients each requesting all four with the default parameters at the same
+time, then again (a page refresh). Counts the upstream POWER requests the
+old routes made (one per request) against the single-flight routes.
+
+Runs against a local POWER stub that waits --latency seconds per request,
+counting what reaches it. Needs EARTHDATA_TOKEN set (any value) for app.py
+to import.
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import app as api
+import http_client
+
+ROUTES = ["/climate", "/ndvi", "/evi", "/soil_moisture"]
+LATENCY = [0.0]
+upstream_requests = [0]
+counter_lock = threading.Lock()
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with counter_lock:
+            upstream_requests[0] += 1
+        time.sleep(LATENCY[0])
+        payload = json.dumps({"properties": {"parameter": {"T2M": {"20200101": 10.0}}}, "path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def load(client, users, route_fn):
+    # Every user requests every route twice (page load, then refresh)
+    def user(_):
+        bodies = []
+        for _ in range(2):
+            for route in ROUTES:
+                status, body = route_fn(client, route)
+                assert status == 200, body
+                bodies.append(body)
+        return bodies
+    upstream_requests[0] = 0
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(users) as pool:
+        results = list(pool.map(user, range(users)))
+    return time.perf_counter() - t0, upstream_requests[0], results
+
+def old_route(client, route):
+    # The routes before single flight: one upstream request each
+    parameters = {"/climate": "T2M_MAX,T2M_MIN,PRECTOTCORR,RH2M,ALLSKY_SFC_SW_DWN", "/ndvi": "NDVI",
+                  "/evi": "EVI", "/soil_moisture": "GWETPROF"}[route]
+    params = {"start": "20200101", "end": "20201231", "latitude": "38.5", "longitude": "-121.5",
+              "parameters": parameters, "community": "AG", "format": "JSON"}
+    response = http_client.get(api.POWER_URL, params=params)
+    return response.status_code, response.json()
+
+def new_route(client, route):
+    response = client.get(route)
+    return response.status_code, response.get_json()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    LATENCY[0] = args.latency
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api.POWER_URL = f"http://127.0.0.1:{server.server_port}/api/temporal/daily/point"
+    client = api.app.test_client()
+
+    old_s, old_upstream, old_bodies = load(client, args.users, old_route)
+    new_s, new_upstream, new_bodies = load(client, args.users, new_route)
+    assert old_bodies == new_bodies
+    stats = api.power_flight.stats()
+    assert stats["upstream"] == new_upstream
+
+    requests = 2 * len(ROUTES) * args.users
+    print(f"{args.users} users x {len(ROUTES)} routes x 2 loads = {requests} requests, "
+          f"stub latency {args.latency}s")
+    print(f"{'':<16}{'upstream':>10}{'seconds':>9}")
+    print(f"{'old routes':<16}{old_upstream:>10}{old_s:>9.2f}")
+    print(f"{'single flight':<16}{new_upstream:>10}{new_s:>9.2f}")
+    print("single_flight stats:", stats)
@@ -0,0 +1,85 @@
+# bench_startup.py
+"""
+Cold start of the API: seconds from launching a server process until GET /
+answers, and until GET /ready reports every startup step loaded.
+
+"eager" reproduces app.py before deferred startup: TensorFlow, Keras,
+sklearn, plotly and xgboost imported with the module and the startup steps
+(NDVI CSV, scaler, sequences, LSTM artifact) run before serving. "lazy" is
+app.py as it is. Each run is a fresh process serving on a local port; the
+median of --runs is reported. Needs EARTHDATA_TOKEN set (any value).
+"""
+import argparse
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+SERVER = """
+import sys
+if sys.argv[1] == "eager":
+    import tensorflow as tf
+    from tensorflow.keras.models import load_model
+    from sklearn.preprocessing import MinMaxScaler
+    import plotly.express as px
+    import xgboost as xgb
+import app
+if sys.argv[1] == "eager":
+    for name in app.startup.stats()["steps"]:
+        try:
+            app.startup.get(name)
+        except app.StartupError:
+            pass
+from werkzeug.serving import make_server
+make_server("127.0.0.1", int(sys.argv[2]), app.app, threaded=True).serve_forever()
+"""
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+def cold_start(mode):
+    port = free_port()
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", SERVER, mode, str(port)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        first = ready = None
+        while ready is None:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{mode} server exited with {proc.returncode}")
+            if first is None and status(f"http://127.0.0.1:{port}/") == 200:
+                first = time.perf_counter() - t0
+            if first is not None and status(f"http://127.0.0.1:{port}/ready") == 200:
+                ready = time.perf_counter() - t0
+            time.sleep(0.01)
+        return first, ready
+    finally:
+        proc.terminate()
+        proc.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"median of {args.runs} cold starts")
+    print(f"{'':<8}{'first / s':>11}{'ready s':>9}")
+    for mode in ("eager", "lazy"):
+        runs = [cold_start(mode) for _ in range(args.runs)]
+        first = statistics.median(r[0] for r in runs)
+        ready = statistics.median(r[1] for r in runs)
+        print(f"{mode:<8}{first:>11.2f}{ready:>9.2f}")
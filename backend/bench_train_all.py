@@ -0,0 +1,99 @@
+# bench_train_all.py
+"""
+Retraining all POWER-based models: the four scripts one after another (each
+fetching and featurising its own points, as before train_all.py) against
+train_all.run (one fetch, one feature pass into a fresh feature store, jobs
+in parallel processes).
+
+Runs offline against a temporary POWER cache seeded with synthetic daily
+data for the sampled points, so only the local work is timed. Both runs use
+the same points and must report the same sample counts and scores for the
+deterministic models.
+"""
+import argparse
+import importlib
+import os
+import tempfile
+import time
+import warnings
+
+TMP = tempfile.mkdtemp(prefix="bench_train_all_")
+# Set before the trainers (and the spawned job processes) read their config
+os.environ["DATA_DIR"] = os.path.join(TMP, "data")
+os.environ["POWER_CACHE_DIR"] = os.path.join(TMP, "power_cache")
+os.environ["POWER_OFFLINE"] = "1"
+
+import numpy as np
+import pandas as pd
+import power_cache
+import training_data
+import train_all
+from utils import fetch_power_point
+
+warnings.filterwarnings("ignore")
+PARAMETERS = ["T2M", "PRECTOT", "ALLSKY_SFC_SW_DWN", "RH2M", "GWETPROF", "GWETROOT"]
+DETERMINISTIC = ["bloom_xgb", "desertification_rf", "bloom_clustering"]
+
+def seed_cache(points):
+    """Cache synthetic daily POWER frames (named as the API returns them) for every point."""
+    dates = pd.date_range(pd.to_datetime(training_data.START), pd.to_datetime(training_data.END), freq="D", name="date")
+    season = np.sin(2*np.pi*(dates.dayofyear.to_numpy() - 80)/365)
+    for i, (lat, lon) in enumerate(points):
+        rng = np.random.default_rng(i)
+        wet = rng.random(len(dates)) < 0.2 + 0.1*season
+        daily = pd.DataFrame({
+            "T2M": 22 + 10*season + rng.normal(0, 3, len(dates)) - 0.3*(lat - 20),
+            "PRECTOTCORR": np.where(wet, rng.exponential(4, len(dates)), 0.0),
+            "ALLSKY_SFC_SW_DWN": 20 + 6*season + rng.normal(0, 2, len(dates)),
+            "RH2M": 45 - 15*season + rng.normal(0, 8, len(dates)),
+            "GWETPROF": np.clip(0.3 + 0.1*season + rng.normal(0, 0.05, len(dates)), 0, 1),
+            "GWETROOT": np.clip(0.3 + 0.1*season + rng.normal(0, 0.05, len(dates)), 0, 1),
+        }, index=dates)
+        fake = lambda *args: daily
+        power_cache.get_power_point(lat, lon, training_data.START, training_data.END, PARAMETERS, fake, offline=False)
+    # Check the frames come back through the normal path
+    fetch_power_point(*points[0], training_data.START, training_data.END)
+
+def sequential(jobs, models_dir):
+    os.makedirs(models_dir, exist_ok=True)
+    results = {}
+    for name in jobs:
+        module = importlib.import_module(train_all.JOBS[name])
+        points = training_data.sample_points(module.n_samples)
+        features = training_data.point_features(training_data.fetch_points(points))
+        results[name] = module.train(features, models_dir=models_dir)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", default=",".join(train_all.JOBS))
+    args = parser.parse_args()
+    jobs = args.jobs.split(",")
+
+    n = max(importlib.import_module(train_all.JOBS[name]).n_samples for name in jobs)
+    seed_cache(training_data.sample_points(n))
+
+    t0 = time.perf_counter()
+    expected = sequential(jobs, os.path.join(TMP, "sequential"))
+    sequential_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    manifest = train_all.run(jobs, os.path.join(TMP, "parallel"), refresh=True)
+    parallel_s = time.perf_counter() - t0
+
+    for name in jobs:
+        job = manifest["jobs"][name]
+        assert job["status"] == "ok", job
+        assert job["samples"] == expected[name]["samples"], name
+        if name in DETERMINISTIC:
+            for key in ("test_accuracy", "cluster_sizes"):
+                assert job.get(key) == expected[name].get(key), (name, key)
+
+    print(f"\n{'job':<22}{'points':>8}{'samples':>10}{'job s':>8}")
+    for name in jobs:
+        job = manifest["jobs"][name]
+        print(f"{name:<22}{job['points']:>8}{job['samples']:>10}{job['seconds']:>8.1f}")
+    print(f"\nsequential scripts: {sequential_s:.1f}s")
+    print(f"train_all.run:      {parallel_s:.1f}s (features {manifest['features_seconds']:.1f}s, "
+          f"{os.cpu_count()} cpus)")
+    print("Artifacts and manifest in", TMP)
@@ -0,0 +1,168 @@
+# bench_training_scale.py
+"""
+Data preparation for model_train.py at scale: today's 120 random points
+(one POWER point request each, per-point build_features_from_df, list +
+np.vstack) against 10k stratified points from POWER regional requests with
+batched features and the preallocated build_dataset.
+
+Both run against a local stub of the POWER point and regional endpoints
+serving one synthetic 0.5 x 0.625 degree grid, rate limited like
+power.larc.nasa.gov. Each response waits --point-latency / --region-latency
+seconds first; these stand in for network + server time and should be set
+from real measurements (regional requests return a whole tile and are
+slower than point requests). The stub encodes JSON in this process, so on
+few cores its CPU time adds to the regional run.
+
+Checks: build_dataset matches the list + vstack version exactly on the same
+tables, batched point features match build_features_from_df, and regional
+features for the 120 points match their point-request features.
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TMP = tempfile.mkdtemp(prefix="bench_training_scale_")
+os.environ["DATA_DIR"] = TMP
+os.environ["MODELS_DIR"] = os.path.join(TMP, "models")
+
+import numpy as np
+import pandas as pd
+import http_client
+import rate_limit
+import training_data
+import utils
+from model_train import build_dataset
+from utils import build_features_from_df, create_synthetic_label_from_monthly
+
+LAT_STEP, LON_STEP = 0.5, 0.625
+DATES = pd.date_range(pd.to_datetime(training_data.START), pd.to_datetime(training_data.END), freq="D")
+DATE_KEYS = DATES.strftime("%Y%m%d").tolist()
+SEASON = np.sin(2*np.pi*(DATES.dayofyear.to_numpy() - 80)/365)
+RESPONSE_NAMES = {"PRECTOT": "PRECTOTCORR"}
+LATENCY = {"point": 0.0, "regional": 0.0}
+
+def cell_series(lat, lon, parameter):
+    """Daily values of one grid cell, rounded like POWER."""
+    rng = np.random.default_rng(zlib.crc32(f"{lat:.3f},{lon:.3f},{parameter}".encode()))
+    noise = rng.normal(0, 1, len(DATES))
+    if parameter == "T2M":
+        values = 22 + 10*SEASON - 0.3*(lat - 20) + 3*noise
+    elif parameter == "PRECTOT":
+        values = np.where(rng.random(len(DATES)) < 0.2 + 0.1*SEASON, rng.exponential(4, len(DATES)), 0.0)
+    elif parameter == "RH2M":
+        values = 45 - 15*SEASON + 8*noise
+    else:
+        values = 20 + 6*SEASON + 0.05*lon + 2*noise
+    return dict(zip(DATE_KEYS, np.round(values, 2).tolist()))
+
+def snap(value, step):
+    return round(round(value / step) * step, 4)
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parameters = q["parameters"].split(",")
+        if url.path.endswith("/point"):
+            time.sleep(LATENCY["point"])
+            lat, lon = snap(float(q["latitude"]), LAT_STEP), snap(float(q["longitude"]), LON_STEP)
+            body = {"properties": {"parameter": {
+                RESPONSE_NAMES.get(p, p): cell_series(lat, lon, p) for p in parameters}}}
+        else:
+            time.sleep(LATENCY["regional"])
+            lats = np.arange(np.ceil(float(q["latitude-min"]) / LAT_STEP), np.floor(float(q["latitude-max"]) / LAT_STEP) + 1) * LAT_STEP
+            lons = np.arange(np.ceil(float(q["longitude-min"]) / LON_STEP), np.floor(float(q["longitude-max"]) / LON_STEP) + 1) * LON_STEP
+            (p,) = parameters
+            body = {"type": "FeatureCollection", "features": [
+                {"type": "Feature", "geometry": {"type": "Point", "coordinates": [round(lon, 4), round(lat, 4), 0]},
+                 "properties": {"parameter": {RESPONSE_NAMES.get(p, p): cell_series(round(lat, 4), round(lon, 4), p)}}}
+                for lat in lats for lon in lons]}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}/api/temporal/daily"
+    utils.POWER_URL, utils.POWER_REGIONAL_URL = f"{base}/point", f"{base}/regional"
+    rate_limit.HOST_RATE_LIMITS["127.0.0.1"] = rate_limit.HOST_RATE_LIMITS["power.larc.nasa.gov"]
+    return server
+
+def legacy_build_dataset(features):
+    # Implementation before the preallocated arrays, kept as the reference
+    all_X, all_y = [], []
+    for feat in features:
+        if feat is None:
+            continue
+        df_feat = feat.copy()
+        df_feat["label"] = create_synthetic_label_from_monthly(feat, temp_col="T2M_t", precip_col="PRECTOT_t")
+        df_feat = df_feat.dropna(axis=0, how='any')
+        if df_feat.shape[0] < 12:
+            continue
+        all_X.append(df_feat.drop(columns=["label"]).values)
+        all_y.append(df_feat["label"].astype(int).values)
+    return np.vstack(all_X), np.concatenate(all_y)
+
+def requests_made():
+    return sum(host["requests"] for host in http_client.stats().values())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--baseline-points", type=int, default=120)
+    parser.add_argument("--point-latency", type=float, default=1.0)
+    parser.add_argument("--region-latency", type=float, default=5.0)
+    args = parser.parse_args()
+    LATENCY.update(point=args.point_latency, regional=args.region_latency)
+    start_stub()
+
+    # Today: random points, one request each, per-point features, list + vstack
+    t0 = time.perf_counter()
+    points = training_data.sample_points(args.baseline_points)
+    frames = training_data.fetch_points(points)
+    legacy_tables = [None if df is None else build_features_from_df(df) for df in frames]
+    X_old, y_old = legacy_build_dataset(legacy_tables)
+    today_s, today_requests = time.perf_counter() - t0, requests_made()
+
+    X, y, _ = build_dataset(legacy_tables)
+    assert np.array_equal(X, X_old) and np.array_equal(y, y_old)
+    batched = training_data.point_features(frames)
+    for new, old in zip(batched, legacy_tables):
+        np.testing.assert_allclose(new.to_numpy(), old.to_numpy(), rtol=1e-12, atol=1e-12, equal_nan=True)
+
+    # Scaled: stratified points, regional requests, batched features, feature store, preallocated arrays
+    t0 = time.perf_counter()
+    big_points, tables = training_data.load_point_features(args.points, sampling="stratified", regional=True)
+    X_big, y_big, _ = build_dataset(tables)
+    scaled_s, scaled_requests = time.perf_counter() - t0, requests_made() - today_requests
+    cells = len({tuple(t.iloc[-1].to_numpy()) for t in tables if t is not None})
+
+    regional = training_data.region_features(points)
+    for new, old in zip(regional, batched):
+        pd.testing.assert_frame_equal(new[old.columns], old, check_exact=True)
+
+    print(f"stub latency: point {args.point_latency}s, regional {args.region_latency}s; "
+          f"{training_data.FETCH_WORKERS} workers; POWER rate limit "
+          f"{rate_limit.HOST_RATE_LIMITS['127.0.0.1'][0]:g} req/s")
+    print(f"{'':<36}{'points':>8}{'requests':>10}{'rows':>10}{'seconds':>9}")
+    print(f"{'random, point requests (today)':<36}{len(points):>8}{today_requests:>10}{len(y_old):>10}{today_s:>9.1f}")
+    print(f"{'stratified, regional requests':<36}{len(big_points):>8}{scaled_requests:>10}{len(y_big):>10}"
+          f"{scaled_s:>9.1f}")
+    print(f"{cells} distinct POWER cells among the {len(big_points)} points")
+    rate = rate_limit.HOST_RATE_LIMITS["power.larc.nasa.gov"][0]
+    print(f"{len(big_points)} point requests would take at least {len(big_points) / rate:.0f}s at the rate limit alone")
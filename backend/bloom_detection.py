@@ -3,7 +3,7 @@ import os
 from pathlib import Path
 import numpy as np
 import pandas as pd
-from utils import fetch_power_point, build_features_from_df
+from training_data import load_point_features, select_lags
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 import joblib
@@ -17,51 +17,54 @@ MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
 # Configuration
 n_samples = 50  # fewer for demo
-np.random.seed(42)
+N_LAGS = 3  # fewer lags for clustering
 
-lon_min, lon_max = -10, 40
-lat_min, lat_max = 20, 38
+def build_dataset(features):
+    """Stack the complete monthly rows of every point's feature table (see training_data.py)."""
+    all_X = []
+    feature_columns = None
+    for feat in features:
+        if feat is None:
+            continue
+        feat = select_lags(feat, N_LAGS)
+        df_feat = feat.dropna(axis=0, how='any')
+        if df_feat.shape[0] < 6:
+            continue
+        feature_columns = list(feat.columns)
+        all_X.append(df_feat.values)
 
-all_X = []
-scaler = StandardScaler()
+    if len(all_X) == 0:
+        raise ValueError("No samples collected.")
+    return np.vstack(all_X), feature_columns
 
-for i in range(n_samples):
-    lat = np.random.uniform(lat_min, lat_max)
-    lon = np.random.uniform(lon_min, lon_max)
-    try:
-        df_daily = fetch_power_point(lat, lon, "20170101", "20231231")
-    except KeyboardInterrupt:
-        print("Interrupted by user")
-        break
-    except Exception as e:
-        print("Fetch failed for", lat, lon, ":", str(e))
-        continue
-    feat = build_features_from_df(df_daily, n_lags=3)  # fewer lags for clustering
-    df_feat = feat.dropna(axis=0, how='any')
-    if df_feat.shape[0] < 6:
-        continue
-    X = df_feat.values
-    all_X.append(X)
-
-if len(all_X) == 0:
-    raise SystemExit("No samples collected.")
+def train(features, models_dir=MODELS_DIR, threads=None):
+    """Fit the K-Means bloom clustering and save models_dir/bloom_clustering.joblib. Returns metrics."""
+    # Concatenate
+    X_all, feature_columns = build_dataset(features)
+    print("Clustering data shape:", X_all.shape)
 
-# Concatenate
-X_all = np.vstack(all_X)
-print("Clustering data shape:", X_all.shape)
+    # Scale
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X_all)
 
-# Scale
-X_scaled = scaler.fit_transform(X_all)
+    # K-Means for 4 clusters: no bloom, early, peak, late
+    kmeans = KMeans(n_clusters=4, random_state=42, n_init=10)
+    clusters = kmeans.fit_predict(X_scaled)
 
-# K-Means for 4 clusters: no bloom, early, peak, late
-kmeans = KMeans(n_clusters=4, random_state=42, n_init=10)
-clusters = kmeans.fit_predict(X_scaled)
+    # Save model
+    model_path = Path(models_dir) / "bloom_clustering.joblib"
+    joblib.dump({"kmeans": kmeans, "scaler": scaler, "feature_columns": feature_columns}, model_path)
+    print("Saved clustering model to", model_path)
 
-# Save model
-model_path = MODELS_DIR / "bloom_clustering.joblib"
-joblib.dump({"kmeans": kmeans, "scaler": scaler, "feature_columns": list(feat.columns)}, model_path)
-print("Saved clustering model to", model_path)
+    # Quick eval: cluster sizes
+    unique, counts = np.unique(clusters, return_counts=True)
+    print("Cluster sizes:", dict(zip(unique, counts)))
+    return {"artifact": str(model_path), "samples": int(len(X_all)),
+            "cluster_sizes": {int(k): int(v) for k, v in zip(unique, counts)}}
 
-# Quick eval: cluster sizes
-unique, counts = np.unique(clusters, return_counts=True)
-print("Cluster sizes:", dict(zip(unique, counts)))
+if __name__ == "__main__":
+    points, features = load_point_features(n_samples, n_lags=N_LAGS)
+    try:
+        train(features)
+    except ValueError as e:
+        raise SystemExit(str(e))
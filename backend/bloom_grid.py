@@ -0,0 +1,96 @@
+# bloom_grid.py
+"""
+Precompute bloom-stage and desertification risk over a regular lat/lon grid.
+
+    python bloom_grid.py --name north_africa --bbox 20,38,-10,40 --res 0.5 --month 2023-03
+
+writes GRIDS_DIR/<name>/<month>/ with one row-major uint8 raster per layer
+(rows north to south, columns west to east, cell centres) and meta.json
+describing the bbox, shape and layers. The API serves these files as static,
+cacheable downloads (/api/grids/...), so map pages fetch a few KB instead of
+scoring points or shipping thousands of GeoJSON features.
+
+Layers:
+    stage              predicted bloom stage class (0-3, see bloom_stage.CLASS_NAMES)
+    bloom_probability  1 - P(no bloom), scaled to 0-254
+    desert_risk        desertification_rf P(risk), scaled to 0-254 (if the model exists)
+255 marks cells with no data.
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+import joblib
+import numpy as np
+import bloom_stage
+
+MODELS_DIR = Path(os.environ.get("MODELS_DIR", "./models"))
+GRIDS_DIR = Path(os.environ.get("GRIDS_DIR", Path(os.environ.get("DATA_DIR", "./data")) / "grids"))
+NODATA = 255
+
+def grid_points(lat_min, lat_max, lon_min, lon_max, res):
+    """Cell centres, north to south then west to east. Returns (lats, lons, points)."""
+    lats = np.arange(lat_max - res / 2, lat_min, -res)
+    lons = np.arange(lon_min + res / 2, lon_max, res)
+    points = [(float(lat), float(lon)) for lat in lats for lon in lons]
+    return lats, lons, points
+
+def quantize(prob):
+    return np.round(np.clip(prob, 0, 1) * 254).astype(np.uint8)
+
+def build_grid(name, bbox, res, month, models_dir=MODELS_DIR, grids_dir=GRIDS_DIR):
+    lat_min, lat_max, lon_min, lon_max = bbox
+    lats, lons, points = grid_points(lat_min, lat_max, lon_min, lon_max, res)
+    shape = (len(lats), len(lons))
+
+    bloom = joblib.load(Path(models_dir) / "bloom_model.joblib")
+    desert_path = Path(models_dir) / "desertification_rf.joblib"
+    desert = joblib.load(desert_path) if desert_path.exists() else None
+
+    # One feature pass serves both models: desertification's n_lags=3 columns
+    # are a subset of the n_lags=6 set
+    variables = bloom_stage.model_variables(bloom["feature_columns"])
+    columns, X, ok, errors, timings = bloom_stage.point_features(points, month, variables)
+    print(f"{len(ok)}/{len(points)} cells with data ({len(errors)} fetch errors)")
+
+    layers = {k: np.full(len(points), NODATA, dtype=np.uint8) for k in ("stage", "bloom_probability")}
+    if ok:
+        import xgboost as xgb  # the API imports this module for GRIDS_DIR only
+        cols = bloom["feature_columns"]
+        probs = bloom["model"].predict(xgb.DMatrix(bloom_stage.select_columns(X, columns, cols), feature_names=list(cols)))
+        layers["stage"][ok] = np.argmax(probs, axis=1)
+        layers["bloom_probability"][ok] = quantize(1 - probs[:, 0])
+    if desert is not None:
+        layers["desert_risk"] = np.full(len(points), NODATA, dtype=np.uint8)
+        if ok:
+            risk = desert["rf"].predict_proba(bloom_stage.select_columns(X, columns, desert["feature_columns"]))[:, 1]
+            layers["desert_risk"][ok] = quantize(risk)
+
+    out_dir = Path(grids_dir) / name / month
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for layer, values in layers.items():
+        (out_dir / f"{layer}.bin").write_bytes(values.reshape(shape).tobytes())
+    meta = {
+        "name": name,
+        "month": month,
+        "bbox": {"lat_min": lat_min, "lat_max": lat_max, "lon_min": lon_min, "lon_max": lon_max},
+        "resolution": res,
+        "shape": list(shape),
+        "dtype": "uint8",
+        "nodata": NODATA,
+        "order": "row-major, north to south, west to east",
+        "layers": sorted(layers),
+        "classes": bloom_stage.CLASS_NAMES,
+    }
+    (out_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+    print(f"Wrote {shape[0]}x{shape[1]} grid to {out_dir}")
+    return out_dir
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--name", default="north_africa")
+    parser.add_argument("--bbox", default="20,38,-10,40", help="lat_min,lat_max,lon_min,lon_max")
+    parser.add_argument("--res", type=float, default=0.5, help="cell size in degrees")
+    parser.add_argument("--month", required=True, help="YYYY-MM")
+    args = parser.parse_args()
+    build_grid(args.name, [float(v) for v in args.bbox.split(",")], args.res, args.month)
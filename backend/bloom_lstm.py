@@ -0,0 +1,147 @@
+# bloom_lstm.py
+"""
+Offline training job and inference helpers for the /bloom_prediction LSTM.
+
+Run `python bloom_lstm.py` to fit the model and write a versioned artifact to
+models/bloom_lstm/<version>/. The API loads the newest artifact once at startup
+(see model_registry.py) and only runs inference per request.
+"""
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import joblib
+from utils import fetch_power_point, sequence_windows
+
+MODELS_DIR = Path(os.environ.get("MODELS_DIR", "./models"))
+ARTIFACT_NAME = "bloom_lstm"
+NDVI_CSV = "NDVI_TimeSeries_CentralValley (2).csv"
+
+LOCATIONS = {
+    'North_CA': (38.5, -121.5),
+    'South_CA': (33.0, -117.0)
+}
+# POWER parameter -> feature name
+CLIMATE_PARAMS = {"T2M": "Temp", "PRECTOTCORR": "Rainfall", "RH2M": "Humidity"}
+FEATURES = ['NDVI', 'Temp', 'Rainfall', 'Humidity']
+SEQ_LENGTH = 5
+
+def load_ndvi(csv_path=NDVI_CSV):
+    """Load the monthly NDVI series with a 'date' column, sorted by date."""
+    df_ndvi = pd.read_csv(csv_path)
+    df_ndvi['NDVI'] = df_ndvi['NDVI'].astype(float)
+    df_ndvi['year'] = df_ndvi['year'].astype(int)
+    df_ndvi['month'] = df_ndvi['month'].astype(int)
+    df_ndvi['date'] = pd.to_datetime(df_ndvi['year'].astype(str) + '-' + df_ndvi['month'].astype(str) + '-01')
+    return df_ndvi.sort_values('date')
+
+def build_training_frame(df_ndvi, locations=LOCATIONS):
+    """
+    Merge the NDVI series with NASA POWER climate for every location.
+    Returns a frame sorted by (Region, date) with columns date, Region + FEATURES.
+    """
+    start_date = df_ndvi['date'].min().strftime('%Y%m%d')
+    end_date = df_ndvi['date'].max().strftime('%Y%m%d')
+    dfs_climate = []
+    for name, (lat, lon) in locations.items():
+        df_clim = fetch_power_point(lat, lon, start_date, end_date, parameters=list(CLIMATE_PARAMS))
+        df_clim = df_clim.rename(columns=CLIMATE_PARAMS).reset_index()
+        df_clim['Region'] = name
+        dfs_climate.append(df_clim)
+    df_climate_all = pd.concat(dfs_climate, ignore_index=True)
+
+    df_ndvi_expanded = pd.concat([df_ndvi.assign(Region=name) for name in locations.keys()], ignore_index=True)
+    df_full = pd.merge(df_ndvi_expanded, df_climate_all, on=['date', 'Region'], how='left')
+    df_full = df_full.sort_values(['Region', 'date']).reset_index(drop=True)
+    return df_full[['date', 'Region'] + FEATURES]
+
+def train(df_full, seq_length=SEQ_LENGTH, epochs=50):
+    """
+    Fit the scaler and LSTM on the first 80% of the sequences.
+    Returns (model, scaler, split).
+    """
+    from sklearn.preprocessing import MinMaxScaler
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import LSTM, Dense
+
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    scaled_data = scaler.fit_transform(df_full[FEATURES])
+    X, y = sequence_windows(scaled_data, seq_length, target=0)
+    split = int(len(X)*0.8)
+
+    model = Sequential()
+    model.add(LSTM(50, activation='relu', input_shape=(seq_length, len(FEATURES))))
+    model.add(Dense(1))
+    model.compile(optimizer='adam', loss='mse')
+    model.fit(X[:split], y[:split], epochs=epochs, batch_size=8, verbose=0)
+    return model, scaler, split
+
+def save_artifact(model, scaler, df_full, split, seq_length=SEQ_LENGTH, models_dir=MODELS_DIR, version=None):
+    """
+    Write model.h5 + metadata.joblib to models_dir/bloom_lstm/<version>/.
+    Returns the artifact directory.
+    """
+    version = version or datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    artifact_dir = Path(models_dir) / ARTIFACT_NAME / version
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+    model.save(artifact_dir / "model.h5")
+    joblib.dump({
+        "version": version,
+        "scaler": scaler,
+        "features": FEATURES,
+        "seq_length": seq_length,
+        "split": split,
+        "frame": df_full,
+    }, artifact_dir / "metadata.joblib")
+    return artifact_dir
+
+def load_artifact(artifact_dir):
+    """
+    Load a saved artifact and precompute the evaluation windows, so that
+    predict() only has to run the network.
+    """
+    from tensorflow.keras.models import load_model
+
+    artifact_dir = Path(artifact_dir)
+    meta = joblib.load(artifact_dir / "metadata.joblib")
+    meta["model"] = load_model(artifact_dir / "model.h5", compile=False)
+
+    seq_length, split = meta["seq_length"], meta["split"]
+    df_full = meta["frame"]
+    scaled_data = meta["scaler"].transform(df_full[meta["features"]])
+    X, y = sequence_windows(scaled_data, seq_length, target=0)
+    meta["X_test"] = X[split:]
+    meta["y_test"] = y[split:]
+    meta["dates_test"] = df_full['date'].iloc[split + seq_length : split + seq_length + len(meta["y_test"])]
+    return meta
+
+def _inverse_first_column(scaler, values, n_features):
+    padded = np.concatenate([values.reshape(-1, 1), np.zeros((values.shape[0], n_features-1))], axis=1)
+    return scaler.inverse_transform(padded)[:, 0]
+
+def predict(artifact):
+    """Build the /bloom_prediction response from a loaded artifact."""
+    scaler = artifact["scaler"]
+    n_features = len(artifact["features"])
+    # predict_on_batch skips the tf.data pipeline Model.predict builds per call
+    y_pred = np.asarray(artifact["model"].predict_on_batch(artifact["X_test"]))
+    y_pred_rescaled = _inverse_first_column(scaler, y_pred, n_features)
+    y_test_rescaled = _inverse_first_column(scaler, artifact["y_test"], n_features)
+
+    dates_test = artifact["dates_test"]
+    peak_index = np.argmax(y_pred_rescaled)
+    return {
+        'dates': dates_test.dt.strftime('%Y-%m-%d').tolist(),
+        'actual_ndvi': y_test_rescaled.tolist(),
+        'predicted_ndvi': y_pred_rescaled.tolist(),
+        'peak_bloom_day': dates_test.iloc[peak_index].strftime('%Y-%m-%d'),
+        'model_version': artifact["version"]
+    }
+
+if __name__ == "__main__":
+    df_full = build_training_frame(load_ndvi())
+    print("Training frame:", df_full.shape)
+    model, scaler, split = train(df_full)
+    artifact_dir = save_artifact(model, scaler, df_full, split)
+    print("Saved bloom LSTM artifact to", artifact_dir)
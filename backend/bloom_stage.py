@@ -0,0 +1,130 @@
+# bloom_stage.py
+"""
+Batch scoring of the XGBoost bloom-stage model (models/bloom_model.joblib)
+for many locations at once.
+
+POWER data for all points is fetched in parallel, stacked into one
+(points, days, variables) array per chunk and turned into features with the
+batched kernel in utils.py; the feature rows for all points then go through
+a single booster predict.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from utils import fetch_power_point, daily_to_monthly, monthly_feature_kernel, feature_column_names
+
+CLASS_NAMES = ['No Bloom', 'Early Bloom', 'Peak Bloom', 'Late Bloom']
+MAX_POINTS = int(os.environ.get("BLOOM_BATCH_MAX_POINTS", "10000"))
+# Points whose daily data is held in memory at once
+CHUNK_SIZE = int(os.environ.get("BLOOM_BATCH_CHUNK_SIZE", "500"))
+FETCH_WORKERS = int(os.environ.get("NASA_MAX_WORKERS", "8"))
+# Months of history needed before the scored month (12-month amplitude window)
+HISTORY_MONTHS = 12
+
+def parse_points(payload):
+    """
+    Accept {"points": [[lat, lon], ...]} or a GeoJSON FeatureCollection of
+    Points (coordinates are [lon, lat]). Returns a list of (lat, lon).
+    """
+    if payload.get("type") == "FeatureCollection":
+        points = []
+        for feature in payload.get("features", []):
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") != "Point":
+                raise ValueError("Only Point geometries are supported")
+            lon, lat = geometry["coordinates"][:2]
+            points.append((float(lat), float(lon)))
+    else:
+        points = [(float(p[0]), float(p[1])) for p in payload.get("points", [])]
+    if not points:
+        raise ValueError("No points given")
+    if len(points) > MAX_POINTS:
+        raise ValueError(f"At most {MAX_POINTS} points per request")
+    return points
+
+def month_window(month):
+    """'YYYY-MM' -> (start, end) 'YYYYMMDD' strings covering the history needed."""
+    period = pd.Period(month, freq='M')
+    start = (period - HISTORY_MONTHS).start_time
+    return start.strftime('%Y%m%d'), period.end_time.strftime('%Y%m%d')
+
+def _fetch(point, start, end):
+    try:
+        return fetch_power_point(point[0], point[1], start, end), None
+    except Exception as e:
+        return None, e
+
+def _feature_rows(frames, dates, variables, n_lags):
+    # Stack the chunk's daily frames, build features in one pass, keep the last month
+    daily = np.stack([f.reindex(index=dates, columns=variables).to_numpy(dtype=float) for f in frames])
+    monthly, index = daily_to_monthly(daily, dates)
+    return monthly_feature_kernel(monthly, index.month, n_lags=n_lags)[:, -1, :]
+
+def point_features(points, month, variables, n_lags=6, chunk_size=CHUNK_SIZE):
+    """
+    Fetch POWER history for every (lat, lon) and build its feature row for the
+    'YYYY-MM' month, chunk by chunk. Returns (columns, X, ok, errors, timings):
+    X has one row per point fetched successfully, ok holds their positions in
+    points and errors maps the other positions to a message.
+    """
+    timings = {"fetch_ms": 0.0, "features_ms": 0.0}
+    start, end = month_window(month)
+    dates = pd.date_range(pd.to_datetime(start), pd.to_datetime(end), freq='D')
+    rows, ok, errors = [], [], {}
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        for offset in range(0, len(points), chunk_size):
+            chunk = points[offset:offset + chunk_size]
+            t0 = time.perf_counter()
+            fetched = list(pool.map(lambda p: _fetch(p, start, end), chunk))
+            timings["fetch_ms"] += (time.perf_counter() - t0) * 1000
+
+            t0 = time.perf_counter()
+            frames = []
+            for i, (df, error) in enumerate(fetched):
+                if error is not None:
+                    errors[offset + i] = str(error)
+                else:
+                    frames.append(df)
+                    ok.append(offset + i)
+            if frames:
+                rows.append(_feature_rows(frames, dates, variables, n_lags))
+            timings["features_ms"] += (time.perf_counter() - t0) * 1000
+    columns = feature_column_names(variables, n_lags)
+    X = np.vstack(rows) if rows else np.empty((0, len(columns)))
+    return columns, X, ok, errors, timings
+
+def select_columns(X, columns, wanted):
+    """Reorder feature matrix X (named by columns) to the model's feature list."""
+    positions = {name: i for i, name in enumerate(columns)}
+    return X[:, [positions[c] for c in wanted]]
+
+def model_variables(feature_columns):
+    """POWER variables a model was trained on, from its '<var>_t' columns."""
+    return [c[:-2] for c in feature_columns if c.endswith("_t")]
+
+def predict_batch(booster, feature_columns, points, month, chunk_size=CHUNK_SIZE):
+    """
+    Score every (lat, lon) for the given 'YYYY-MM' month. Returns per-point
+    class probabilities for the following month plus per-stage timings.
+    """
+    t_start = time.perf_counter()
+    columns, X, ok, errors, timings = point_features(points, month, model_variables(feature_columns), chunk_size=chunk_size)
+
+    t0 = time.perf_counter()
+    results = [{"lat": points[i][0], "lon": points[i][1], "error": errors[i]} if i in errors else None for i in range(len(points))]
+    if ok:
+        import xgboost as xgb  # imported on first scoring, not with the API
+        X = select_columns(X, columns, feature_columns)
+        probs = booster.predict(xgb.DMatrix(X, feature_names=list(feature_columns)))
+        for i, p in zip(ok, probs):
+            results[i] = {
+                "lat": points[i][0],
+                "lon": points[i][1],
+                "stage": CLASS_NAMES[int(np.argmax(p))],
+                "probabilities": [float(v) for v in p],
+            }
+    timings["predict_ms"] = (time.perf_counter() - t0) * 1000
+    timings["total_ms"] = (time.perf_counter() - t_start) * 1000
+    return {"month": month, "classes": CLASS_NAMES, "results": results, "timings": timings}
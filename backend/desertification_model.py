@@ -3,7 +3,7 @@ import os
 from pathlib import Path
 import numpy as np
 import pandas as pd
-from utils import fetch_power_point, build_features_from_df
+from training_data import load_point_features, select_lags
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
@@ -35,58 +35,57 @@ def create_desertification_label(monthly_df, soil_col="GWETPROF_t", temp_col="T2
 
 # Configuration
 n_samples = 50
-np.random.seed(42)
+N_LAGS = 3
 
-lon_min, lon_max = -10, 40
-lat_min, lat_max = 20, 38
+def build_dataset(features):
+    """Stack labelled monthly rows of every point's feature table (see training_data.py)."""
+    all_X = []
+    all_y = []
+    feature_columns = None
+    for feat in features:
+        if feat is None:
+            continue
+        feat = select_lags(feat, N_LAGS)
+        label = create_desertification_label(feat)
+        df_feat = feat.copy()
+        df_feat["label"] = label
+        df_feat = df_feat.dropna(axis=0, how='any')
+        if df_feat.shape[0] < 6:
+            continue
+        X = df_feat.drop(columns=["label"])
+        y = df_feat["label"].astype(int)
+        if feature_columns is None:
+            feature_columns = list(X.columns)
+        all_X.append(X.values)
+        all_y.append(y.values)
 
-all_X = []
-all_y = []
-feature_columns = None
+    if len(all_X) == 0:
+        raise ValueError("No samples collected.")
+    return np.vstack(all_X), np.concatenate(all_y), feature_columns
 
-for i in range(n_samples):
-    lat = np.random.uniform(lat_min, lat_max)
-    lon = np.random.uniform(lon_min, lon_max)
-    try:
-        df_daily = fetch_power_point(lat, lon, "20170101", "20231231")
-    except KeyboardInterrupt:
-        print("Interrupted by user")
-        break
-    except Exception as e:
-        print("Fetch failed for", lat, lon, ":", str(e))
-        continue
-    feat = build_features_from_df(df_daily, n_lags=3)
-    label = create_desertification_label(feat)
-    df_feat = feat.copy()
-    df_feat["label"] = label
-    df_feat = df_feat.dropna(axis=0, how='any')
-    if df_feat.shape[0] < 6:
-        continue
-    X = df_feat.drop(columns=["label"])
-    y = df_feat["label"].astype(int)
-    if feature_columns is None:
-        feature_columns = list(X.columns)
-    all_X.append(X.values)
-    all_y.append(y.values)
-
-if len(all_X) == 0:
-    raise SystemExit("No samples collected.")
+def train(features, models_dir=MODELS_DIR, threads=None):
+    """Train the desertification RandomForest and save models_dir/desertification_rf.joblib. Returns metrics."""
+    X_all, y_all, feature_columns = build_dataset(features)
+    print("Desertification data shape:", X_all.shape, y_all.shape)
 
-X_all = np.vstack(all_X)
-y_all = np.concatenate(all_y)
+    X_train, X_test, y_train, y_test = train_test_split(X_all, y_all, test_size=0.2, random_state=42, stratify=y_all)
 
-print("Desertification data shape:", X_all.shape, y_all.shape)
+    rf = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=threads)
+    rf.fit(X_train, y_train)
 
-X_train, X_test, y_train, y_test = train_test_split(X_all, y_all, test_size=0.2, random_state=42, stratify=y_all)
+    # Save
+    model_path = Path(models_dir) / "desertification_rf.joblib"
+    joblib.dump({"rf": rf, "feature_columns": feature_columns}, model_path)
+    print("Saved desertification model to", model_path)
 
-rf = RandomForestClassifier(n_estimators=100, random_state=42)
-rf.fit(X_train, y_train)
+    # Eval
+    acc = rf.score(X_test, y_test)
+    print("Test Accuracy:", acc)
+    return {"artifact": str(model_path), "samples": int(len(y_all)), "test_accuracy": float(acc)}
 
-# Save
-model_path = MODELS_DIR / "desertification_rf.joblib"
-joblib.dump({"rf": rf, "feature_columns": feature_columns}, model_path)
-print("Saved desertification model to", model_path)
-
-# Eval
-acc = rf.score(X_test, y_test)
-print("Test Accuracy:", acc)
+if __name__ == "__main__":
+    points, features = load_point_features(n_samples, n_lags=N_LAGS)
+    try:
+        train(features)
+    except ValueError as e:
+        raise SystemExit(str(e))
@@ -0,0 +1,176 @@
+# feature_store.py
+"""
+Persistent store of per-point monthly feature tables for the trainers.
+
+A store is a directory named by a hash of the build spec (date range, lag
+count, feature version, ... - anything that changes the tables). It holds
+meta.json and Parquet parts with one row per (point, month):
+
+    meta.json   store_version, spec, feature columns, points in insertion
+                order, points whose fetch failed, parts
+    part-*.parquet   point (index into meta points), date, feature columns
+
+get_point_features only builds points that are not stored yet, in batches
+of PART_POINTS (a part is written and meta.json updated after each batch,
+so an interrupted build keeps its progress). Points the build could not
+fetch are recorded, returned as None and built again by the next call (a
+fetch may fail transiently); a point that then succeeds is stored under a
+new index and its failed one is left empty. Pass refresh=True to rebuild
+the store. Reads only load the requested columns, all at once
+(get_point_features) or a chunk of points at a time (point_feature_chunks).
+
+Meant for one writer at a time (train_all.py builds the store in its parent
+process before starting jobs).
+
+Configuration (environment):
+    FEATURE_STORE_DIR   store root (default $DATA_DIR/feature_store)
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+STORE_DIR = Path(os.environ.get("FEATURE_STORE_DIR", Path(os.environ.get("DATA_DIR", "./data")) / "feature_store"))
+STORE_VERSION = 1  # layout of meta.json and the parts
+PART_POINTS = 1000
+META_NAME = "meta.json"
+
+def store_key(spec):
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+def store_path(spec, root=None):
+    return Path(root or STORE_DIR) / store_key(spec)
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+def _read_meta(path, spec):
+    """meta.json of the store at path, or None if absent or built for another spec/version."""
+    try:
+        meta = json.loads((path / META_NAME).read_text())
+    except FileNotFoundError:
+        return None
+    if meta.get("store_version") != STORE_VERSION or meta.get("spec") != spec:
+        return None
+    return meta
+
+def _write_meta(path, meta):
+    meta["updated_at"] = _now()
+    tmp = path / f"{META_NAME}.{uuid.uuid4().hex}.tmp"
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, path / META_NAME)
+
+def _write_part(path, meta, first, tables):
+    """Append the tables of points first, first+1, ... as one part; None tables are recorded as failed."""
+    frames = []
+    for i, table in enumerate(tables, start=first):
+        if table is None:
+            meta["failed"].append(i)
+            continue
+        columns = list(table.columns)
+        if meta["columns"] is None:
+            meta["columns"] = columns
+        elif columns != meta["columns"]:
+            raise ValueError(f"Feature columns changed for point {i}; bump the feature version in the spec")
+        frame = table.rename_axis("date").reset_index()
+        frame.insert(0, "point", np.int32(i))
+        frames.append(frame)
+    if frames:
+        name = f"part-{first:06d}.parquet"
+        tmp = path / f"{name}.{uuid.uuid4().hex}.tmp"
+        pd.concat(frames, ignore_index=True).to_parquet(tmp, index=False)
+        os.replace(tmp, path / name)
+        meta["parts"].append(name)
+
+def _read_points(path, meta, indices, columns):
+    """{point index: feature table} for the stored (not failed) points in indices."""
+    wanted = sorted(set(indices) - set(meta["failed"]))
+    if not wanted:
+        return {}
+    # Only the parts holding wanted points (part names carry their first point)
+    firsts = [int(part[len("part-"):-len(".parquet")]) for part in meta["parts"]]
+    needed = np.unique(np.searchsorted(firsts, wanted, side="right") - 1)
+    files = [str(path / meta["parts"][k]) for k in needed]
+    df = pd.read_parquet(files, columns=["point", "date"] + columns, filters=[("point", "in", wanted)])
+    # Parts are written in point order, points in date order
+    point = df["point"].to_numpy()
+    values = df.set_index("date")[columns]
+    lo = np.searchsorted(point, wanted, side="left")
+    hi = np.searchsorted(point, wanted, side="right")
+    return {i: values.iloc[a:b] for i, a, b in zip(wanted, lo, hi)}
+
+def _materialize(points, spec, build, root, refresh):
+    """Build and store the points not in the store yet. Returns (path, meta, store index per point)."""
+    path = store_path(spec, root)
+    meta = None if refresh else _read_meta(path, spec)
+    if meta is None:
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(parents=True, exist_ok=True)
+        meta = {"store_version": STORE_VERSION, "spec": spec, "columns": None, "created_at": _now(),
+                "points": [], "failed": [], "parts": []}
+        _write_meta(path, meta)
+
+    # A point retried after a failure appears again later in meta points; the last index wins
+    index = {tuple(p): i for i, p in enumerate(meta["points"])}
+    failed = set(meta["failed"])
+    missing = list(dict.fromkeys(tuple(p) for p in points if index.get(tuple(p), -1) in failed or tuple(p) not in index))
+    if missing:
+        retried = sum(p in index for p in missing)
+        print(f"Feature store: building {len(missing)} of {len(points)} points ({retried} failed before)")
+    for b in range(0, len(missing), PART_POINTS):
+        batch = missing[b:b + PART_POINTS]
+        # Points failing again keep their failed index instead of taking a new one
+        kept = [(p, table) for p, table in zip(batch, build(batch)) if table is not None or p not in index]
+        if not kept:
+            continue
+        first = len(meta["points"])
+        _write_part(path, meta, first, [table for _, table in kept])
+        for i, (p, _) in enumerate(kept, start=first):
+            index[p] = i
+        meta["points"] += [list(p) for p, _ in kept]
+        _write_meta(path, meta)
+    return path, meta, [index[tuple(p)] for p in points]
+
+def _columns(meta, columns):
+    if columns is None:
+        return list(meta["columns"])
+    return list(columns(meta["columns"]) if callable(columns) else columns)
+
+def get_point_features(points, spec, build, columns=None, root=None, refresh=False):
+    """
+    Feature tables for points ((lat, lon) pairs), in order; None where the
+    build failed. build(points) -> list of tables (or None) is called for the
+    points not in the store yet. spec (JSON-serialisable) identifies how the
+    tables are built. columns: a list of columns, or a function of the stored
+    column list returning one; default all.
+    """
+    path, meta, indices = _materialize(points, spec, build, root, refresh)
+    if meta["columns"] is None:  # nothing could be built
+        return [None] * len(points)
+    tables = _read_points(path, meta, indices, _columns(meta, columns))
+    return [tables.get(i) for i in indices]
+
+def point_feature_chunks(points, spec, build, columns=None, root=None, refresh=False, chunk_points=PART_POINTS):
+    """
+    get_point_features in chunks, for passes over the data that must all see
+    the same rows: builds the store for points now, once, and returns
+    chunks(), which yields the tables of chunk_points points at a time (in
+    point order). Every call of chunks() reads the same stored tables: no
+    build and no fetches, so failed points stay None instead of being retried.
+    """
+    path, meta, indices = _materialize(points, spec, build, root, refresh)
+
+    def chunks():
+        for c in range(0, len(indices), chunk_points):
+            chunk = indices[c:c + chunk_points]
+            if meta["columns"] is None:
+                yield [None] * len(chunk)
+                continue
+            tables = _read_points(path, meta, chunk, _columns(meta, columns))
+            yield [tables.get(i) for i in chunk]
+    return chunks
@@ -1,14 +1,40 @@
-import requests
 import pandas as pd
 import os
 import json
+import hashlib
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+import http_client
 
 # Load Earthdata token from environment variable
 EARTHDATA_TOKEN = os.getenv('EARTHDATA_TOKEN')
 if not EARTHDATA_TOKEN:
     raise ValueError("EARTHDATA_TOKEN environment variable is not set. Please set it securely.")
 
+MODIS_SUBSET_URL = "https://lpdaacsvc.cr.usgs.gov/services/modisSubset"
+# Parallel requests used by the bulk fetchers
+MAX_WORKERS = int(os.environ.get("NASA_MAX_WORKERS", "8"))
+# GES DISC subsets can take minutes to generate; a read timeout is not retried
+# (another 600s attempt would hold the job thread for up to retries x 10 min)
+NETCDF_TIMEOUT = (5, 600)
+
+def _save_netcdf(prefix, content, bbox, start_date, end_date):
+    # One file per request (the API runs different subsets concurrently),
+    # written to a unique temp name and renamed into place
+    digest = hashlib.sha1(f"{bbox}|{start_date}|{end_date}".encode()).hexdigest()[:12]
+    filename = f"{prefix}_{digest}.nc"
+    tmp = f"{filename}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(content)
+        os.replace(tmp, filename)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return filename
+
 # Function to fetch climate data from NASA POWER API
 def fetch_climate_data(lat, lon, start, end):
     base_url = "https://power.larc.nasa.gov/api/temporal/daily/point"
@@ -21,7 +47,7 @@ def fetch_climate_data(lat, lon, start, end):
         "community": "AG",
         "format": "JSON"
     }
-    response = requests.get(base_url, params=params)
+    response = http_client.get(base_url, params=params)
     if response.status_code == 200:
         data = response.json()
         df = pd.DataFrame(data['properties']['parameter'])
@@ -46,7 +72,7 @@ def fetch_ndvi_harmony(collection='C1748066515-LPCLOUD', variable='NDVI', minlat
         'format': format
     }
     headers = {'Authorization': f'Bearer {EARTHDATA_TOKEN}'}
-    response = requests.get(harmony_url, params=params, headers=headers)
+    response = http_client.get(harmony_url, params=params, headers=headers)
     if response.status_code == 200:
         if format == 'json':
             return response.json()
@@ -69,7 +95,7 @@ def fetch_bloom_events_cmr(short_name='MOD13Q1', start_date='2024-01-01T00:00:00
         'page_size': 100  # Adjust as needed
     }
     headers = {'Authorization': f'Bearer {EARTHDATA_TOKEN}'}
-    response = requests.get(cmr_url, params=params, headers=headers)
+    response = http_client.get(cmr_url, params=params, headers=headers)
     if response.status_code == 200:
         data = response.json()
         # Process to extract bloom events (e.g., based on NDVI thresholds)
@@ -101,7 +127,6 @@ def fetch_modis_ndvi(lat, lon, start_date, end_date):
     start_date, end_date: 'YYYY-MM-DD'
     Returns DataFrame with date, NDVI, EVI
     """
-    url = "https://lpdaacsvc.cr.usgs.gov/services/modisSubset"
     params = {
         "product": "MOD13Q1",
         "version": "6",
@@ -115,7 +140,7 @@ def fetch_modis_ndvi(lat, lon, start_date, end_date):
         "output": "json"
     }
     headers = {"Authorization": f"Bearer {EARTHDATA_TOKEN}"}
-    response = requests.get(url, headers=headers, params=params)
+    response = http_client.get(MODIS_SUBSET_URL, params=params, headers=headers)
     if response.status_code == 200:
         data = response.json()
         records = []
@@ -136,7 +161,7 @@ def fetch_smap_soil_moisture(bbox, start_date, end_date):
     """
     Fetch SMAP L3 soil moisture for a bounding box.
     bbox: "min_lat,min_lon,max_lat,max_lon"
-    Returns file path to NetCDF
+    Returns file path to NetCDF (smap_soil_moisture_<hash of bbox and dates>.nc)
     """
     url = "https://disc.gsfc.nasa.gov/daac-bin/OTF/HTTP_services.cgi"
     params = {
@@ -146,11 +171,9 @@ def fetch_smap_soil_moisture(bbox, start_date, end_date):
         "FORMAT": "netCDF"
     }
     headers = {"Authorization": f"Bearer {EARTHDATA_TOKEN}"}
-    response = requests.get(url, headers=headers, params=params)
+    response = http_client.get(url, params=params, headers=headers, timeout=NETCDF_TIMEOUT, retry_read_timeouts=False)
     if response.status_code == 200:
-        filename = "smap_soil_moisture.nc"
-        with open(filename, "wb") as f:
-            f.write(response.content)
+        filename = _save_netcdf("smap_soil_moisture", response.content, bbox, start_date, end_date)
         print(f"Saved SMAP data to {filename}")
         return filename
     else:
@@ -160,6 +183,7 @@ def fetch_smap_soil_moisture(bbox, start_date, end_date):
 def fetch_gldas_climate(bbox, start_date, end_date):
     """
     Fetch GLDAS NOAH025 3H climate data.
+    Returns file path to NetCDF (gldas_climate_<hash of bbox and dates>.nc)
     """
     url = "https://disc.gsfc.nasa.gov/daac-bin/OTF/HTTP_services.cgi"
     params = {
@@ -169,35 +193,65 @@ def fetch_gldas_climate(bbox, start_date, end_date):
         "FORMAT": "netCDF"
     }
     headers = {"Authorization": f"Bearer {EARTHDATA_TOKEN}"}
-    response = requests.get(url, headers=headers, params=params)
+    response = http_client.get(url, params=params, headers=headers, timeout=NETCDF_TIMEOUT, retry_read_timeouts=False)
     if response.status_code == 200:
-        filename = "gldas_climate.nc"
-        with open(filename, "wb") as f:
-            f.write(response.content)
+        filename = _save_netcdf("gldas_climate", response.content, bbox, start_date, end_date)
         print(f"Saved GLDAS data to {filename}")
         return filename
     else:
         raise Exception(f"Failed to fetch GLDAS: {response.status_code} - {response.text}")
 
+# Function to fetch NDVI for multiple points in parallel
+def iter_bulk_ndvi(points, start, end, max_workers=MAX_WORKERS):
+    """
+    Fetch NDVI for (lat, lon) points with up to max_workers requests in flight.
+    Yields (lat, lon, df, error) as each point completes, so a slow or failing
+    point never holds back the others.
+    """
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {pool.submit(fetch_modis_ndvi, lat, lon, start, end): (lat, lon) for lat, lon in points}
+        for future in as_completed(futures):
+            lat, lon = futures[future]
+            try:
+                df = future.result()
+            except Exception as e:
+                yield lat, lon, None, e
+                continue
+            df['lat'] = lat
+            df['lon'] = lon
+            yield lat, lon, df, None
+    finally:
+        # Consumer may stop early (e.g. client disconnected from a stream)
+        pool.shutdown(wait=False, cancel_futures=True)
+
 # Function to fetch and save NDVI data for multiple points
-def fetch_bulk_ndvi(points, start, end, output_file="bulk_ndvi_data.csv"):
+def fetch_bulk_ndvi(points, start, end, output_file="bulk_ndvi_data.csv", max_workers=MAX_WORKERS):
     """
     Fetch NDVI data for multiple lat/lon points and save to CSV.
     points: list of (lat, lon) tuples
+    Points are fetched in parallel; rows come back in the order of points and
+    output_file is replaced in one step once all are done, so concurrent
+    calls never interleave rows in it.
     """
-    all_data = []
-    for lat, lon in points:
-        try:
-            df = fetch_modis_ndvi(lat, lon, start, end)
-            df['lat'] = lat
-            df['lon'] = lon
-            all_data.append(df)
-            print(f"Fetched NDVI for {lat}, {lon}")
-        except Exception as e:
-            print(f"Error fetching for {lat}, {lon}: {e}")
+    results = {}
+    for lat, lon, df, error in iter_bulk_ndvi(points, start, end, max_workers=max_workers):
+        if error is not None:
+            print(f"Error fetching for {lat}, {lon}: {error}")
+            continue
+        results[(lat, lon)] = df
+        print(f"Fetched NDVI for {lat}, {lon}")
+    all_data = [results[tuple(p)] for p in points if tuple(p) in results]
     if all_data:
         combined_df = pd.concat(all_data, ignore_index=True)
-        combined_df.to_csv(output_file, index=False)
+        tmp = f"{output_file}.{uuid.uuid4().hex}.tmp"
+        try:
+            combined_df.to_csv(tmp, index=False)
+            os.replace(tmp, output_file)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
         print(f"Bulk NDVI data saved to {output_file}")
         return combined_df
     return pd.DataFrame()
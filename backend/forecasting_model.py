@@ -3,10 +3,9 @@ import os
 from pathlib import Path
 import numpy as np
 import pandas as pd
-from utils import fetch_power_point, build_features_from_df
+from training_data import load_point_features, select_lags
+from utils import sequence_windows
 from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense
 import joblib
 import warnings
 warnings.filterwarnings("ignore")
@@ -16,64 +15,67 @@ MODELS_DIR = Path(os.environ.get("MODELS_DIR", "./models"))
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
-def create_sequences(data, seq_length=12):
-    X, y = [], []
-    for i in range(len(data) - seq_length):
-        X.append(data[i:i+seq_length])
-        y.append(data[i+seq_length])
-    return np.array(X), np.array(y)
-
 # Configuration
 n_samples = 20  # fewer for LSTM
 seq_length = 12  # 12 months history
-np.random.seed(42)
+N_LAGS = 3
 
-lon_min, lon_max = -10, 40
-lat_min, lat_max = 20, 38
+def build_dataset(features):
+    """12-month T2M_t sequences of every point's feature table (see training_data.py), scaled per point."""
+    all_sequences = []
+    for feat in features:
+        if feat is None:
+            continue
+        df_feat = select_lags(feat, N_LAGS).dropna(axis=0, how='any')
+        if df_feat.shape[0] < seq_length + 1:
+            continue
+        # Forecast T2M_t
+        data = df_feat["T2M_t"].values.reshape(-1, 1)
+        scaler = MinMaxScaler()
+        data_scaled = scaler.fit_transform(data)
+        X, y = sequence_windows(data_scaled, seq_length)
+        all_sequences.append((X, y, scaler))
 
-all_sequences = []
+    if len(all_sequences) == 0:
+        raise ValueError("No sequences collected.")
 
-for i in range(n_samples):
-    lat = np.random.uniform(lat_min, lat_max)
-    lon = np.random.uniform(lon_min, lon_max)
-    try:
-        df_daily = fetch_power_point(lat, lon, "20170101", "20231231")
-    except KeyboardInterrupt:
-        print("Interrupted by user")
-        break
-    except Exception as e:
-        print("Fetch failed for", lat, lon, ":", str(e))
-        continue
-    feat = build_features_from_df(df_daily, n_lags=3)
-    df_feat = feat.dropna(axis=0, how='any')
-    if df_feat.shape[0] < seq_length + 1:
-        continue
-    # Forecast T2M_t
-    data = df_feat["T2M_t"].values.reshape(-1, 1)
-    scaler = MinMaxScaler()
-    data_scaled = scaler.fit_transform(data)
-    X, y = create_sequences(data_scaled, seq_length)
-    all_sequences.append((X, y, scaler))
+    # Concatenate (the one copy of the windows)
+    X_all = np.concatenate([seq[0] for seq in all_sequences])
+    y_all = np.concatenate([seq[1] for seq in all_sequences])
+    scaler = all_sequences[0][2]  # use first scaler
+    return X_all, y_all, scaler
 
-if len(all_sequences) == 0:
-    raise SystemExit("No sequences collected.")
+def train(features, models_dir=MODELS_DIR, threads=None):
+    """Train the T2M LSTM forecaster and save models_dir/forecasting_lstm.joblib. Returns metrics."""
+    import tensorflow as tf
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import LSTM, Dense
 
-# Concatenate
-X_all = np.vstack([seq[0] for seq in all_sequences])
-y_all = np.vstack([seq[1] for seq in all_sequences])
-scaler = all_sequences[0][2]  # use first scaler
+    if threads:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(threads)
 
-print("Forecasting data shape:", X_all.shape, y_all.shape)
+    X_all, y_all, scaler = build_dataset(features)
+    print("Forecasting data shape:", X_all.shape, y_all.shape)
 
-# LSTM model
-model = Sequential()
-model.add(LSTM(50, activation='relu', input_shape=(seq_length, 1)))
-model.add(Dense(1))
-model.compile(optimizer='adam', loss='mse')
+    # LSTM model
+    model = Sequential()
+    model.add(LSTM(50, activation='relu', input_shape=(seq_length, 1)))
+    model.add(Dense(1))
+    model.compile(optimizer='adam', loss='mse')
 
-model.fit(X_all, y_all, epochs=20, batch_size=32, verbose=1)
+    history = model.fit(X_all, y_all, epochs=20, batch_size=32, verbose=1)
 
-# Save
-model_path = MODELS_DIR / "forecasting_lstm.joblib"
-joblib.dump({"lstm": model, "scaler": scaler, "seq_length": seq_length}, model_path)
-print("Saved forecasting model to", model_path)
+    # Save
+    model_path = Path(models_dir) / "forecasting_lstm.joblib"
+    joblib.dump({"lstm": model, "scaler": scaler, "seq_length": seq_length}, model_path)
+    print("Saved forecasting model to", model_path)
+    return {"artifact": str(model_path), "samples": int(len(X_all)),
+            "final_loss": float(history.history["loss"][-1])}
+
+if __name__ == "__main__":
+    points, features = load_point_features(n_samples, n_lags=N_LAGS)
+    try:
+        train(features)
+    except ValueError as e:
+        raise SystemExit(str(e))
@@ -0,0 +1,104 @@
+# http_client.py
+"""
+Long-lived HTTP client shared by every NASA call in the backend.
+
+One requests.Session keeps keep-alive connection pools per upstream host, so
+repeated calls skip the TCP/TLS handshake. Every request gets the same
+timeouts, gzip, host rate limiting (rate_limit.py) and retry policy, and its
+latency is recorded per host (see stats()).
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from rate_limit import bucket_for
+
+# (connect, read) seconds; NetCDF downloads pass a longer read timeout
+DEFAULT_TIMEOUT = (5, 60)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRIES = 3
+BACKOFF = 0.5
+
+# Keep-alive connections kept per host (size to the parallelism used against it)
+POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", os.environ.get("NASA_MAX_WORKERS", "8")))
+HOST_POOL_SIZES = {
+    "https://power.larc.nasa.gov": POOL_SIZE,
+    "https://lpdaacsvc.cr.usgs.gov": POOL_SIZE,
+    "https://harmony.earthdata.nasa.gov": 4,
+    "https://cmr.earthdata.nasa.gov": 4,
+    "https://disc.gsfc.nasa.gov": 2,
+}
+LATENCY_WINDOW = 1000  # recent samples kept per host for percentiles
+
+session = requests.Session()
+session.headers.update({"Accept-Encoding": "gzip, deflate"})
+session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=POOL_SIZE))
+session.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=POOL_SIZE))
+for prefix, size in HOST_POOL_SIZES.items():
+    session.mount(prefix, HTTPAdapter(pool_maxsize=size))
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+def _record(host, seconds, error):
+    with _metrics_lock:
+        m = _metrics.setdefault(host, {"requests": 0, "errors": 0, "retries": 0, "latencies": deque(maxlen=LATENCY_WINDOW)})
+        m["requests"] += 1
+        if error:
+            m["errors"] += 1
+        else:
+            m["latencies"].append(seconds)
+
+def _record_retry(host):
+    with _metrics_lock:
+        _metrics[host]["retries"] += 1
+
+def get(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, retries=RETRIES, backoff=BACKOFF,
+        retry_read_timeouts=True):
+    """
+    GET through the shared session, waiting on the host's rate limit before
+    each attempt and retrying connection errors and 429/5xx responses with
+    full-jitter exponential backoff. Returns the last response.
+    retry_read_timeouts=False raises a read timeout at once, for requests
+    whose read timeout is long (minutes per attempt) rather than transient.
+    """
+    host = urlparse(url).hostname
+    bucket = bucket_for(host)
+    for attempt in range(retries + 1):
+        if bucket is not None:
+            bucket.acquire()
+        t0 = time.perf_counter()
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _record(host, time.perf_counter() - t0, error=True)
+            if attempt == retries or (isinstance(e, requests.ReadTimeout) and not retry_read_timeouts):
+                raise
+        else:
+            _record(host, time.perf_counter() - t0, error=response.status_code >= 400)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+        _record_retry(host)
+        # Full jitter so parallel workers don't retry in lockstep
+        time.sleep(random.uniform(0, backoff * 2 ** attempt))
+
+def stats():
+    """Per-host request/error/retry counts and latency percentiles (ms)."""
+    with _metrics_lock:
+        out = {}
+        for host, m in _metrics.items():
+            lat = np.array(m["latencies"]) * 1000
+            out[host] = {
+                "requests": m["requests"],
+                "errors": m["errors"],
+                "retries": m["retries"],
+                "p50_ms": float(np.percentile(lat, 50)) if len(lat) else None,
+                "p95_ms": float(np.percentile(lat, 95)) if len(lat) else None,
+                "max_ms": float(lat.max()) if len(lat) else None,
+            }
+        return out
@@ -0,0 +1,233 @@
+# jobs.py
+"""
+Background jobs for the API's long-running endpoints.
+
+submit() returns a job at once and runs the work in a bounded pool: threads
+for I/O-bound work (NASA downloads, inference on models held by this
+process), worker processes for CPU-bound work (the function must be a
+picklable module-level function). Jobs are deduplicated by (kind,
+parameters): while a job is queued, running, or its result is younger than
+RESULT_TTL seconds, submitting the same parameters returns that job, so
+identical concurrent requests share one computation. Failed jobs are not
+reused.
+
+Clients poll get(job_id) or follow events(job_id), which yields a snapshot
+on every status change. Jobs and results live in this process's memory;
+with several server processes each has its own queue. Worker processes are
+spawned, so they import the main module again (cheap under a WSGI server;
+with `python app.py` each worker loads app.py once).
+
+Configuration (environment):
+    JOB_THREAD_WORKERS   thread pool size (default 4)
+    JOB_PROCESS_WORKERS  process pool size (default 2)
+    JOB_RESULT_TTL       seconds a finished job is kept and reused (default 600)
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+THREAD_WORKERS = int(os.environ.get("JOB_THREAD_WORKERS", "4"))
+PROCESS_WORKERS = int(os.environ.get("JOB_PROCESS_WORKERS", "2"))
+RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", "600"))
+TERMINAL = ("done", "failed")
+
+def job_key(kind, params):
+    return hashlib.sha1(json.dumps([kind, params], sort_keys=True, default=str).encode()).hexdigest()
+
+class JobQueue:
+    def __init__(self, thread_workers=THREAD_WORKERS, process_workers=PROCESS_WORKERS, result_ttl=RESULT_TTL):
+        self._thread_workers = thread_workers
+        self._process_workers = process_workers
+        self._result_ttl = result_ttl
+        self._threads = None
+        self._processes = None
+        self._jobs = {}         # job id -> job record
+        self._by_key = {}       # dedupe key -> job id of the job serving it
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._counters = {"submitted": 0, "deduplicated": 0, "done": 0, "failed": 0}
+
+    def _pool(self, cpu):
+        # Created on first use, so importing the API starts no workers
+        if cpu:
+            if self._processes is None:
+                # spawn: forking a threaded server process is unsafe
+                self._processes = ProcessPoolExecutor(self._process_workers,
+                                                      mp_context=multiprocessing.get_context("spawn"))
+            return self._processes
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(self._thread_workers, thread_name_prefix="job")
+        return self._threads
+
+    def _expire(self, now):
+        # Drop finished jobs older than the TTL (caller holds the lock)
+        for job_id, job in list(self._jobs.items()):
+            if job["status"] in TERMINAL and now - job["finished_at"] > self._result_ttl:
+                del self._jobs[job_id]
+                if self._by_key.get(job["key"]) == job_id:
+                    del self._by_key[job["key"]]
+
+    def submit(self, kind, fn, params, cpu=False):
+        """
+        Job running fn(**params), or the existing job for the same kind and
+        params. cpu=True runs it in a worker process. Returns a snapshot
+        (see get) with "deduplicated" set when an existing job was returned.
+        """
+        key = job_key(kind, params)
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            job_id = self._by_key.get(key)
+            if job_id is not None:
+                self._counters["deduplicated"] += 1
+                return dict(self._snapshot(self._jobs[job_id]), deduplicated=True)
+            job = {"id": uuid.uuid4().hex, "kind": kind, "key": key, "params": params, "status": "queued",
+                   "submitted_at": now, "started_at": None, "finished_at": None, "result": None, "error": None,
+                   "future": None}
+            self._jobs[job["id"]] = job
+            self._by_key[key] = job["id"]
+            self._counters["submitted"] += 1
+        try:
+            future = self._start(job, fn, params, cpu)
+        except Exception as e:
+            with self._lock:
+                self._fail(job, e)
+                return dict(self._snapshot(job), deduplicated=False)
+        with self._lock:
+            job["future"] = future
+            snapshot = self._snapshot(job)
+        future.add_done_callback(lambda f: self._finish(job, f))
+        return dict(snapshot, deduplicated=False)
+
+    def _start(self, job, fn, params, cpu):
+        if not cpu:
+            return self._pool(False).submit(self._run_thread, job, fn, params)
+        # Process jobs are marked running once the pool hands them to its workers (_refresh)
+        try:
+            return self._pool(True).submit(fn, **params)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a new pool once
+            self._processes = None
+            return self._pool(True).submit(fn, **params)
+
+    def _run_thread(self, job, fn, params):
+        self._set(job, "running")
+        return fn(**params)
+
+    def _set(self, job, status):
+        with self._lock:
+            if job["status"] not in TERMINAL:
+                job["status"] = status
+                job["started_at"] = job["started_at"] or time.time()
+                self._changed.notify_all()
+
+    def _finish(self, job, future):
+        with self._lock:
+            try:
+                job["result"] = future.result()
+            except Exception as e:
+                self._fail(job, e)
+                return
+            job["status"] = "done"
+            self._finished(job)
+
+    def _fail(self, job, error):
+        # Caller holds the lock
+        job["error"] = str(error)
+        job["status"] = "failed"
+        # Let the next identical request retry
+        if self._by_key.get(job["key"]) == job["id"]:
+            del self._by_key[job["key"]]
+        self._finished(job)
+
+    def _finished(self, job):
+        job["finished_at"] = time.time()
+        job["started_at"] = job["started_at"] or job["finished_at"]
+        self._counters[job["status"]] += 1
+        self._changed.notify_all()
+
+    @staticmethod
+    def _refresh(job):
+        # Process jobs report no start; the pool's future does (caller holds the lock)
+        future = job["future"]
+        if job["status"] == "queued" and future is not None and future.running():
+            job["status"] = "running"
+            job["started_at"] = time.time()
+
+    def _snapshot(self, job):
+        self._refresh(job)
+        out = {k: job[k] for k in ("id", "kind", "status", "submitted_at", "started_at", "finished_at")}
+        if job["status"] == "done":
+            out["result"] = job["result"]
+        elif job["status"] == "failed":
+            out["error"] = job["error"]
+        return out
+
+    def get(self, job_id):
+        """Snapshot of a job (id, kind, status, timestamps, result or error), or None if unknown or expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else self._snapshot(job)
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job is done or failed (or timeout seconds pass); returns its snapshot."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job["status"] in TERMINAL:
+                    return None if job is None else self._snapshot(job)
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return self._snapshot(job)
+                self._changed.wait(remaining)
+
+    def events(self, job_id, heartbeat=15):
+        """
+        Yield the job's snapshot now, on every status change and at least
+        every heartbeat seconds, until it is done or failed (or expired).
+        """
+        last, sent = None, 0.0
+        while True:
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return
+                snapshot = self._snapshot(job)
+                if snapshot["status"] == last and time.monotonic() - sent < heartbeat:
+                    # Process jobs start without a notification, so look again within a second
+                    self._changed.wait(min(1.0, heartbeat - (time.monotonic() - sent)))
+                    continue
+            yield snapshot
+            last, sent = snapshot["status"], time.monotonic()
+            if last in TERMINAL:
+                return
+
+    def stats(self):
+        """Submitted/deduplicated/done/failed counters and jobs per status."""
+        with self._lock:
+            by_status = {}
+            for job in self._jobs.values():
+                by_status[job["status"]] = by_status.get(job["status"], 0) + 1
+            return dict(self._counters, jobs=by_status)
+
+    def clear(self):
+        """Forget finished jobs and reset the counters (running jobs are kept)."""
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if job["status"] in TERMINAL:
+                    del self._jobs[job_id]
+                    if self._by_key.get(job["key"]) == job_id:
+                        del self._by_key[job["key"]]
+            self._counters = dict.fromkeys(self._counters, 0)
+
+    def shutdown(self, wait=True):
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                pool.shutdown(wait=wait)
@@ -0,0 +1,110 @@
+# model_cache.py
+"""
+Process-wide cache for model files loaded by the API.
+
+Each file is loaded once and shared by all request threads. Entries are keyed
+by path and validated against the (mtime, size) of the file and of any
+companion files loaded with it on every lookup, so a new artifact copied into
+models/ is picked up without restarting the server.
+Write new artifacts to a temp name and os.replace() them into place; if a
+reload fails anyway, the previous model keeps being served and that file
+version is not loaded again until the file changes. While the file is
+missing (deleted, or mid-replace), the cached model is served too.
+"""
+import threading
+import time
+from pathlib import Path
+import joblib
+
+def load_keras(path):
+    from tensorflow.keras.models import load_model
+    return load_model(path)
+
+class ModelCache:
+    def __init__(self):
+        self._entries = {}      # path -> (file_key, model)
+        self._locks = {}        # path -> lock serialising loads of that path
+        self._failed = {}       # path -> file_key whose reload failed (previous model served)
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    @staticmethod
+    def _file_key(files):
+        keys = []
+        for f in files:
+            st = f.stat()
+            keys.append((st.st_mtime_ns, st.st_size))
+        return tuple(keys)
+
+    def _path_lock(self, path):
+        with self._lock:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def _count(self, path, name, value=1):
+        with self._lock:
+            c = self._counters.setdefault(str(path), {"hits": 0, "misses": 0, "reloads": 0, "load_errors": 0, "load_seconds": 0.0})
+            c[name] += value
+
+    def get(self, path, loader=joblib.load, companions=()):
+        """
+        Return the model stored at path, loading it with loader(path) on first
+        use or when the file changed since the cached copy was loaded.
+        companions: other files loader reads along with path (e.g. a model's
+        scaler); the entry is reloaded as one unit when any of them changes.
+        """
+        path = Path(path).resolve()
+        files = [path] + [Path(p).resolve() for p in companions]
+        entry = self._entries.get(path)
+        try:
+            key = self._file_key(files)
+        except OSError:
+            if entry is None:
+                raise
+            self._count(path, "hits")
+            return entry[1]
+        if entry is not None and (entry[0] == key or self._failed.get(path) == key):
+            self._count(path, "hits")
+            return entry[1]
+
+        lock = self._path_lock(path)
+        if entry is not None and not lock.acquire(blocking=False):
+            # Another thread is reloading; keep serving the previous version
+            self._count(path, "hits")
+            return entry[1]
+        if entry is None:
+            lock.acquire()
+        try:
+            entry = self._entries.get(path)
+            if entry is not None and (entry[0] == key or self._failed.get(path) == key):
+                self._count(path, "hits")
+                return entry[1]
+            self._count(path, "misses")
+            t0 = time.perf_counter()
+            try:
+                model = loader(path)
+            except Exception:
+                self._count(path, "load_errors")
+                if entry is not None:
+                    # Don't retry this version on every request; a new file is tried again
+                    self._failed[path] = key
+                    return entry[1]
+                raise
+            self._count(path, "load_seconds", time.perf_counter() - t0)
+            if entry is not None:
+                self._count(path, "reloads")
+            self._entries[path] = (key, model)
+            self._failed.pop(path, None)
+            return model
+        finally:
+            lock.release()
+
+    def stats(self):
+        """Per-file hit/miss/reload counters and cumulative load time."""
+        with self._lock:
+            return {path: dict(c) for path, c in self._counters.items()}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._failed.clear()
+            self._counters.clear()
@@ -0,0 +1,46 @@
+# model_registry.py
+"""
+Process-wide registry of versioned model artifacts.
+
+Artifacts live in models/<name>/<version>/ (versions sort chronologically).
+register() loads the newest version once, typically at API startup; set
+<NAME>_VERSION (e.g. BLOOM_LSTM_VERSION) to pin a specific version.
+"""
+import os
+from pathlib import Path
+
+MODELS_DIR = Path(os.environ.get("MODELS_DIR", "./models"))
+
+_models = {}
+
+def artifact_versions(name, models_dir=MODELS_DIR):
+    """Return the available versions of an artifact, oldest first."""
+    root = Path(models_dir) / name
+    if not root.is_dir():
+        return []
+    return sorted(p.name for p in root.iterdir() if p.is_dir())
+
+def resolve_artifact(name, models_dir=MODELS_DIR):
+    """Return the directory of the pinned or newest version, or None."""
+    versions = artifact_versions(name, models_dir)
+    pinned = os.environ.get(f"{name.upper()}_VERSION")
+    if pinned:
+        return Path(models_dir) / name / pinned if pinned in versions else None
+    return Path(models_dir) / name / versions[-1] if versions else None
+
+def register(name, loader, models_dir=MODELS_DIR):
+    """
+    Load the resolved artifact with loader(path) and keep it in the registry.
+    Returns the loaded object, or None if no artifact exists yet.
+    """
+    path = resolve_artifact(name, models_dir)
+    if path is None:
+        print(f"No artifact found for {name} in {models_dir}")
+        return None
+    _models[name] = loader(path)
+    print(f"Loaded {name} from {path}")
+    return _models[name]
+
+def get(name):
+    """Return a registered model, or None if it was never loaded."""
+    return _models.get(name)
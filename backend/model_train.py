@@ -1,10 +1,15 @@
 # model_train.py
+import argparse
 import os
+import shutil
+import tempfile
 from pathlib import Path
 import numpy as np
 import pandas as pd
-from utils import fetch_power_point, build_features_from_df, create_synthetic_label_from_monthly
+from utils import create_synthetic_label_from_monthly
+from training_data import SAMPLING, load_point_features, point_feature_chunks
 from sklearn.model_selection import train_test_split
+from sklearn.metrics import classification_report, accuracy_score
 import xgboost as xgb
 import joblib
 import warnings
@@ -16,64 +21,13 @@ DATA_DIR.mkdir(parents=True, exist_ok=True)
 MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
 # Configuration
-years = list(range(2018, 2024))  # sample years
-n_samples = 120  # number of random spatial samples (for demo - increase for real models)
-np.random.seed(42)
-
-# We'll sample random points within a bounding box (global or a region)
-# Example: North Africa bbox (lon_min, lon_max, lat_min, lat_max)
-lon_min, lon_max = -10, 40
-lat_min, lat_max = 20, 38
-
-all_X = []
-all_y = []
-feature_columns = None
-
-for i in range(n_samples):
-    lat = np.random.uniform(lat_min, lat_max)
-    lon = np.random.uniform(lon_min, lon_max)
-    # fetch multi-year daily data for this point
-    # request from 2017-01-01 to 2023-12-31 to get multiple years of months
-    try:
-        df_daily = fetch_power_point(lat, lon, "20170101", "20231231")
-    except KeyboardInterrupt:
-        print("Interrupted by user")
-        break
-    except Exception as e:
-        print("Fetch failed for", lat, lon, ":", str(e))
-        continue
-    feat = build_features_from_df(df_daily, n_lags=6)
-    # Create synthetic label (binary)
-    label = create_synthetic_label_from_monthly(feat, temp_col="T2M_t", precip_col="PRECTOT_t")
-    # Align and drop NaNs
-    df_feat = feat.copy()
-    df_feat["label"] = label
-    df_feat = df_feat.dropna(axis=0, how='any')
-    if df_feat.shape[0] < 12:
-        continue
-    X = df_feat.drop(columns=["label"])
-    y = df_feat["label"].astype(int)
-    if feature_columns is None:
-        feature_columns = list(X.columns)
-    all_X.append(X.values)
-    all_y.append(y.values)
-
-# Concatenate samples (time-series samples) vertically
-if len(all_X) == 0:
-    raise SystemExit("No samples collected - adjust sampling or API calls.")
-
-X_all = np.vstack(all_X)
-y_all = np.concatenate(all_y)
-
-print("Total samples:", X_all.shape, y_all.shape)
-
-# Train/test split
-X_train, X_test, y_train, y_test = train_test_split(X_all, y_all, test_size=0.2, random_state=42, stratify=y_all)
-
-dtrain = xgb.DMatrix(X_train, label=y_train)
-dtest  = xgb.DMatrix(X_test, label=y_test)
-
-params = {
+n_samples = 120  # default number of spatial samples (--points; use --sampling stratified --regional for thousands)
+N_LAGS = 6
+NUM_BOOST_ROUND = 500
+TEST_SIZE = 0.2
+CHUNK_POINTS = 100  # points per XGBoost page with --external; peak memory grows with it
+
+PARAMS = {
     "objective": "multi:softprob",
     "num_class": 4,  # 0=no bloom, 1=early, 2=peak, 3=late
     "eval_metric": "mlogloss",
@@ -83,22 +37,180 @@ params = {
     "colsample_bytree": 0.6,
     "seed": 42
 }
-evallist = [(dtrain, "train"), (dtest, "eval")]
-num_boost_round = 500
-bst = xgb.train(params, dtrain, num_boost_round=num_boost_round, evals=evallist, early_stopping_rounds=25, verbose_eval=25)
-
-# Save model and metadata
-model_path = MODELS_DIR / "bloom_model.joblib"
-joblib.dump({"model":bst, "feature_columns": feature_columns}, model_path)
-print("Saved model to", model_path)
-
-# quick evaluation
-preds = bst.predict(dtest)  # shape (n_samples, 4) probabilities
-pred_labels = np.argmax(preds, axis=1)  # predicted class
-from sklearn.metrics import classification_report, accuracy_score
-acc = accuracy_score(y_test, pred_labels)
-print("Test Accuracy:", acc)
-unique_labels = np.unique(y_test)
-num_classes = len(unique_labels)
-target_names = ['No Bloom', 'Early Bloom', 'Peak Bloom', 'Late Bloom'][:num_classes]
-print(classification_report(y_test, pred_labels, labels=unique_labels, target_names=target_names))
+TARGET_NAMES = ['No Bloom', 'Early Bloom', 'Peak Bloom', 'Late Bloom']
+
+def build_dataset(features):
+    """
+    Labelled monthly rows of every point's feature table (see training_data.py),
+    stacked point by point into one preallocated array.
+    """
+    # First pass: labels and complete rows per point, to size the arrays
+    kept = []
+    feature_columns = None
+    for feat in features:
+        if feat is None:
+            continue
+        # Create synthetic label (binary)
+        label = create_synthetic_label_from_monthly(feat, temp_col="T2M_t", precip_col="PRECTOT_t").to_numpy()
+        values = feat.to_numpy(dtype=float)
+        # Drop rows with NaNs
+        complete = ~np.isnan(values).any(axis=1)
+        if complete.sum() < 12:
+            continue
+        if feature_columns is None:
+            feature_columns = list(feat.columns)
+        kept.append((values, label, complete))
+
+    if len(kept) == 0:
+        raise ValueError("No samples collected - adjust sampling or API calls.")
+    n_rows = sum(int(complete.sum()) for _, _, complete in kept)
+    X_all = np.empty((n_rows, len(feature_columns)))
+    y_all = np.empty(n_rows, dtype=int)
+    row = 0
+    for values, label, complete in kept:
+        k = int(complete.sum())
+        X_all[row:row + k] = values[complete]
+        y_all[row:row + k] = label[complete]
+        row += k
+    return X_all, y_all, feature_columns
+
+def train(features, models_dir=MODELS_DIR, threads=None):
+    """Train the XGBoost bloom-stage model and save models_dir/bloom_model.joblib. Returns metrics."""
+    X_all, y_all, feature_columns = build_dataset(features)
+    print("Total samples:", X_all.shape, y_all.shape)
+
+    # Train/test split
+    X_train, X_test, y_train, y_test = train_test_split(X_all, y_all, test_size=0.2, random_state=42, stratify=y_all)
+
+    dtrain = xgb.DMatrix(X_train, label=y_train)
+    dtest  = xgb.DMatrix(X_test, label=y_test)
+
+    params = dict(PARAMS)
+    if threads:
+        params["nthread"] = threads
+    evallist = [(dtrain, "train"), (dtest, "eval")]
+    bst = xgb.train(params, dtrain, num_boost_round=NUM_BOOST_ROUND, evals=evallist, early_stopping_rounds=25, verbose_eval=25)
+
+    # Save model and metadata
+    model_path = Path(models_dir) / "bloom_model.joblib"
+    joblib.dump({"model":bst, "feature_columns": feature_columns}, model_path)
+    print("Saved model to", model_path)
+
+    # quick evaluation
+    preds = bst.predict(dtest)  # shape (n_samples, 4) probabilities
+    pred_labels = np.argmax(preds, axis=1)  # predicted class
+    acc = accuracy_score(y_test, pred_labels)
+    print("Test Accuracy:", acc)
+    unique_labels = np.unique(y_test)
+    num_classes = len(unique_labels)
+    target_names = TARGET_NAMES[:num_classes]
+    print(classification_report(y_test, pred_labels, labels=unique_labels, target_names=target_names))
+
+    return {"artifact": str(model_path), "samples": int(len(y_all)), "test_accuracy": float(acc),
+            "best_iteration": int(bst.best_iteration)}
+
+class ChunkIter(xgb.DataIter):
+    """
+    Feeds XGBoost one chunk of points at a time for external-memory training.
+    chunks() returns a fresh iterable of feature-table lists (one list per
+    chunk); XGBoost may pass over it several times, and the train and test
+    iterators each do, so every call must yield the same rows (read a store
+    built beforehand, see training_data.point_feature_chunks). Rows go to the
+    train or test subset by a random draw seeded with the chunk number, so
+    every pass makes the same split.
+    """
+    def __init__(self, chunks, subset, cache_prefix):
+        self._chunks = chunks
+        self._subset = subset
+        self._it = None
+        self._chunk = 0
+        self.feature_columns = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        self._it = None
+        self._chunk = 0
+
+    def next(self, input_data):
+        if self._it is None:
+            self._it = iter(self._chunks())
+        for features in self._it:
+            self._chunk += 1
+            try:
+                X, y, self.feature_columns = build_dataset(features)
+            except ValueError:  # nothing usable in this chunk
+                continue
+            test = np.random.default_rng([42, self._chunk]).random(len(y)) < TEST_SIZE
+            keep = test if self._subset == "test" else ~test
+            input_data(data=X[keep], label=y[keep])
+            return 1
+        return 0
+
+def train_external(chunks, models_dir=MODELS_DIR, threads=None, cache_dir=None):
+    """
+    train() without holding the dataset in memory: chunks() yields the feature
+    tables a chunk of points at a time (training_data.point_feature_chunks) and
+    XGBoost keeps the quantised rows in a page cache on disk (cache_dir,
+    default a temporary directory), building trees with the hist method. The
+    train/test split is by row, not stratified. Saves the same artifact.
+    """
+    cache = Path(cache_dir or tempfile.mkdtemp(prefix="xgb_cache_"))
+    cache.mkdir(parents=True, exist_ok=True)
+    try:
+        train_iter = ChunkIter(chunks, "train", str(cache / "train"))
+        test_iter = ChunkIter(chunks, "test", str(cache / "test"))
+        dtrain = xgb.DMatrix(train_iter)
+        dtest = xgb.DMatrix(test_iter)
+        if dtrain.num_row() == 0:
+            raise ValueError("No samples collected - adjust sampling or API calls.")
+        feature_columns = train_iter.feature_columns
+        print("Total samples:", (dtrain.num_row() + dtest.num_row(), dtrain.num_col()))
+
+        params = dict(PARAMS, tree_method="hist")
+        if threads:
+            params["nthread"] = threads
+        evallist = [(dtrain, "train"), (dtest, "eval")]
+        bst = xgb.train(params, dtrain, num_boost_round=NUM_BOOST_ROUND, evals=evallist, early_stopping_rounds=25, verbose_eval=25)
+
+        model_path = Path(models_dir) / "bloom_model.joblib"
+        joblib.dump({"model":bst, "feature_columns": feature_columns}, model_path)
+        print("Saved model to", model_path)
+
+        y_test = dtest.get_label().astype(int)
+        pred_labels = np.argmax(bst.predict(dtest), axis=1)
+        acc = accuracy_score(y_test, pred_labels)
+        print("Test Accuracy:", acc)
+        unique_labels = np.unique(y_test)
+        print(classification_report(y_test, pred_labels, labels=unique_labels,
+                                    target_names=TARGET_NAMES[:len(unique_labels)]))
+        samples = dtrain.num_row() + dtest.num_row()
+    finally:
+        if not cache_dir:
+            shutil.rmtree(cache, ignore_errors=True)
+
+    return {"artifact": str(model_path), "samples": int(samples), "test_accuracy": float(acc),
+            "best_iteration": int(bst.best_iteration)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=n_samples)
+    parser.add_argument("--sampling", choices=SAMPLING, default="random")
+    parser.add_argument("--regional", action="store_true", help="POWER regional requests instead of one per point")
+    parser.add_argument("--external", action="store_true",
+                        help="stream feature chunks from the feature store (external-memory XGBoost)")
+    parser.add_argument("--threads", type=int, default=None, help="XGBoost nthread (default all cores)")
+    parser.add_argument("--cache-dir", default=None, help="XGBoost page cache for --external (default a temp dir)")
+    args = parser.parse_args()
+
+    # multi-year daily data (2017-2023) for points in the North Africa bbox, via the feature store
+    try:
+        if args.external:
+            # Build the store once; both DMatrix passes then read the same rows
+            chunks = point_feature_chunks(args.points, sampling=args.sampling, regional=args.regional,
+                                          chunk_points=CHUNK_POINTS)
+            train_external(chunks, threads=args.threads, cache_dir=args.cache_dir)
+        else:
+            points, features = load_point_features(args.points, sampling=args.sampling, regional=args.regional)
+            train(features, threads=args.threads)
+    except ValueError as e:
+        raise SystemExit(str(e))
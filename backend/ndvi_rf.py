@@ -0,0 +1,39 @@
+# ndvi_rf.py
+"""
+The /api/rf_predict model: a Random Forest of NDVI on day of year, fitted
+on the NDVI CSV and evaluated for every day of the year. Runs as a CPU job
+in a worker process (see jobs.py), so it only imports what it needs.
+"""
+import pandas as pd
+
+NDVI_CSV = "NDVI_TimeSeries_CentralValley (2).csv"
+
+def predict_year(csv_path=NDVI_CSV):
+    """Fit the forest and return {"future_days": [1..365], "predicted_ndvi": [...]}."""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import train_test_split
+
+    # Load NDVI data
+    df = pd.read_csv(csv_path)
+    df['date'] = pd.to_datetime(df[['year', 'month']].assign(day=1))
+    df = df.sort_values('date')
+
+    # Features: day of year
+    df['day_of_year'] = df['date'].dt.dayofyear
+    X = df[['day_of_year']]
+    y = df['NDVI']
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # Train Random Forest
+    rf_model = RandomForestRegressor(n_estimators=100, random_state=42)
+    rf_model.fit(X_train, y_train)
+
+    # Predict for future days (next 365 days)
+    future_days = pd.DataFrame({'day_of_year': range(1, 366)})
+    predictions = rf_model.predict(future_days)
+
+    return {
+        "future_days": future_days['day_of_year'].tolist(),
+        "predicted_ndvi": predictions.tolist()
+    }
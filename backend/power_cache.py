@@ -0,0 +1,199 @@
+# power_cache.py
+"""
+Persistent on-disk cache for NASA POWER daily point queries.
+
+Entries are Parquet files named by a hash of (rounded lat/lon, parameter set,
+community) and hold one contiguous daily date range. A request inside that
+range is served from disk; a request outside it only downloads the missing
+days and extends the entry, so a 2020-2021 query reuses a cached 2017-2023
+pull and vice versa.
+
+get_power_point_series keeps one entry per parameter instead, so a request
+for any subset of parameters already fetched is served from disk, and the
+parameters that are missing are fetched together in one request.
+
+Regional (bounding box) queries are cached the same way, one entry per box,
+parameter and date range.
+
+Configuration (environment):
+    POWER_CACHE_DIR        cache directory (default $DATA_DIR/power_cache)
+    POWER_CACHE_PRECISION  decimals lat/lon are rounded to (default 2)
+    POWER_CACHE_TTL_DAYS   entries older than this are refetched (default 30)
+    POWER_CACHE_MAX_MB     least recently used entries are evicted above this (default 512)
+    POWER_OFFLINE=1        never hit the network; misses raise PowerCacheMiss
+"""
+import hashlib
+import os
+import time
+import uuid
+from pathlib import Path
+import pandas as pd
+
+CACHE_DIR = Path(os.environ.get("POWER_CACHE_DIR", Path(os.environ.get("DATA_DIR", "./data")) / "power_cache"))
+PRECISION = int(os.environ.get("POWER_CACHE_PRECISION", "2"))
+TTL_DAYS = float(os.environ.get("POWER_CACHE_TTL_DAYS", "30"))
+MAX_MB = float(os.environ.get("POWER_CACHE_MAX_MB", "512"))
+OFFLINE = os.environ.get("POWER_OFFLINE", "0") == "1"
+EVICT_INTERVAL = 60  # seconds between eviction scans
+
+_last_evict = 0.0
+
+class PowerCacheMiss(LookupError):
+    """Raised in offline mode when the cache cannot answer a query."""
+
+def round_coord(value):
+    return round(float(value), PRECISION)
+
+def cache_key(lat, lon, parameters, community="AG"):
+    raw = f"{round_coord(lat):.{PRECISION}f},{round_coord(lon):.{PRECISION}f}|{','.join(parameters)}|{community}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def _entry_path(key):
+    return CACHE_DIR / key[:2] / f"{key}.parquet"
+
+def _read(path):
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    if time.time() - st.st_mtime > TTL_DAYS * 86400:
+        path.unlink(missing_ok=True)
+        return None
+    df = pd.read_parquet(path)
+    # Record the access in atime (mtime stays the fetch time used for the TTL)
+    os.utime(path, (time.time(), st.st_mtime))
+    return df
+
+def _write(path, df):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique per call: threads missing the same entry each write their own file
+    tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        df.to_parquet(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    evict()
+
+def evict(force=False):
+    """Delete least recently used entries until the cache fits in MAX_MB."""
+    global _last_evict
+    if not force and time.monotonic() - _last_evict < EVICT_INTERVAL:
+        return
+    _last_evict = time.monotonic()
+    entries = []
+    for p in CACHE_DIR.glob("*/*.parquet"):
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_atime, st.st_size, p))
+    total = sum(size for _, size, _ in entries)
+    limit = MAX_MB * 1024 * 1024
+    for _, size, p in sorted(entries):
+        if total <= limit:
+            break
+        p.unlink(missing_ok=True)
+        total -= size
+
+def _missing_range(cached, start, end):
+    """
+    Return the (start, end) span that has to be downloaded so the entry covers
+    [start, end] and stays contiguous, or None if it already does.
+    """
+    if cached is None or cached.empty:
+        return start, end
+    lo, hi = cached.index.min(), cached.index.max()
+    if start >= lo and end <= hi:
+        return None
+    one_day = pd.Timedelta(days=1)
+    fetch_start = start if start < lo else hi + one_day
+    fetch_end = end if end > hi else lo - one_day
+    return min(fetch_start, fetch_end), max(fetch_start, fetch_end)
+
+def get_power_point(lat, lon, start, end, parameters, fetch, community="AG", offline=None):
+    """
+    Return POWER daily data for [start, end] ('YYYYMMDD'), reading from the
+    cache and calling fetch(lat, lon, start, end, parameters) for missing days.
+    Coordinates passed to fetch are rounded to the cache precision.
+    """
+    offline = OFFLINE if offline is None else offline
+    start_ts = pd.to_datetime(start, format="%Y%m%d")
+    end_ts = pd.to_datetime(end, format="%Y%m%d")
+    path = _entry_path(cache_key(lat, lon, parameters, community))
+    cached = _read(path)
+
+    missing = _missing_range(cached, start_ts, end_ts)
+    if missing is None:
+        return cached.loc[start_ts:end_ts]
+    if offline:
+        raise PowerCacheMiss(f"POWER data for {lat}, {lon} {start}-{end} is not cached")
+
+    fetch_start, fetch_end = missing
+    fresh = fetch(round_coord(lat), round_coord(lon), fetch_start.strftime("%Y%m%d"), fetch_end.strftime("%Y%m%d"), parameters)
+    fresh = fresh.reindex(pd.date_range(fetch_start, fetch_end, freq="D", name="date"))
+    if cached is None:
+        merged = fresh
+    else:
+        merged = pd.concat([cached, fresh])
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+    _write(path, merged)
+    return merged.loc[start_ts:end_ts]
+
+def _match_columns(fresh, parameters):
+    # POWER may answer under another name (PRECTOT -> PRECTOTCORR); pair a lone leftover column
+    unmatched = [p for p in parameters if p not in fresh.columns]
+    extra = [c for c in fresh.columns if c not in parameters]
+    if len(unmatched) == 1 and len(extra) == 1:
+        fresh = fresh.rename(columns={extra[0]: unmatched[0]})
+    return fresh
+
+def get_power_point_series(lat, lon, start, end, parameters, fetch, community="AG", offline=None):
+    """
+    get_power_point with one cache entry per parameter: returns a frame with
+    one column per parameter for [start, end], calling
+    fetch(lat, lon, start, end, missing parameters) once, over the union of
+    the date ranges they miss, when any are not cached.
+    """
+    offline = OFFLINE if offline is None else offline
+    start_ts = pd.to_datetime(start, format="%Y%m%d")
+    end_ts = pd.to_datetime(end, format="%Y%m%d")
+    paths = {p: _entry_path(cache_key(lat, lon, [p], community)) for p in parameters}
+    cached = {p: _read(path) for p, path in paths.items()}
+    missing = {p: _missing_range(cached[p], start_ts, end_ts) for p in parameters}
+    need = [p for p in parameters if missing[p] is not None]
+    if need:
+        if offline:
+            raise PowerCacheMiss(f"POWER {','.join(need)} for {lat}, {lon} {start}-{end} is not cached")
+        fetch_start = min(missing[p][0] for p in need)
+        fetch_end = max(missing[p][1] for p in need)
+        fresh = fetch(round_coord(lat), round_coord(lon), fetch_start.strftime("%Y%m%d"), fetch_end.strftime("%Y%m%d"), need)
+        fresh = _match_columns(fresh, need).reindex(index=pd.date_range(fetch_start, fetch_end, freq="D", name="date"),
+                                                   columns=need)
+        for p in need:
+            merged = fresh[[p]]
+            if cached[p] is not None:
+                merged = pd.concat([cached[p], merged])
+                merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            _write(paths[p], merged)
+            cached[p] = merged
+    return pd.concat([cached[p].loc[start_ts:end_ts, p] for p in parameters], axis=1)
+
+def get_power_region(box, start, end, parameter, fetch, community="AG", offline=None):
+    """
+    Return POWER regional daily data for box (lat_min, lat_max, lon_min, lon_max)
+    and [start, end], calling fetch(*box, start, end, parameter) on a miss.
+    Regional entries are kept whole (no partial date ranges).
+    """
+    offline = OFFLINE if offline is None else offline
+    raw = f"region|{','.join(f'{v:g}' for v in box)}|{parameter}|{start}-{end}|{community}"
+    path = _entry_path(hashlib.sha1(raw.encode()).hexdigest())
+    cached = _read(path)
+    if cached is not None:
+        return cached
+    if offline:
+        raise PowerCacheMiss(f"POWER regional data for {box} {parameter} {start}-{end} is not cached")
+    fresh = fetch(*box, start, end, parameter)
+    _write(path, fresh)
+    return fresh
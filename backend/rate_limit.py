@@ -0,0 +1,55 @@
+# rate_limit.py
+"""
+Token-bucket rate limiting per upstream host.
+
+Each host gets one bucket shared by every thread in the process, so parallel
+fetchers together never exceed the host's request rate.
+"""
+import os
+import threading
+import time
+
+# Requests per second (sustained) and burst size per host
+HOST_RATE_LIMITS = {
+    "power.larc.nasa.gov": (5.0, 10),
+    "lpdaacsvc.cr.usgs.gov": (10.0, 10),
+    "harmony.earthdata.nasa.gov": (5.0, 5),
+    "cmr.earthdata.nasa.gov": (10.0, 10),
+    "disc.gsfc.nasa.gov": (2.0, 2),
+}
+# Multiplies every limit above, e.g. 0.5 while sharing a quota with other jobs
+RATE_SCALE = float(os.environ.get("NASA_RATE_SCALE", "1"))
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def bucket_for(host):
+    """Return the shared bucket for host, or None if the host is not limited."""
+    if host not in HOST_RATE_LIMITS:
+        return None
+    with _buckets_lock:
+        if host not in _buckets:
+            rate, burst = HOST_RATE_LIMITS[host]
+            _buckets[host] = TokenBucket(rate * RATE_SCALE, burst)
+        return _buckets[host]
@@ -0,0 +1,104 @@
+# response_format.py
+"""
+Content negotiation for the endpoints that return a table (a DataFrame).
+
+Formats, chosen by ?format= or else the Accept header:
+    records   JSON array of row objects (default; what the endpoints always returned)
+    columns   JSON object of column arrays, {"column": [values, ...], ...},
+              so key names are not repeated on every row
+    arrow     Arrow IPC stream (application/vnd.apache.arrow.stream), for
+              charts that read columns straight into typed arrays
+JSON is built column by column as arrays of value texts instead of one
+Python dict per row for jsonify. Floats keep every digit (repr, as jsonify
+wrote them), NaN/NaT become null and dates ISO 8601 (jsonify wrote RFC 822
+dates). Bodies of at least COMPRESS_MIN_BYTES are gzipped when the client
+accepts gzip.
+
+Configuration (environment):
+    COMPRESS_MIN_BYTES   smallest body worth compressing (default 1024)
+    GZIP_LEVEL           gzip level, 1 (fast) to 9 (small) (default 5)
+"""
+import gzip
+import io
+import json
+import math
+import os
+from datetime import date
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from flask import Response
+
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "5"))
+MIMETYPES = {
+    "records": "application/json",
+    "columns": "application/json",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+def negotiate(args, accept_mimetypes):
+    """The requested format; raises ValueError for an unknown ?format=."""
+    fmt = args.get('format')
+    if fmt:
+        if fmt not in MIMETYPES:
+            raise ValueError(f"Unknown format {fmt!r}, expected one of {', '.join(MIMETYPES)}")
+        return fmt
+    best = accept_mimetypes.best_match([MIMETYPES["records"], MIMETYPES["arrow"]], default=MIMETYPES["records"])
+    return "arrow" if best == MIMETYPES["arrow"] else "records"
+
+def _json_value(v):
+    # One value of an object column
+    if isinstance(v, float):
+        return repr(v) if math.isfinite(v) else "null"
+    if v is None or v is pd.NaT:
+        return "null"
+    if isinstance(v, date):
+        return json.dumps(v.isoformat())
+    if isinstance(v, np.generic):
+        return _json_value(v.item())
+    return json.dumps(v, default=str)
+
+def _json_column(values):
+    """JSON text of every value of a Series, as an object array."""
+    kind = values.dtype.kind
+    if kind == "f":
+        return np.array([repr(v) if math.isfinite(v) else "null" for v in values.tolist()], dtype=object)
+    if kind in "iub":
+        return np.array([json.dumps(v) for v in values.tolist()], dtype=object)
+    if kind == "M" and isinstance(values.dtype, np.dtype):
+        text = np.datetime_as_string(values.to_numpy(), unit="ms").astype(object)
+        return np.where(text == "NaT", "null", '"' + text + '"')
+    return np.array([_json_value(v) for v in values.tolist()], dtype=object)
+
+def encode(df, fmt):
+    """df in fmt, as bytes."""
+    if fmt == "arrow":
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+    keys = [json.dumps(str(c)) for c in df.columns]
+    columns = [_json_column(df.iloc[:, k]) for k in range(df.shape[1])]
+    if fmt == "columns":
+        return ("{" + ",".join(f"{key}:[{','.join(col)}]" for key, col in zip(keys, columns)) + "}").encode()
+    # records: concatenate the columns' texts row-wise into one object per row
+    rows = np.full(len(df), "{", dtype=object)
+    for k, (key, col) in enumerate(zip(keys, columns)):
+        rows = rows + ((("," if k else "") + key + ":") + col)
+    return ("[" + ",".join((rows + "}").tolist()) + "]").encode()
+
+def frame_response(df, request, headers=None):
+    """Response with df in the negotiated format, gzipped if accepted and large enough."""
+    try:
+        fmt = negotiate(request.args, request.accept_mimetypes)
+    except ValueError as e:
+        return Response(json.dumps({"error": str(e)}), status=400, mimetype="application/json")
+    body = encode(df, fmt)
+    response = Response(body, mimetype=MIMETYPES[fmt], headers=headers)
+    response.headers["Vary"] = "Accept, Accept-Encoding"
+    if len(body) >= COMPRESS_MIN_BYTES and request.accept_encodings["gzip"]:
+        response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+        response.headers["Content-Encoding"] = "gzip"
+    return response
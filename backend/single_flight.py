@@ -0,0 +1,80 @@
+# single_flight.py
+"""
+Request coalescing for identical upstream queries.
+
+SingleFlight.do(key, fn) runs fn() once per key at a time: callers that ask
+for a key already in flight wait for that call and share its result (or its
+exception). Successful results are then kept in a small LRU for ttl seconds,
+so a burst of identical requests (the dashboard loading with default
+parameters) costs one upstream call. Failures are never cached.
+
+Results are shared between callers, so treat them as read-only.
+
+Configuration (environment):
+    RESPONSE_CACHE_SIZE   completed results kept (default 256)
+    RESPONSE_CACHE_TTL    seconds a completed result is reused (default 300)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "256"))
+CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "300"))
+
+class SingleFlight:
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._inflight = {}             # key -> Future of the running call
+        self._cache = OrderedDict()     # key -> (expires, result), least recently used first
+        self._lock = threading.Lock()
+        self._counters = {"upstream": 0, "coalesced": 0, "cache_hits": 0, "errors": 0}
+
+    def do(self, key, fn):
+        """Result of fn() for key: cached, shared with the call in flight, or from a new call."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._cache.move_to_end(key)
+                    self._counters["cache_hits"] += 1
+                    return entry[1]
+                del self._cache[key]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self._counters["upstream"] += 1
+            else:
+                self._counters["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self._counters["errors"] += 1
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if self._maxsize > 0 and self._ttl > 0:
+                self._cache[key] = (time.monotonic() + self._ttl, result)
+                while len(self._cache) > self._maxsize:
+                    self._cache.popitem(last=False)
+            del self._inflight[key]
+        future.set_result(result)
+        return result
+
+    def stats(self):
+        """upstream / coalesced / cache_hits / errors counters and the cache size."""
+        with self._lock:
+            return dict(self._counters, cached=len(self._cache), in_flight=len(self._inflight))
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._counters = dict.fromkeys(self._counters, 0)
@@ -0,0 +1,72 @@
+# startup.py
+"""
+Deferred startup work for the API (loading data files and models).
+
+Steps are registered at import time and run in order, once, in a background
+thread started by start(): the app calls it on its first request (or from
+`python app.py` before serving), so importing the API loads nothing and
+the process answers requests while it warms up. Routes that need a step's
+result call get(name), which waits for that step; a step that raised makes
+get() raise StartupError with its message instead of failing the import.
+stats() reports the status and duration of every step, for readiness checks.
+"""
+import threading
+import time
+
+class StartupError(RuntimeError):
+    pass
+
+class Startup:
+    def __init__(self):
+        self._steps = {}        # name -> step record, in registration order
+        self._thread = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def add(self, name, fn):
+        """Register fn() as step name; its return value is what get(name) returns."""
+        with self._lock:
+            self._steps[name] = {"fn": fn, "status": "pending", "result": None, "error": None, "seconds": None}
+
+    def start(self):
+        """Run the steps in a background thread (once; later calls do nothing)."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="startup", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        for name, step in list(self._steps.items()):
+            with self._lock:
+                step["status"] = "loading"
+            t0 = time.perf_counter()
+            try:
+                result, error, status = step["fn"](), None, "ready"
+            except Exception as e:
+                result, error, status = None, f"{type(e).__name__}: {e}", "failed"
+            with self._lock:
+                step.update(result=result, error=error, status=status, seconds=round(time.perf_counter() - t0, 3))
+                self._changed.notify_all()
+
+    def get(self, name, timeout=None):
+        """Result of step name, waiting for it (starting the steps if needed); raises StartupError if it failed."""
+        self.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            step = self._steps[name]
+            while step["status"] in ("pending", "loading"):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise StartupError(f"{name} is still loading")
+                self._changed.wait(remaining)
+            if step["status"] == "failed":
+                raise StartupError(f"{name} failed to load: {step['error']}")
+            return step["result"]
+
+    def stats(self):
+        """ready (every step loaded) and each step's status, seconds and error."""
+        with self._lock:
+            steps = {name: {k: step[k] for k in ("status", "seconds", "error")} for name, step in self._steps.items()}
+        return {"ready": all(s["status"] == "ready" for s in steps.values()), "steps": steps}
@@ -0,0 +1,79 @@
+# tables.py
+"""
+Query helpers for the tabular endpoints (/data, /ndvi_map_data).
+
+Source CSVs are parsed once and kept in memory through a file cache that
+reloads them when the file changes. Requests filter (date range, bbox),
+project (fields=) and page (offset/limit) over the cached frame, and the
+JSON array is streamed in chunks instead of being built as one string.
+"""
+import numpy as np
+import pandas as pd
+from model_cache import ModelCache
+
+CHUNK_ROWS = 5000
+
+# Same cache semantics as the models: loaded once, reloaded on mtime change
+table_cache = ModelCache()
+
+def _load_ndvi_timeseries(path):
+    df = pd.read_csv(path)
+    df['date'] = pd.to_datetime(df[['year', 'month']].assign(day=1))
+    df = df.sort_values('date').reset_index(drop=True)
+    return {"frame": df, "dates": pd.DatetimeIndex(df['date'])}
+
+def _load_ndvi_map(path):
+    # Keep the 'date' strings as they are in the CSV; filter on a parsed copy
+    df = pd.read_csv(path)
+    return {"frame": df, "dates": pd.DatetimeIndex(pd.to_datetime(df['date']))}
+
+def ndvi_timeseries(path):
+    return table_cache.get(path, loader=_load_ndvi_timeseries)
+
+def ndvi_map(path):
+    return table_cache.get(path, loader=_load_ndvi_map)
+
+def query(table, args):
+    """
+    Apply the request's filters to a cached table.
+    args: start, end (dates), bbox ("min_lat,min_lon,max_lat,max_lon"),
+    fields (comma-separated columns), offset, limit.
+    Returns (frame, positions, total, next_offset); positions are the row
+    positions of the requested page. Raises ValueError on bad arguments.
+    """
+    df, dates = table["frame"], table["dates"]
+    mask = np.ones(len(df), dtype=bool)
+    if args.get('start'):
+        mask &= dates >= pd.Timestamp(args['start'])
+    if args.get('end'):
+        mask &= dates <= pd.Timestamp(args['end'])
+    if args.get('bbox'):
+        if 'lat' not in df.columns or 'lon' not in df.columns:
+            raise ValueError("bbox filter needs lat/lon columns")
+        min_lat, min_lon, max_lat, max_lon = map(float, args['bbox'].split(','))
+        lat, lon = df['lat'].to_numpy(), df['lon'].to_numpy()
+        mask &= (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+
+    if args.get('fields'):
+        fields = args['fields'].split(',')
+        unknown = [f for f in fields if f not in df.columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        df = df[fields]
+
+    matches = np.flatnonzero(mask)
+    offset = int(args.get('offset', 0))
+    limit = int(args['limit']) if args.get('limit') else len(matches)
+    if offset < 0 or limit < 0:
+        raise ValueError("offset and limit must be non-negative")
+    positions = matches[offset:offset + limit]
+    next_offset = offset + limit if offset + limit < len(matches) else None
+    return df, positions, len(matches), next_offset
+
+def stream_records(df, positions, chunk_rows=CHUNK_ROWS):
+    """Yield a JSON array of the selected rows, CHUNK_ROWS records at a time."""
+    yield "["
+    for i in range(0, len(positions), chunk_rows):
+        chunk = df.iloc[positions[i:i + chunk_rows]].to_json(orient='records', date_format='iso')
+        yield ("," if i else "") + chunk[1:-1]
+    yield "]"
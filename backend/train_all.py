@@ -0,0 +1,133 @@
+# train_all.py
+"""
+Retrain all POWER-based models in one run:
+
+    python train_all.py [--jobs bloom_xgb,forecasting_lstm] [--threads 2] [--memory-mb 4096] [--refresh]
+
+The sampled points are fetched and turned into feature tables once
+(training_data.py, kept in the feature store for later runs); each model then trains in its own process, in parallel,
+on the first n_samples points it has always used. Each job gets a thread
+limit (BLAS/OpenMP pools, XGBoost nthread, RandomForest n_jobs, TensorFlow
+op threads) and optionally an address-space limit. Artifacts go to
+MODELS_DIR as before, plus train_manifest.json describing the run.
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+import feature_store
+import training_data
+
+try:
+    import resource
+except ImportError:  # Windows: no address-space limits
+    resource = None
+
+MODELS_DIR = Path(os.environ.get("MODELS_DIR", "./models"))
+MANIFEST_NAME = "train_manifest.json"
+
+# Job name -> training module (each exposes n_samples and train(features, models_dir, threads))
+JOBS = {
+    "bloom_xgb": "model_train",
+    "desertification_rf": "desertification_model",
+    "bloom_clustering": "bloom_detection",
+    "forecasting_lstm": "forecasting_model",
+}
+JOB_THREADS = int(os.environ.get("TRAIN_JOB_THREADS", "0")) or None
+JOB_MEMORY_MB = int(os.environ.get("TRAIN_JOB_MEMORY_MB", "0")) or None
+
+def _run_job(module_name, features, models_dir, threads, memory_mb):
+    # Runs in a fresh worker process; limits only affect this job
+    if memory_mb and resource is not None:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    from threadpoolctl import threadpool_limits
+    module = importlib.import_module(module_name)
+    start = time.perf_counter()
+    with threadpool_limits(limits=threads):
+        result = module.train(features, models_dir=models_dir, threads=threads)
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+def run(jobs=None, models_dir=MODELS_DIR, threads=JOB_THREADS, memory_mb=JOB_MEMORY_MB, refresh=False):
+    """Load (or fetch and build) the feature tables once, train the selected jobs in parallel, write the manifest."""
+    jobs = list(jobs or JOBS)
+    unknown = [name for name in jobs if name not in JOBS]
+    if unknown:
+        raise ValueError(f"Unknown jobs: {', '.join(unknown)}")
+    models_dir = Path(models_dir)
+    models_dir.mkdir(parents=True, exist_ok=True)
+    threads = threads or max(1, (os.cpu_count() or 1) // len(jobs))
+
+    started = datetime.now(timezone.utc)
+    t0 = time.perf_counter()
+    # Trainers import TensorFlow lazily, so importing them here is cheap
+    sizes = {name: importlib.import_module(JOBS[name]).n_samples for name in jobs}
+    points, features = training_data.load_point_features(max(sizes.values()), refresh=refresh)
+    features_seconds = time.perf_counter() - t0
+    available = sum(f is not None for f in features)
+    print(f"Features for {available}/{len(points)} points in {features_seconds:.1f}s")
+
+    results = {}
+    # A fresh process per job (so limits never carry over) needs Python 3.11+;
+    # before that, a worker whose job finished early may take another one
+    pool_args = {"max_tasks_per_child": 1} if sys.version_info >= (3, 11) else {}
+    with ProcessPoolExecutor(max_workers=len(jobs), mp_context=get_context("spawn"), **pool_args) as pool:
+        futures = {
+            name: pool.submit(_run_job, JOBS[name], features[:sizes[name]], str(models_dir), threads, memory_mb)
+            for name in jobs
+        }
+        for name, future in futures.items():
+            entry = {"module": JOBS[name], "points": sizes[name], "threads": threads, "memory_mb": memory_mb}
+            try:
+                entry.update(status="ok", **future.result())
+            except Exception as e:
+                entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+                traceback.print_exception(e)
+            results[name] = entry
+            print(f"{name}: {entry['status']}")
+
+    manifest = {
+        "run_id": started.strftime("%Y%m%dT%H%M%SZ"),
+        "started_at": started.isoformat(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "wall_seconds": round(time.perf_counter() - t0, 2),
+        "points": {
+            "requested": len(points),
+            "available": available,
+            "seed": training_data.SEED,
+            "bbox": training_data.BBOX,
+            "start": training_data.START,
+            "end": training_data.END,
+            "max_lags": training_data.MAX_LAGS,
+        },
+        "feature_store": str(feature_store.store_path(training_data.feature_spec())),
+        "features_seconds": round(features_seconds, 2),
+        "jobs": results,
+    }
+    (models_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    print("Wrote", models_dir / MANIFEST_NAME)
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", default=",".join(JOBS), help="comma-separated subset of " + ",".join(JOBS))
+    parser.add_argument("--threads", type=int, default=JOB_THREADS, help="threads per job (default: cpus / jobs)")
+    parser.add_argument("--memory-mb", type=int, default=JOB_MEMORY_MB, help="address-space limit per job")
+    parser.add_argument("--models-dir", default=str(MODELS_DIR))
+    parser.add_argument("--refresh", action="store_true", help="rebuild the feature store")
+    args = parser.parse_args()
+
+    try:
+        manifest = run(args.jobs.split(","), args.models_dir, args.threads, args.memory_mb, args.refresh)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    if any(job["status"] != "ok" for job in manifest["jobs"].values()):
+        sys.exit(1)
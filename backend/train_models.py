@@ -1,5 +1,4 @@
 import pandas as pd
-import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
@@ -8,6 +7,7 @@ from tensorflow.keras.layers import LSTM, Dense, Dropout
 from sklearn.preprocessing import MinMaxScaler
 import joblib
 import os
+from utils import sequence_windows
 
 # Function to train Random Forest for bloom prediction
 def train_random_forest_model(data_file='bulk_ndvi_data.csv', model_file='models/bloom_model.joblib'):
@@ -67,13 +67,7 @@ def train_lstm_model(data_file='NDVI_TimeSeries_CentralValley (2).csv', model_fi
 
         # Create sequences
         seq_length = 30
-        X, y = [], []
-        for i in range(len(scaled_data) - seq_length):
-            X.append(scaled_data[i:i+seq_length])
-            y.append(scaled_data[i+seq_length])
-
-        X = np.array(X)
-        y = np.array(y)
+        X, y = sequence_windows(scaled_data, seq_length)
 
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
@@ -0,0 +1,266 @@
+# training_data.py
+"""
+Training points and monthly feature tables shared by the POWER-based
+trainers (model_train.py, desertification_model.py, bloom_detection.py,
+forecasting_model.py) and the train_all.py orchestrator.
+
+Points are drawn exactly as the scripts always drew them (np.random.seed(42),
+then one uniform lat and lon per point), so the first n points are the same
+for every trainer and one fetch serves all of them. Feature tables are built
+once with MAX_LAGS lags and kept in the feature store (feature_store.py),
+so retraining reads them from disk instead of fetching and recomputing;
+trainers that use fewer lags read the matching column subset (lag_columns).
+
+For thousands of points (model_train.py --points 10000):
+    sampling    "grid" or "stratified" points spread evenly over the bbox
+                instead of independent uniform draws (sample_points)
+    regional    POWER regional requests, one per parameter and tile (at most
+                10x10 degrees) of the bbox, instead of one request per
+                point; each point takes its POWER grid cell's series
+                (region_features). The request count no longer grows with
+                the number of points.
+Either way features are built in batches (daily_to_monthly and
+monthly_feature_kernel) rather than per point.
+point_feature_chunks builds the store once and then reads the stored
+tables a chunk of points at a time, for training that does not hold every
+row in memory (model_train.py --external).
+
+POWER data is on a 0.5 x 0.625 degree grid (about 2,900 cells in BBOX), so
+points in the same cell get identical features.
+"""
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import feature_store
+from utils import (POWER_PARAMETERS, cell_coords, daily_to_monthly, feature_column_names, fetch_power_point,
+                   fetch_power_region, monthly_feature_kernel)
+
+# North Africa (lon_min, lon_max, lat_min, lat_max)
+BBOX = (-10, 40, 20, 38)
+START, END = "20170101", "20231231"
+SEED = 42
+MAX_LAGS = 6
+FEATURE_VERSION = 2  # bump when the feature tables change (2: batched monthly means)
+FETCH_WORKERS = int(os.environ.get("NASA_MAX_WORKERS", "8"))
+SAMPLING = ("random", "grid", "stratified")
+# POWER regional requests cover 2-10 degrees per side
+REGION_TILE_DEG = 10
+# POWER grid (MERRA-2): cell centres every 0.5 degrees of latitude and
+# 0.625 of longitude. A point further than half a cell from every fetched
+# centre gets no data.
+GRID_LAT, GRID_LON = 0.5, 0.625
+CELL_HALF_LAT, CELL_HALF_LON = GRID_LAT / 2, GRID_LON / 2
+FEATURE_CHUNK = 500  # points per batched feature pass
+
+def _lattice(n, bbox):
+    # nx * ny >= n roughly square cells covering bbox
+    lon_min, lon_max, lat_min, lat_max = bbox
+    nx = max(1, round(math.sqrt(n * (lon_max - lon_min) / (lat_max - lat_min))))
+    return nx, math.ceil(n / nx)
+
+def sample_points(n, seed=SEED, bbox=BBOX, method="random"):
+    """
+    n (lat, lon) pairs in bbox.
+    random      independent uniform draws, identical to the scripts' np.random.uniform calls
+    grid        cell centres of a regular lattice, row by row from the south-west
+                (the last row may be partial)
+    stratified  the bbox split into a lattice of at least n cells, one uniform
+                point in each of n distinct random cells, in random order
+    """
+    lon_min, lon_max, lat_min, lat_max = bbox
+    if method == "random":
+        u = np.random.RandomState(seed).random_sample((n, 2))
+    elif method in ("grid", "stratified"):
+        nx, ny = _lattice(n, bbox)
+        if method == "grid":
+            row, col = np.divmod(np.arange(n), nx)
+            u = np.column_stack([(row + 0.5) / ny, (col + 0.5) / nx])
+        else:
+            rng = np.random.default_rng(seed)
+            row, col = np.divmod(rng.choice(nx * ny, size=n, replace=False), nx)
+            u = np.column_stack([(row + rng.random(n)) / ny, (col + rng.random(n)) / nx])
+    else:
+        raise ValueError(f"Unknown sampling method {method!r}, expected one of {', '.join(SAMPLING)}")
+    lats = lat_min + (lat_max - lat_min) * u[:, 0]
+    lons = lon_min + (lon_max - lon_min) * u[:, 1]
+    return [(float(lat), float(lon)) for lat, lon in zip(lats, lons)]
+
+def fetch_points(points, start=START, end=END, max_workers=FETCH_WORKERS):
+    """Daily POWER frames in point order; None where the fetch failed."""
+    frames = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(fetch_power_point, lat, lon, start, end) for lat, lon in points]
+        for (lat, lon), future in zip(points, futures):
+            try:
+                frames.append(future.result())
+            except Exception as e:
+                print("Fetch failed for", lat, lon, ":", str(e))
+                frames.append(None)
+    return frames
+
+def _tables(values, index, columns):
+    index = pd.DatetimeIndex(index, name="date")
+    return [pd.DataFrame(v, index=index, columns=columns) for v in values]
+
+def point_features(frames, n_lags=MAX_LAGS, chunk_size=FEATURE_CHUNK):
+    """
+    Monthly feature table per daily frame (as build_features_from_df, built in
+    batches); None stays None. Frames are grouped by their dates and columns,
+    which are the same for every frame the cache returns for one query.
+    """
+    tables = [None] * len(frames)
+    groups = {}
+    for i, df in enumerate(frames):
+        if df is not None:
+            groups.setdefault((len(df), df.index[0], df.index[-1], tuple(df.columns)), []).append(i)
+    for members in groups.values():
+        first = frames[members[0]]
+        columns = feature_column_names(first.columns, n_lags)
+        for c in range(0, len(members), chunk_size):
+            chunk = members[c:c + chunk_size]
+            daily = np.stack([frames[i].to_numpy(dtype=float) for i in chunk])
+            monthly, index = daily_to_monthly(daily, first.index)
+            values = monthly_feature_kernel(monthly, index.month, n_lags)
+            for i, table in zip(chunk, _tables(values, index, columns)):
+                tables[i] = table
+    return tables
+
+def _edges(lo, hi, size):
+    if hi - lo < 2:
+        mid = (lo + hi) / 2
+        lo, hi = mid - 1, mid + 1
+    k = math.ceil((hi - lo) / size)
+    step = (hi - lo) / k
+    return [(round(lo + i * step, 4), round(lo + (i + 1) * step, 4)) for i in range(k)]
+
+def region_tiles(lat_min, lat_max, lon_min, lon_max, size=REGION_TILE_DEG):
+    """(lat_min, lat_max, lon_min, lon_max) boxes of 2 to size degrees per side covering the box."""
+    return [lat + lon for lat in _edges(lat_min, lat_max, size) for lon in _edges(lon_min, lon_max, size)]
+
+@lru_cache(maxsize=256)
+def _region_monthly(tile, start, end, parameter):
+    # (variable name, cell centres, month ends, (cells, months) monthly means) of one regional entry
+    df = fetch_power_region(*tile, start, end, parameter)
+    monthly, index = daily_to_monthly(df.to_numpy(dtype=float).T[:, :, np.newaxis], df.index)
+    return df.columns.name or parameter, cell_coords(df), index, monthly[:, :, 0]
+
+def _nearest(values, x):
+    # Position of the nearest entry of sorted values for each x
+    if len(values) == 1:
+        return np.zeros(len(x), dtype=np.int64)
+    right = np.searchsorted(values, x).clip(1, len(values) - 1)
+    left = right - 1
+    return np.where(np.abs(x - values[left]) <= np.abs(values[right] - x), left, right)
+
+def _nearest_cells(points, coords):
+    """
+    Index of the nearest cell centre per point, -1 if it is more than half a
+    cell away. Regional responses are rectilinear grids, so latitude and
+    longitude are snapped separately and the cell looked up.
+    """
+    lat_values, lat_idx = np.unique(coords[:, 0], return_inverse=True)
+    lon_values, lon_idx = np.unique(coords[:, 1], return_inverse=True)
+    grid = np.full((len(lat_values), len(lon_values)), -1, dtype=np.int64)
+    grid[lat_idx, lon_idx] = np.arange(len(coords))
+    cells = grid[_nearest(lat_values, points[:, 0]), _nearest(lon_values, points[:, 1])]
+    offset = np.abs(points - coords[cells])
+    cells[(cells < 0) | (offset[:, 0] > CELL_HALF_LAT + 1e-9) | (offset[:, 1] > CELL_HALF_LON + 1e-9)] = -1
+    return cells
+
+def region_features(points, start=START, end=END, n_lags=MAX_LAGS, bbox=BBOX, parameters=POWER_PARAMETERS,
+                    max_workers=FETCH_WORKERS):
+    """
+    Monthly feature tables for points in bbox from POWER regional requests
+    (see the module docstring); None for points whose cell could not be
+    fetched. Features are computed once per distinct cell. The tiles depend
+    only on bbox, so every batch of points reuses the same cached requests.
+    """
+    xy = np.asarray(points, dtype=float).reshape(-1, 2)
+    lon_min, lon_max, lat_min, lat_max = bbox
+    # Smallest box whose cell centres cover every point of bbox
+    tiles = region_tiles(math.ceil((lat_min - CELL_HALF_LAT) / GRID_LAT) * GRID_LAT,
+                         math.floor((lat_max + CELL_HALF_LAT) / GRID_LAT) * GRID_LAT,
+                         math.ceil((lon_min - CELL_HALF_LON) / GRID_LON) * GRID_LON,
+                         math.floor((lon_max + CELL_HALF_LON) / GRID_LON) * GRID_LON)
+    jobs = [(tile, parameter) for parameter in parameters for tile in tiles]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_region_monthly, tile, start, end, parameter) for tile, parameter in jobs]
+    variables, cells, monthly = [], [], []
+    index = None
+    for parameter in parameters:
+        parts = []
+        for (tile, p), future in zip(jobs, futures):
+            if p != parameter:
+                continue
+            try:
+                parts.append(future.result())
+            except Exception as e:
+                print("Regional fetch failed for", tile, parameter, ":", str(e))
+        if not parts:
+            return [None] * len(points)
+        index = parts[0][2]
+        coords = np.concatenate([part[1] for part in parts])
+        values = np.concatenate([part[3] for part in parts])
+        variables.append(parts[0][0])
+        cells.append(_nearest_cells(xy, coords))
+        monthly.append(values)
+
+    # Features once per distinct combination of cells (one per variable)
+    cells = np.column_stack(cells)
+    ok = (cells >= 0).all(axis=1)
+    combos, inverse = np.unique(cells[ok], axis=0, return_inverse=True)
+    stacked = np.stack([monthly[v][combos[:, v]] for v in range(len(variables))], axis=2)
+    values = monthly_feature_kernel(stacked, index.month, n_lags)
+    tables = _tables(values, index, feature_column_names(variables, n_lags))
+    out = [None] * len(points)
+    for i, combo in zip(np.flatnonzero(ok), inverse.ravel()):
+        out[i] = tables[combo]
+    return out
+
+def lag_columns(columns, n_lags):
+    """The columns build_features_from_df(df, n_lags) would return, out of a table built with more lags."""
+    variables = [c[:-2] for c in columns if c.endswith("_t")]
+    return feature_column_names(variables, n_lags)
+
+def select_lags(feat, n_lags):
+    return feat[lag_columns(feat.columns, n_lags)]
+
+def feature_spec(start=START, end=END, regional=False):
+    """What the stored feature tables depend on (the feature store key)."""
+    return {"source": "POWER daily AG", "retrieval": "regional" if regional else "point", "start": start,
+            "end": end, "n_lags": MAX_LAGS, "feature_version": FEATURE_VERSION}
+
+def load_point_features(n, seed=SEED, n_lags=MAX_LAGS, refresh=False, sampling="random", regional=False):
+    """
+    Sample n points and return (points, feature tables) with n_lags lags.
+    Tables come from the feature store; points not stored yet are fetched and
+    built (with MAX_LAGS) first. refresh=True rebuilds the store.
+    """
+    points = sample_points(n, seed, method=sampling)
+    if regional:
+        build = region_features
+    else:
+        build = lambda pts: point_features(fetch_points(pts))
+    features = feature_store.get_point_features(points, feature_spec(regional=regional), build, refresh=refresh,
+                                                columns=lambda columns: lag_columns(columns, n_lags))
+    return points, features
+
+def point_feature_chunks(n, seed=SEED, n_lags=MAX_LAGS, refresh=False, sampling="random", regional=False,
+                         chunk_points=feature_store.PART_POINTS):
+    """
+    load_point_features for out-of-core training: builds the feature store
+    (as load_point_features does) and returns chunks(), which yields the
+    feature tables of chunk_points points at a time, read from the store
+    (see feature_store.point_feature_chunks).
+    """
+    points = sample_points(n, seed, method=sampling)
+    if regional:
+        build = region_features
+    else:
+        build = lambda pts: point_features(fetch_points(pts))
+    return feature_store.point_feature_chunks(points, feature_spec(regional=regional), build, refresh=refresh,
+                                              columns=lambda columns: lag_columns(columns, n_lags),
+                                              chunk_points=chunk_points)
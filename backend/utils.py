@@ -1,22 +1,17 @@
 # utils.py
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import warnings
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime, timedelta
+import http_client
+import power_cache
 
 POWER_URL = "https://power.larc.nasa.gov/api/temporal/daily/point"
+POWER_REGIONAL_URL = "https://power.larc.nasa.gov/api/temporal/daily/regional"
+POWER_PARAMETERS = ["T2M", "PRECTOT", "ALLSKY_SFC_SW_DWN", "RH2M", "GWETPROF", "GWETROOT"]
 
-def fetch_power_point(lat, lon, start, end, parameters=None):
-    """
-    Fetch NASA POWER daily data for a single point.
-    start, end = 'YYYYMMDD' strings
-    parameters = list of parameter short names (T2M, PRECTOT, etc.)
-    Returns pandas DataFrame with date index and columns = parameters
-    """
-    if parameters is None:
-        parameters = ["T2M", "PRECTOT", "ALLSKY_SFC_SW_DWN", "RH2M", "GWETPROF", "GWETROOT"]
+def _fetch_power_point_remote(lat, lon, start, end, parameters):
     params = {
         "start": start,
         "end": end,
@@ -26,18 +21,9 @@ def fetch_power_point(lat, lon, start, end, parameters=None):
         "parameters": ",".join(parameters),
         "format": "JSON"
     }
-    # Set up retry strategy
-    retry_strategy = Retry(
-        total=3,
-        status_forcelist=[429, 500, 502, 503, 504],
-        backoff_factor=1
-    )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    with requests.Session() as session:
-        session.mount("https://", adapter)
-        r = session.get(POWER_URL, params=params, timeout=60)
-        r.raise_for_status()
-        j = r.json()
+    r = http_client.get(POWER_URL, params=params)
+    r.raise_for_status()
+    j = r.json()
     data = j["properties"]["parameter"]
     # Transform into dataframe
     df = pd.DataFrame(data)
@@ -47,6 +33,172 @@ def fetch_power_point(lat, lon, start, end, parameters=None):
     df = df.apply(pd.to_numeric, errors='coerce')
     return df
 
+def fetch_power_point(lat, lon, start, end, parameters=None, use_cache=True, offline=None):
+    """
+    Fetch NASA POWER daily data for a single point.
+    start, end = 'YYYYMMDD' strings
+    parameters = list of parameter short names (T2M, PRECTOT, etc.)
+    Returns pandas DataFrame with date index and columns = parameters
+    Responses are kept in the on-disk cache (see power_cache.py); pass
+    use_cache=False to bypass it, offline=True to never hit the network.
+    """
+    if parameters is None:
+        parameters = POWER_PARAMETERS
+    if not use_cache:
+        return _fetch_power_point_remote(lat, lon, start, end, parameters)
+    return power_cache.get_power_point(lat, lon, start, end, parameters, _fetch_power_point_remote, offline=offline)
+
+def fetch_power_series(lat, lon, start, end, parameters, offline=None):
+    """
+    fetch_power_point for the API: same frame, cached per parameter (see
+    power_cache.get_power_point_series), so requests for different subsets
+    of parameters share the cache and the missing ones are fetched together.
+    """
+    return power_cache.get_power_point_series(lat, lon, start, end, parameters, _fetch_power_point_remote,
+                                              offline=offline)
+
+def _fetch_power_region_remote(lat_min, lat_max, lon_min, lon_max, start, end, parameter):
+    params = {
+        "start": start,
+        "end": end,
+        "latitude-min": lat_min,
+        "latitude-max": lat_max,
+        "longitude-min": lon_min,
+        "longitude-max": lon_max,
+        "community": "AG",
+        "parameters": parameter,
+        "format": "JSON"
+    }
+    r = http_client.get(POWER_REGIONAL_URL, params=params)
+    r.raise_for_status()
+    # GeoJSON: one feature per grid cell, coordinates [lon, lat, elevation]
+    cells, series, dates, name = [], [], None, parameter
+    for feature in r.json()["features"]:
+        lon, lat = feature["geometry"]["coordinates"][:2]
+        # Response name of the parameter (e.g. PRECTOT comes back as PRECTOTCORR)
+        ((name, values),) = feature["properties"]["parameter"].items()
+        if dates is None:
+            dates = list(values)
+        cells.append(f"{lat},{lon}")
+        series.append([values.get(d) for d in dates])
+    # One float array (cells x days) instead of a frame built from nested dicts
+    df = pd.DataFrame(np.array(series, dtype=float).T.reshape(len(dates or []), len(cells)),
+                      index=pd.to_datetime(dates or [], format="%Y%m%d"), columns=cells)
+    df.index.name = "date"
+    df.columns.name = name
+    return df
+
+def fetch_power_region(lat_min, lat_max, lon_min, lon_max, start, end, parameter, use_cache=True, offline=None):
+    """
+    Fetch NASA POWER daily data for every grid cell in a box (one regional
+    request; POWER accepts 2-10 degrees per side and a single parameter).
+    Returns a DataFrame indexed by date with one "lat,lon" column per cell
+    centre; columns.name is the parameter name as POWER returns it.
+    Cached like fetch_power_point.
+    """
+    box = (lat_min, lat_max, lon_min, lon_max)
+    if not use_cache:
+        return _fetch_power_region_remote(*box, start, end, parameter)
+    return power_cache.get_power_region(box, start, end, parameter, _fetch_power_region_remote, offline=offline)
+
+def cell_coords(region_df):
+    """(cells, 2) array of the (lat, lon) centres of a fetch_power_region frame's columns."""
+    return np.array([[float(v) for v in c.split(",")] for c in region_df.columns]).reshape(-1, 2)
+
+def feature_column_names(columns, n_lags=6):
+    """Feature names produced for monthly variables `columns`, in output order."""
+    names = []
+    for col in columns:
+        names.append(f"{col}_t")
+        names += [f"{col}_lag{lag}" for lag in range(1, n_lags+1)]
+    for col in columns:
+        names += [f"{col}_rollmean3", f"{col}_rollstd6"]
+    names += [f"{col}_amp12" for col in columns]
+    return names + ["month_sin", "month_cos"]
+
+def _shift(x, k):
+    # Shift (points, months, vars) forward k months along axis 1, padding with NaN
+    if k == 0:
+        return x
+    out = np.full_like(x, np.nan)
+    out[:, k:] = x[:, :-k]
+    return out
+
+def _rolling_mean(x, window):
+    """
+    Trailing-window mean over axis 1, ignoring NaN and allowing partial windows
+    (pandas rolling(window, min_periods=1)). Also returns the valid counts.
+    """
+    count = np.zeros_like(x)
+    total = np.zeros_like(x)
+    for k in range(window):
+        w = _shift(x, k)
+        valid = ~np.isnan(w)
+        count += valid
+        total += np.where(valid, w, 0.0)
+    with np.errstate(invalid='ignore'):
+        return total / count, count
+
+def _rolling_std(x, window):
+    # Sample std (ddof=1); NaN where the window has fewer than two values
+    mean, count = _rolling_mean(x, window)
+    sq = np.zeros_like(x)
+    for k in range(window):
+        d = _shift(x, k) - mean
+        sq += np.where(np.isnan(d), 0.0, d*d)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(sq / (count - 1))
+    std[count < 2] = np.nan
+    return std
+
+def _rolling_amp(x, window):
+    # nanmax - nanmin over the trailing window; NaN if the window is all NaN
+    hi = x.copy()
+    lo = x.copy()
+    for k in range(1, window):
+        w = _shift(x, k)
+        hi = np.fmax(hi, w)
+        lo = np.fmin(lo, w)
+    return hi - lo
+
+def monthly_feature_kernel(monthly, months, n_lags=6):
+    """
+    Batched feature builder.
+    monthly: (points, months, variables) array of monthly means
+    months: (months,) calendar month numbers shared by all points
+    Returns (points, months, features) float array with features ordered as
+    feature_column_names(variables, n_lags).
+    """
+    monthly = np.asarray(monthly, dtype=float)
+    n_points, n_months, n_vars = monthly.shape
+    lags = np.stack([_shift(monthly, k) for k in range(n_lags+1)], axis=3)  # (p, m, v, lag)
+    mean3 = _rolling_mean(monthly, 3)[0]
+    std6 = _rolling_std(monthly, 6)
+    amp12 = _rolling_amp(monthly, 12)
+    angle = 2*np.pi*np.asarray(months)/12
+    cyclical = np.broadcast_to(np.stack([np.sin(angle), np.cos(angle)], axis=1), (n_points, n_months, 2))
+    return np.concatenate([
+        lags.reshape(n_points, n_months, n_vars*(n_lags+1)),
+        np.stack([mean3, std6], axis=3).reshape(n_points, n_months, n_vars*2),
+        amp12,
+        cyclical,
+    ], axis=2)
+
+def daily_to_monthly(daily, dates):
+    """
+    Calendar-month means of a (points, days, variables) array, ignoring NaN
+    (batched DataFrame.resample('M').mean()). dates must be sorted daily dates
+    shared by all points. Returns (monthly array, month-end DatetimeIndex).
+    """
+    periods = pd.DatetimeIndex(dates).to_period('M')
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    valid = ~np.isnan(daily)
+    sums = np.add.reduceat(np.where(valid, daily, 0.0), starts, axis=1)
+    counts = np.add.reduceat(valid, starts, axis=1)
+    with np.errstate(invalid='ignore'):
+        monthly = sums / counts
+    return monthly, periods[starts].to_timestamp(how='end').normalize()
+
 def build_features_from_df(df, n_lags=6):
     """
     Build features (lags, rolling stats, amplitude, month sin/cos) from daily df.
@@ -56,25 +208,8 @@ def build_features_from_df(df, n_lags=6):
     # Resample to monthly mean
     monthly = df.resample('M').mean()
     monthly = monthly.sort_index()
-    # Create lags for each variable
-    feat = pd.DataFrame(index=monthly.index)
-    for col in monthly.columns:
-        feat[f"{col}_t"] = monthly[col]
-        for lag in range(1, n_lags+1):
-            feat[f"{col}_lag{lag}"] = monthly[col].shift(lag)
-    # Rolling stats (3,6 months)
-    for col in monthly.columns:
-        feat[f"{col}_rollmean3"] = monthly[col].rolling(3, min_periods=1).mean()
-        feat[f"{col}_rollstd6"] = monthly[col].rolling(6, min_periods=1).std()
-    # amplitude (max-min) over last 12 months
-    for col in monthly.columns:
-        feat[f"{col}_amp12"] = monthly[col].rolling(12, min_periods=1).apply(lambda x: np.nanmax(x)-np.nanmin(x))
-    # month cyclical
-    feat["month"] = feat.index.month
-    feat["month_sin"] = np.sin(2*np.pi*feat["month"]/12)
-    feat["month_cos"] = np.cos(2*np.pi*feat["month"]/12)
-    feat = feat.drop(columns=["month"])
-    return feat
+    values = monthly_feature_kernel(monthly.to_numpy(dtype=float)[np.newaxis], monthly.index.month, n_lags)[0]
+    return pd.DataFrame(values, index=monthly.index, columns=feature_column_names(monthly.columns, n_lags))
 
 def create_synthetic_label_from_monthly(monthly_df, temp_col="T2M_t", precip_col="PRECTOT_t"):
     """
@@ -82,18 +217,16 @@ def create_synthetic_label_from_monthly(monthly_df, temp_col="T2M_t", precip_col
     Based on temperature and precipitation heuristics.
     Returns pandas Series aligned to same index (label for next month).
     """
-    df = monthly_df.copy()
-    if temp_col not in df.columns:
-        df[temp_col] = 20.0
-    if precip_col not in df.columns:
-        df[precip_col] = 10.0
+    df = monthly_df
+    # Missing columns default to 20 degC and 10 mm (without copying the table)
+    temp = df[temp_col] if temp_col in df.columns else pd.Series(20.0, index=df.index)
+    precip = df[precip_col] if precip_col in df.columns else pd.Series(10.0, index=df.index)
 
     # Define conditions for stages
-    temp = df[temp_col]
     if f"{precip_col}_rollmean3" in df.columns:
         precip_3 = df[f"{precip_col}_rollmean3"]
     else:
-        precip_3 = df[precip_col].rolling(3, min_periods=1).mean()
+        precip_3 = precip.rolling(3, min_periods=1).mean()
 
     # Heuristic for bloom stages based on temp and precip
     # 0: no bloom (cold or dry)
@@ -101,21 +234,46 @@ def create_synthetic_label_from_monthly(monthly_df, temp_col="T2M_t", precip_col
     # 2: peak bloom (optimal temp and precip)
     # 3: late bloom (cooling down)
 
-    label = pd.Series(0, index=df.index)  # default no bloom
+    label = synthetic_labels(temp.to_numpy(dtype=float), precip_3.to_numpy(dtype=float))
+    return pd.Series(label, index=df.index)
 
-    # Early bloom: temp 10-20, precip moderate
-    cond_early = (temp >= 10) & (temp < 20) & (precip_3 > precip_3.quantile(0.3))
-    label[cond_early] = 1
+def synthetic_labels(temp, precip_3):
+    """
+    Array form of create_synthetic_label_from_monthly: temp and precip_3 are
+    (..., months) arrays (quantiles are taken per row, ignoring NaN). Returns
+    int labels of the same shape, for the next month (0 for the last one).
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN rows
+        q3, q6, q7 = np.nanquantile(precip_3, [0.3, 0.6, 0.7], axis=-1, keepdims=True)
+    label = np.zeros(temp.shape, dtype=np.int64)  # default no bloom
 
+    # Early bloom: temp 10-20, precip moderate
+    label[(temp >= 10) & (temp < 20) & (precip_3 > q3)] = 1
     # Peak bloom: temp 15-25, precip high
-    cond_peak = (temp >= 15) & (temp <= 25) & (precip_3 > precip_3.quantile(0.6))
-    label[cond_peak] = 2
-
+    label[(temp >= 15) & (temp <= 25) & (precip_3 > q6)] = 2
     # Late bloom: temp 20-30, precip decreasing
-    cond_late = (temp > 20) & (temp <= 30) & (precip_3 <= precip_3.quantile(0.7))
-    label[cond_late] = 3
+    label[(temp > 20) & (temp <= 30) & (precip_3 <= q7)] = 3
 
     # Shift to next month prediction
-    label = label.shift(-1)
-    label = label.fillna(0).astype(int)
-    return label
+    next_month = np.zeros_like(label)
+    next_month[..., :-1] = label[..., 1:]
+    return next_month
+
+def sequence_windows(data, seq_length, target=None):
+    """
+    LSTM inputs from a (time, ...) array: X[i] = data[i:i+seq_length] and
+    y[i] = data[i+seq_length] (its column target, if given), for every i with
+    a next step. Both are read-only strided views of data, nothing is copied;
+    index or np.concatenate them where a contiguous array is needed.
+    """
+    data = np.asarray(data)
+    if len(data) <= seq_length:
+        X = np.empty((0, seq_length) + data.shape[1:], dtype=data.dtype)
+    else:
+        # Windows over data[:-1], so each has a next step; window axis moved after time
+        X = np.moveaxis(sliding_window_view(data[:-1], seq_length, axis=0), -1, 1)
+    y = data[seq_length:]
+    if target is not None:
+        y = y[:, target]
+    return X, y
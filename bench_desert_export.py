@@ -0,0 +1,66 @@
+"""
+Benchmark DesertRisk export at scale: the previous iterrows + json.dump
+GeoJSON builder against the streaming writers in preprocess_desert_data.py.
+
+Rows are synthetic copies of DesertRisk_Predictions.csv (default 1M). The
+iterrows path is timed on --legacy-rows rows and extrapolated.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from preprocess_desert_data import PROPERTIES, add_coordinates, write_binary, write_geojson
+
+def export_iterrows(df, path):
+    # Implementation before the streaming writer, kept as the reference
+    geojson = {"type": "FeatureCollection", "features": []}
+    for _, row in df.iterrows():
+        geojson["features"].append({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [row['longitude'], row['latitude']]},
+            "properties": {p: row[p] for p in PROPERTIES},
+        })
+    with open(path, 'w') as f:
+        json.dump(geojson, f)
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - t0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--legacy-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    base = pd.read_csv('DesertRisk_Predictions.csv')
+    df = base.iloc[np.arange(args.rows) % len(base)].reset_index(drop=True)
+    df = add_coordinates(df)
+    df['FireIndex'] = df['FireIndex'].fillna(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = lambda name: os.path.join(tmp, name)
+        legacy_s = timed(export_iterrows, df.iloc[:args.legacy_rows], out('legacy.geojson'))
+        legacy_bytes = os.path.getsize(out('legacy.geojson'))
+        runs = [
+            ("iterrows + json.dump (extrapolated)", legacy_s * args.rows / args.legacy_rows, legacy_bytes * args.rows / args.legacy_rows),
+        ]
+        for label, name, kwargs in [
+            ("streaming GeoJSON", "full.geojson", {}),
+            ("streaming GeoJSON, 5-decimal coords", "p5.geojson", {"precision": 5, "property_precision": 4}),
+            ("streaming NDJSON", "full.ndjson", {"ndjson": True}),
+            ("streaming GeoJSON, 2 properties", "slim.geojson", {"properties": ['PredictedRisk', 'NDVI'], "precision": 5}),
+        ]:
+            seconds = timed(write_geojson, df, out(name), **kwargs)
+            runs.append((label, seconds, os.path.getsize(out(name))))
+        seconds = timed(write_binary, df, out('full.bin'))
+        runs.append(("columnar float32 binary", seconds, os.path.getsize(out('full.bin'))))
+
+    print(f"{args.rows:,} rows")
+    print(f"{'writer':<40}{'seconds':>10}{'MB':>10}")
+    for label, seconds, size in runs:
+        print(f"{label:<40}{seconds:>10.2f}{size / 1e6:>10.1f}")
@@ -0,0 +1,67 @@
+"""
+Compare CSV with the partitioned Parquet dataset from bloom_storage.py for
+processed bloom data: file size, write time, and load time for a full read,
+a training read (feature columns only) and a filtered read (one region, one
+year, two columns).
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from bench_process_bloom_data import generate_rows
+from bloom_storage import load_table, save_table
+from process_bloom_data import process_bloom_frame
+from train_bloom_stage_model import FEATURES
+
+def size_mb(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path) / 1e6
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files) / 1e6
+
+def best_of(n, fn, *args, **kwargs):
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        result = fn(*args, **kwargs)
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+def full_read(path):
+    df = load_table(path)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = process_bloom_frame(generate_rows(args.rows))
+    region = df['region'].iloc[0]
+    year = df['date'].dt.year.iloc[len(df) // 2]
+    queries = [
+        ("full read", full_read, {}),
+        ("training columns", load_table, {"columns": FEATURES + ['bloom_stage']}),
+        ("1 region, 1 year, 2 cols", load_table, {"columns": ['ndvi', 'bloom_stage'], "regions": [region],
+                                                    "start": f"{year}-01-01", "end": f"{year}-12-31"}),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = []
+        for label, path in [("CSV", os.path.join(tmp, 'processed.csv')),
+                            ("Parquet (zstd)", os.path.join(tmp, 'processed.parquet'))]:
+            write_s, _ = best_of(1, save_table, df, path)
+            row = [label, size_mb(path), write_s]
+            for _, fn, kwargs in queries:
+                seconds, result = best_of(args.repeat, fn, path, **kwargs)
+                row.append(seconds)
+            rows.append(row)
+
+    print(f"{args.rows:,} processed rows, {df['region'].nunique()} regions")
+    header = f"{'format':<16}{'MB':>8}{'write s':>9}" + ''.join(f"{label:>28}" for label, _, _ in queries)
+    print(header)
+    for label, mb, write_s, *reads in rows:
+        print(f"{label:<16}{mb:>8.1f}{write_s:>9.2f}" + ''.join(f"{s:>28.3f}" for s in reads))
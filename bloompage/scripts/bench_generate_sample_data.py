@@ -0,0 +1,96 @@
+"""
+Benchmark the vectorized sample data generator against the previous
+week-by-week loop (one np.random draw per field per row).
+
+The loop is timed on the five sample regions with daily rows over
+--legacy-years; both versions must produce the same columns and matching
+per-column statistics. The vectorized generator is then timed in memory and
+streamed to CSV and Parquet at --rows.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from generate_sample_data import (
+    DEFAULT_REGIONS, REGION_COORDS, generate_sample_bloom_data, iter_sample_bloom_data
+)
+
+def legacy_generate(start_date, end_date, regions, days=7):
+    # Implementation before vectorization, kept as the reference
+    data = []
+    current_date = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    while current_date <= end:
+        for region in regions:
+            lat, lon = REGION_COORDS[region]
+            day_of_year = current_date.timetuple().tm_yday
+            ndvi_base = 0.5 + 0.3 * np.sin(2 * np.pi * (day_of_year - 80) / 365)
+            ndvi = max(0, min(1, ndvi_base + np.random.normal(0, 0.1)))
+            evi = max(0, min(1, ndvi * 0.9 + np.random.normal(0, 0.05)))
+            soil_moisture = 0.3 + 0.2 * np.sin(2 * np.pi * (day_of_year - 100) / 365)
+            soil_moisture = max(0.1, min(0.6, soil_moisture + np.random.normal(0, 0.05)))
+            temp_base = 15 + 15 * np.sin(2 * np.pi * (day_of_year - 80) / 365)
+            temperature = temp_base + np.random.normal(0, 3)
+            precipitation = max(0, np.random.exponential(20))
+            data.append({
+                'date': current_date.strftime('%Y-%m-%d'),
+                'lat': lat + np.random.normal(0, 0.5),
+                'lon': lon + np.random.normal(0, 0.5),
+                'ndvi': round(ndvi, 4),
+                'evi': round(evi, 4),
+                'soilMoisture': round(soil_moisture, 4),
+                'temperature': round(temperature, 2),
+                'precipitation': round(precipitation, 2),
+                'region': region
+            })
+        current_date += timedelta(days=days)
+    return pd.DataFrame(data)
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - t0, result
+
+def drain(chunks):
+    return sum(len(chunk) for chunk in chunks)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--legacy-years", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    start, end = '2000-01-01', f'{2000 + args.legacy_years - 1}-12-31'
+    np.random.seed(42)
+    legacy_s, expected = timed(legacy_generate, start, end, DEFAULT_REGIONS, days=1)
+    new_s, actual = timed(lambda: pd.concat(iter_sample_bloom_data(start, end, DEFAULT_REGIONS, 'daily'),
+                                            ignore_index=True))
+    assert list(actual.columns) == list(expected.columns)
+    assert (actual[['date', 'region']].to_numpy() == expected[['date', 'region']].to_numpy()).all()
+    numeric = expected.select_dtypes('number').columns
+    stats = lambda df: df.groupby('region')[numeric].agg(['mean', 'std'])
+    np.testing.assert_allclose(stats(actual), stats(expected), rtol=0.05, atol=0.05)
+    print(f"Same grid and matching statistics on {len(expected):,} rows")
+
+    # Many regions, daily rows: enough dates for --rows
+    n_regions = 1000
+    days = -(-args.rows // n_regions)
+    big_end = (pd.Timestamp('2000-01-01') + pd.Timedelta(days=days - 1)).strftime('%Y-%m-%d')
+    gen = lambda: iter_sample_bloom_data('2000-01-01', big_end, n_regions, 'daily', chunk_rows=args.chunk_rows)
+    runs = [("week-by-week loop", len(expected), legacy_s), ("vectorized", len(actual), new_s)]
+    seconds, rows = timed(drain, gen())
+    runs.append(("vectorized, chunks in memory", rows, seconds))
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, name in [("streamed to CSV", 'raw.csv'), ("streamed to Parquet", 'raw.parquet')]:
+            seconds, rows = timed(generate_sample_bloom_data, '2000-01-01', big_end, n_regions,
+                                  os.path.join(tmp, name), 'daily', chunk_rows=args.chunk_rows)
+            runs.append((label, rows, seconds))
+
+    print(f"{'generator':<32}{'rows':>14}{'seconds':>10}{'rows/s':>14}")
+    for label, rows, seconds in runs:
+        print(f"{label:<32}{rows:>14,}{seconds:>10.2f}{rows / seconds:>14,.0f}")
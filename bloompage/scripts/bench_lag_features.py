@@ -0,0 +1,55 @@
+"""
+Benchmark create_lag_features against the previous implementation (one
+groupby().shift() per variable and lag), and a nightly refresh: one new week
+for every region with append_lag_features and the cached tail, against
+recomputing the full history.
+
+Both comparisons assert identical output.
+"""
+
+import argparse
+import time
+import pandas as pd
+from generate_sample_data import iter_sample_bloom_data
+from train_bloom_forecast_model import append_lag_features, create_lag_features, lag_tail
+
+def legacy_create_lag_features(df, lag_periods=[1, 2, 3, 4]):
+    # Implementation before the single-pass version, kept as the reference
+    df = df.copy()
+    for lag in lag_periods:
+        df[f'ndvi_lag_{lag}'] = df.groupby('region')['ndvi'].shift(lag)
+        df[f'evi_lag_{lag}'] = df.groupby('region')['evi'].shift(lag)
+        df[f'temp_lag_{lag}'] = df.groupby('region')['temperature'].shift(lag)
+    return df.dropna()
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t0, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="100000,1000000,5000000")
+    parser.add_argument("--regions", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12}{'groupby/shift s':>18}{'single pass s':>16}{'full refresh s':>16}{'append s':>10}")
+    for n_rows in map(int, args.rows.split(',')):
+        weeks = -(-n_rows // args.regions)
+        end = pd.Timestamp('2000-01-02') + pd.Timedelta(weeks=weeks - 1)
+        df = pd.concat(iter_sample_bloom_data('2000-01-02', end, args.regions), ignore_index=True)
+        df = df.sort_values(['region', 'date'], kind='stable')
+
+        legacy_s, expected = timed(legacy_create_lag_features, df)
+        new_s, actual = timed(create_lag_features, df)
+        pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+        # Nightly refresh: history up to last week, then the newest week arrives
+        is_new = df['date'] == df['date'].max()
+        history, new_rows = df[~is_new], df[is_new]
+        tail = lag_tail(history)
+        full_s, full = timed(create_lag_features, df)
+        append_s, (appended, _) = timed(append_lag_features, new_rows, tail)
+        pd.testing.assert_frame_equal(appended, full[full['date'] == df['date'].max()], check_exact=True)
+
+        print(f"{n_rows:>12,}{legacy_s:>18.2f}{new_s:>16.2f}{full_s:>16.2f}{append_s:>10.4f}")
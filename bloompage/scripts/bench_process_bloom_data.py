@@ -0,0 +1,156 @@
+"""
+Benchmark process_bloom_frame and check it against the previous row-wise
+implementation (per-region loop + DataFrame.apply(axis=1)).
+
+Both implementations run on the same generated data up to --legacy-rows and
+must produce identical frames; the vectorized version then runs alone at
+each size in --rows (default up to 10M).
+
+The out-of-core mode (--chunksize) is compared with the in-memory mode on a
+--chunked-rows CSV: time, peak RSS of a fresh process (Linux), and output
+equality (exact for all columns but the rolling means and z-scores, which
+may differ by float rounding because they are accumulated chunk by chunk).
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from generate_sample_data import iter_sample_bloom_data
+from process_bloom_data import (
+    calculate_rolling_average, calculate_slope, detect_anomalies, process_bloom_dataset,
+    process_bloom_frame
+)
+
+def legacy_classify_bloom_stage(row):
+    ndvi = row['ndvi']
+    slope = row['ndvi_slope']
+    if ndvi < 0.3:
+        return 'Pre-bloom'
+    elif ndvi >= 0.3 and ndvi < 0.5 and slope > 0:
+        return 'Onset'
+    elif ndvi >= 0.5 and ndvi < 0.7:
+        return 'Peak'
+    elif slope < 0 and ndvi > 0.3:
+        return 'Decline'
+    else:
+        return 'Post-bloom'
+
+def legacy_calculate_bloom_intensity(row):
+    avg = (row['ndvi'] + row['evi']) / 2
+    if avg < 0.4:
+        return 'Mild'
+    elif avg < 0.6:
+        return 'Moderate'
+    else:
+        return 'Peak'
+
+def legacy_process_bloom_frame(df):
+    # Implementation before vectorization, kept as the reference
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.sort_values(['region', 'date'])
+    processed_dfs = []
+    for region, group in df.groupby('region'):
+        group['ndvi_rolling_avg'] = calculate_rolling_average(group['ndvi'])
+        group['evi_rolling_avg'] = calculate_rolling_average(group['evi'])
+        group['ndvi_slope'] = calculate_slope(group['ndvi'])
+        group['evi_slope'] = calculate_slope(group['evi'])
+        group['temperature_anomaly'] = detect_anomalies(group['temperature'])
+        group['precipitation_anomaly'] = detect_anomalies(group['precipitation'])
+        processed_dfs.append(group)
+    df_processed = pd.concat(processed_dfs, ignore_index=True)
+    df_processed['ndvi_slope'] = df_processed['ndvi_slope'].fillna(0)
+    df_processed['evi_slope'] = df_processed['evi_slope'].fillna(0)
+    df_processed['bloom_stage'] = df_processed.apply(legacy_classify_bloom_stage, axis=1)
+    df_processed['bloom_intensity'] = df_processed.apply(legacy_calculate_bloom_intensity, axis=1)
+    return df_processed
+
+def generate_rows(n_rows, n_regions=None, seed=42):
+    """
+    Weekly rows from generate_sample_data, ~20 years per region by default,
+    with a few NaN values and rows shuffled as in an unsorted raw file.
+    """
+    rng = np.random.default_rng(seed)
+    n_regions = n_regions or max(1, n_rows // 1000)
+    per_region = -(-n_rows // n_regions)
+    end = pd.Timestamp('2000-01-02') + pd.Timedelta(weeks=per_region - 1)
+    df = pd.concat(iter_sample_bloom_data('2000-01-02', end, n_regions, seed=seed), ignore_index=True)
+    df = df.sort_values('region', kind='stable').iloc[:n_rows]
+    df.loc[rng.random(n_rows) < 0.001, 'ndvi'] = np.nan
+    # Raw files are not sorted by region
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+def _run_quietly(queue, fn, args, kwargs):
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(*args, **kwargs)
+    seconds = time.perf_counter() - t0
+    # VmHWM is per address space and resets on exec; ru_maxrss does not
+    with open('/proc/self/status') as f:
+        hwm_kb = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+    queue.put((seconds, hwm_kb / 1024))
+
+def in_process(fn, *args, **kwargs):
+    """Run fn in a fresh child process; return (seconds, peak RSS MB)."""
+    # spawn, not fork: a forked child shares the parent's resident pages
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_quietly, args=(queue, fn, args, kwargs))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+def compare_chunked(n_rows, chunksize):
+    df = generate_rows(n_rows)
+    # Chunked mode needs rows in date order within each region
+    df = df.sort_values('date', kind='stable')
+    with tempfile.TemporaryDirectory() as tmp:
+        raw, mem, chunked = (os.path.join(tmp, name) for name in ('raw.csv', 'mem.csv', 'chunked.csv'))
+        df.to_csv(raw, index=False)
+        del df
+        mem_s, mem_mb = in_process(process_bloom_dataset, raw, mem)
+        chunk_s, chunk_mb = in_process(process_bloom_dataset, raw, chunked, chunksize=chunksize)
+        expected, actual = pd.read_csv(mem), pd.read_csv(chunked)
+    rounded = ['ndvi_rolling_avg', 'evi_rolling_avg', 'temperature_anomaly', 'precipitation_anomaly']
+    exact = [c for c in expected.columns if c not in rounded]
+    pd.testing.assert_frame_equal(actual[exact], expected[exact], check_exact=True)
+    pd.testing.assert_frame_equal(actual[rounded], expected[rounded], check_exact=False, rtol=0, atol=1e-12)
+    print(f"Chunked output matches in-memory output on {n_rows:,} rows")
+    print(f"{'mode':<24}{'seconds':>10}{'peak RSS MB':>14}")
+    print(f"{'in-memory':<24}{mem_s:>10.2f}{mem_mb:>14.1f}")
+    print(f"{f'chunked ({chunksize:,} rows)':<24}{chunk_s:>10.2f}{chunk_mb:>14.1f}")
+
+def timed(fn, df):
+    t0 = time.perf_counter()
+    out = fn(df.copy())
+    return out, time.perf_counter() - t0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--legacy-rows", type=int, default=100_000)
+    parser.add_argument("--rows", default="100000,1000000,10000000")
+    parser.add_argument("--chunked-rows", type=int, default=1_000_000)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = generate_rows(args.legacy_rows)
+    expected, legacy_s = timed(legacy_process_bloom_frame, df)
+    actual, new_s = timed(process_bloom_frame, df)
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+    print(f"Identical output on {args.legacy_rows:,} rows")
+
+    print(f"{'rows':>12}{'row-wise s':>14}{'vectorized s':>14}")
+    print(f"{args.legacy_rows:>12,}{legacy_s:>14.2f}{new_s:>14.2f}")
+    for n in map(int, args.rows.split(',')):
+        if n == args.legacy_rows:
+            continue
+        _, seconds = timed(process_bloom_frame, generate_rows(n))
+        print(f"{n:>12,}{'-':>14}{seconds:>14.2f}")
+
+    compare_chunked(args.chunked_rows, args.chunksize)
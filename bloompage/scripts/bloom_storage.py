@@ -0,0 +1,122 @@
+"""
+Storage helpers shared by the bloom data pipeline
+(generate_sample_data -> process_bloom_data -> train_bloom_*_model).
+
+Paths ending in .csv are read and written as CSV, as before. Any other path
+(e.g. bloom_raw_data.parquet) is a Parquet dataset directory partitioned by
+year (year=<yyyy>/part-0.parquet), with typed, compressed columns. Rows are
+clustered by region then date inside each file. Reads only load the requested
+columns, and region/date filters are pushed down: year directories outside
+the range are skipped and row groups are pruned using their region and date
+statistics. Regions are not directory partitions because synthetic datasets
+can have thousands of them, which would mean thousands of tiny files.
+"""
+
+import json
+import os
+import shutil
+import pandas as pd
+
+ROW_GROUP_SIZE = 64 * 1024
+
+def is_csv(path):
+    return str(path).lower().endswith('.csv')
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([('year', pa.int16())]), flavor='hive')
+
+def write_parquet_dataset(df, path, compression='zstd', part=None):
+    """
+    Replace the dataset at path with df, partitioned by year.
+    part: if set, add df to the dataset as numbered part files instead, so a
+    large dataset can be written in chunks (part 0, 1, 2, ...) and read back
+    in that order.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date'])
+    df['year'] = df['date'].dt.year.astype('int16')
+    # Clustered so row-group region/date statistics prune well
+    df = df.sort_values(['region', 'date'], kind='stable')
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    if part is None and os.path.isdir(path):
+        shutil.rmtree(path)
+    ds.write_dataset(
+        table, path, format='parquet', partitioning=_partitioning(),
+        file_options=ds.ParquetFileFormat().make_write_options(compression=compression),
+        min_rows_per_group=ROW_GROUP_SIZE, max_rows_per_group=ROW_GROUP_SIZE,
+        basename_template='part-{i}.parquet' if part is None else f'part-{part:06d}-{{i}}.parquet',
+        existing_data_behavior='error' if part is None else 'overwrite_or_ignore',
+    )
+
+def read_parquet_dataset(path, columns=None, start=None, end=None, regions=None):
+    """
+    Load a dataset written by write_parquet_dataset.
+    columns: columns to load (None = all, in their original order)
+    start, end: inclusive date range
+    regions: regions to load
+    Rows come back year by year, ordered by region and date within a year.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format='parquet', partitioning=_partitioning())
+    date_type = dataset.schema.field('date').type
+    predicates = []
+    if start is not None:
+        start = pd.Timestamp(start)
+        predicates += [ds.field('year') >= start.year, ds.field('date') >= pa.scalar(start, type=date_type)]
+    if end is not None:
+        end = pd.Timestamp(end)
+        predicates += [ds.field('year') <= end.year, ds.field('date') <= pa.scalar(end, type=date_type)]
+    if regions is not None:
+        predicates.append(ds.field('region').isin(list(regions)))
+    expression = None
+    for predicate in predicates:
+        expression = predicate if expression is None else expression & predicate
+
+    if columns is None:
+        # Restore the written column order, without the partition column
+        pandas_meta = json.loads(dataset.schema.metadata[b'pandas'])
+        columns = [c['name'] for c in pandas_meta['columns'] if c['name'] not in (None, 'year')]
+    return dataset.to_table(columns=list(columns), filter=expression).to_pandas()
+
+def save_table(df, path):
+    """Write df as CSV (.csv paths) or as a partitioned Parquet dataset."""
+    if is_csv(path):
+        df.to_csv(path, index=False)
+    else:
+        write_parquet_dataset(df, path)
+
+def load_table(path, columns=None, start=None, end=None, regions=None):
+    """
+    Load a table saved with save_table, optionally only some columns, an
+    inclusive date range and some regions. CSV input is filtered after
+    parsing; Parquet datasets push the filters down to the reader.
+    """
+    if not is_csv(path):
+        return read_parquet_dataset(path, columns, start, end, regions)
+
+    filters = start is not None or end is not None or regions is not None
+    usecols = None
+    if columns is not None:
+        usecols = list(columns) + [c for c in ('date', 'region') if filters and c not in columns]
+    df = pd.read_csv(path, usecols=usecols)
+    if filters:
+        mask = pd.Series(True, index=df.index)
+        dates = pd.to_datetime(df['date'])
+        if start is not None:
+            mask &= dates >= pd.Timestamp(start)
+        if end is not None:
+            mask &= dates <= pd.Timestamp(end)
+        if regions is not None:
+            mask &= df['region'].isin(list(regions))
+        df = df[mask].reset_index(drop=True)
+    if columns is not None:
+        df = df[list(columns)]
+    return df
@@ -3,96 +3,180 @@ Generate sample bloom data for testing
 Creates synthetic NASA satellite data for demonstration
 """
 
+import argparse
+import os
+import shutil
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from bloom_storage import is_csv, save_table, write_parquet_dataset
+
+DEFAULT_REGIONS = ['Nile Delta', 'Ethiopian Highlands', 'Kenya Rift Valley', 'Nigerian Savanna', 'South African Highveld']
+
+REGION_COORDS = {
+    'Nile Delta': (30.0, 31.2),
+    'Ethiopian Highlands': (9.0, 38.7),
+    'Kenya Rift Valley': (-0.5, 36.0),
+    'Nigerian Savanna': (9.0, 8.0),
+    'South African Highveld': (-26.2, 28.0),
+}
+
+# Bounds for the centres of regions not in REGION_COORDS (continental Africa)
+LAT_RANGE = (-35.0, 37.0)
+LON_RANGE = (-17.0, 51.0)
+
+CADENCES = {'daily': '1D', 'weekly': '7D'}
+
+# One independent random stream per field, so the values do not depend on
+# how the rows are split into chunks
+FIELDS = ['coords', 'lat', 'lon', 'ndvi', 'evi', 'soilMoisture', 'temperature', 'precipitation']
+
+def _region_list(regions):
+    if isinstance(regions, int):
+        width = len(str(regions - 1))
+        return [f'Region {i:0{width}d}' for i in range(regions)]
+    return list(regions)
+
+def iter_sample_bloom_data(
+    start_date='2018-01-01',
+    end_date='2024-12-31',
+    regions=DEFAULT_REGIONS,
+    cadence='weekly',
+    seed=42,
+    chunk_rows=1_000_000,
+):
+    """
+    Yield synthetic bloom data as DataFrames of about chunk_rows rows
+    (whole dates at a time), ordered by date and then region.
+    The same seed gives the same rows for any chunk_rows.
+
+    Args:
+        start_date, end_date: Date range (inclusive)
+        regions: List of region names, or a number of regions to create
+        cadence: 'weekly' or 'daily'
+        seed: Seed for the random generators
+        chunk_rows: Rows per yielded chunk
+    """
+    regions = _region_list(regions)
+    dates = pd.date_range(start_date, end_date, freq=CADENCES[cadence])
+    rngs = dict(zip(FIELDS, (np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(len(FIELDS)))))
+
+    # Region centres: known regions keep their coordinates, others are drawn
+    n_regions = len(regions)
+    centres = np.column_stack([
+        rngs['coords'].uniform(*LAT_RANGE, n_regions),
+        rngs['coords'].uniform(*LON_RANGE, n_regions),
+    ])
+    for i, region in enumerate(regions):
+        if region in REGION_COORDS:
+            centres[i] = REGION_COORDS[region]
+    region_names = np.array(regions, dtype=object)
+
+    dates_per_chunk = max(1, chunk_rows // n_regions)
+    for start in range(0, len(dates), dates_per_chunk):
+        chunk_dates = dates[start:start + dates_per_chunk]
+        n = len(chunk_dates) * n_regions
+        # Seasonal phase per row (date-major grid: every region for each date)
+        day_of_year = np.repeat(chunk_dates.dayofyear.to_numpy(), n_regions)
+        season = lambda shift: np.sin(2 * np.pi * (day_of_year - shift) / 365)
+
+        # NDVI follows seasonal pattern (higher in spring/summer)
+        ndvi = np.clip(0.5 + 0.3 * season(80) + rngs['ndvi'].normal(0, 0.1, n), 0, 1)
+        # EVI similar to NDVI but slightly different
+        evi = np.clip(ndvi * 0.9 + rngs['evi'].normal(0, 0.05, n), 0, 1)
+        # Soil moisture varies with season
+        soil_moisture = np.clip(0.3 + 0.2 * season(100) + rngs['soilMoisture'].normal(0, 0.05, n), 0.1, 0.6)
+        # Temperature varies with season
+        temperature = 15 + 15 * season(80) + rngs['temperature'].normal(0, 3, n)
+        # Precipitation is more random
+        precipitation = rngs['precipitation'].exponential(20, n)
+
+        yield pd.DataFrame({
+            'date': np.repeat(chunk_dates.strftime('%Y-%m-%d').to_numpy(), n_regions),
+            'lat': np.tile(centres[:, 0], len(chunk_dates)) + rngs['lat'].normal(0, 0.5, n),
+            'lon': np.tile(centres[:, 1], len(chunk_dates)) + rngs['lon'].normal(0, 0.5, n),
+            'ndvi': ndvi.round(4),
+            'evi': evi.round(4),
+            'soilMoisture': soil_moisture.round(4),
+            'temperature': temperature.round(2),
+            'precipitation': precipitation.round(2),
+            'region': np.tile(region_names, len(chunk_dates)),
+        })
 
 def generate_sample_bloom_data(
     start_date='2018-01-01',
     end_date='2024-12-31',
-    regions=['Nile Delta', 'Ethiopian Highlands', 'Kenya Rift Valley', 'Nigerian Savanna', 'South African Highveld'],
-    output_file='bloom_raw_data.csv'
+    regions=DEFAULT_REGIONS,
+    output_file='bloom_raw_data.csv',
+    cadence='weekly',
+    seed=42,
+    chunk_rows=None,
 ):
     """
     Generate synthetic bloom data for testing
-    
+
     Args:
         start_date: Start date for data generation
         end_date: End date for data generation
-        regions: List of regions to generate data for
-        output_file: Output CSV file path
+        regions: List of regions to generate data for, or a number of regions
+        output_file: Output CSV file, or Parquet dataset directory for other
+            paths; None to only return the data
+        cadence: 'weekly' or 'daily'
+        seed: Seed for the random generators
+        chunk_rows: If set, stream to output_file this many rows at a time
+            and return the number of rows instead of the DataFrame
     """
     print("Generating sample bloom data...")
-    
-    data = []
-    
-    # Generate weekly data for each region
-    current_date = datetime.strptime(start_date, '%Y-%m-%d')
-    end = datetime.strptime(end_date, '%Y-%m-%d')
-    
-    region_coords = {
-        'Nile Delta': (30.0, 31.2),
-        'Ethiopian Highlands': (9.0, 38.7),
-        'Kenya Rift Valley': (-0.5, 36.0),
-        'Nigerian Savanna': (9.0, 8.0),
-        'South African Highveld': (-26.2, 28.0),
-    }
-    
-    while current_date <= end:
-        for region in regions:
-            lat, lon = region_coords[region]
-            
-            # Simulate seasonal patterns
-            day_of_year = current_date.timetuple().tm_yday
-            
-            # NDVI follows seasonal pattern (higher in spring/summer)
-            ndvi_base = 0.5 + 0.3 * np.sin(2 * np.pi * (day_of_year - 80) / 365)
-            ndvi = max(0, min(1, ndvi_base + np.random.normal(0, 0.1)))
-            
-            # EVI similar to NDVI but slightly different
-            evi = max(0, min(1, ndvi * 0.9 + np.random.normal(0, 0.05)))
-            
-            # Soil moisture varies with season
-            soil_moisture = 0.3 + 0.2 * np.sin(2 * np.pi * (day_of_year - 100) / 365)
-            soil_moisture = max(0.1, min(0.6, soil_moisture + np.random.normal(0, 0.05)))
-            
-            # Temperature varies with season
-            temp_base = 15 + 15 * np.sin(2 * np.pi * (day_of_year - 80) / 365)
-            temperature = temp_base + np.random.normal(0, 3)
-            
-            # Precipitation is more random
-            precipitation = max(0, np.random.exponential(20))
-            
-            data.append({
-                'date': current_date.strftime('%Y-%m-%d'),
-                'lat': lat + np.random.normal(0, 0.5),
-                'lon': lon + np.random.normal(0, 0.5),
-                'ndvi': round(ndvi, 4),
-                'evi': round(evi, 4),
-                'soilMoisture': round(soil_moisture, 4),
-                'temperature': round(temperature, 2),
-                'precipitation': round(precipitation, 2),
-                'region': region
-            })
-        
-        # Move to next week
-        current_date += timedelta(days=7)
-    
-    # Create DataFrame and save
-    df = pd.DataFrame(data)
-    df.to_csv(output_file, index=False)
-    
-    print(f"Generated {len(df)} records")
-    print(f"Date range: {df['date'].min()} to {df['date'].max()}")
-    print(f"Regions: {', '.join(regions)}")
-    print(f"Saved to: {output_file}")
-    
-    return df
+    regions = _region_list(regions)
+    chunks = iter_sample_bloom_data(start_date, end_date, regions, cadence, seed, chunk_rows or 1_000_000)
+
+    if chunk_rows:
+        if output_file is None:
+            raise ValueError("chunk_rows needs an output_file")
+        records = 0
+        if not is_csv(output_file) and os.path.isdir(output_file):
+            shutil.rmtree(output_file)
+        for part, chunk in enumerate(chunks):
+            if is_csv(output_file):
+                chunk.to_csv(output_file, mode='a' if part else 'w', header=not part, index=False)
+            else:
+                write_parquet_dataset(chunk, output_file, part=part)
+            records += len(chunk)
+        result = records
+    else:
+        df = pd.concat(chunks, ignore_index=True)
+        if output_file is not None:
+            save_table(df, output_file)
+        records, result = len(df), df
+
+    print(f"Generated {records} records")
+    print(f"Date range: {start_date} to {end_date} ({cadence})")
+    print(f"Regions: {len(regions)}" if len(regions) > 10 else f"Regions: {', '.join(regions)}")
+    if output_file is not None:
+        print(f"Saved to: {output_file}")
+
+    return result
 
 if __name__ == "__main__":
-    df = generate_sample_bloom_data()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", default="bloom_raw_data.csv",
+                        help="CSV file, or Parquet dataset directory for other paths")
+    parser.add_argument("--start", default="2018-01-01")
+    parser.add_argument("--end", default="2024-12-31")
+    parser.add_argument("--regions", type=int, default=None,
+                        help="number of regions (default: the five sample regions)")
+    parser.add_argument("--cadence", choices=sorted(CADENCES), default="weekly")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-rows", type=int, default=None,
+                        help="stream the output this many rows at a time")
+    args = parser.parse_args()
+
+    result = generate_sample_bloom_data(
+        args.start, args.end, args.regions or DEFAULT_REGIONS, args.output,
+        args.cadence, args.seed, args.chunk_rows,
+    )
     print("\nSample data generation complete!")
-    print("\nFirst few rows:")
-    print(df.head())
-    print("\nStatistics:")
-    print(df.describe())
+    if not args.chunk_rows:
+        print("\nFirst few rows:")
+        print(result.head())
+        print("\nStatistics:")
+        print(result.describe())
@@ -3,15 +3,23 @@ Data processing script for NASA bloom detection data
 Processes raw satellite data and prepares it for AI models
 """
 
+import argparse
+import os
+import tempfile
+from collections import Counter
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from bloom_storage import is_csv, load_table, save_table
+
+ROLLING_WINDOW = 5
+ANOMALY_COLUMNS = ['temperature', 'precipitation']
 
 def normalize_ndvi(ndvi_series):
     """Normalize NDVI values to 0-1 range"""
     return (ndvi_series + 1) / 2
 
-def calculate_rolling_average(series, window=5):
+def calculate_rolling_average(series, window=ROLLING_WINDOW):
     """Calculate rolling average for time series"""
     return series.rolling(window=window, center=True, min_periods=1).mean()
 
@@ -25,103 +33,216 @@ def detect_anomalies(series):
     std = series.std()
     return (series - mean) / std
 
-def classify_bloom_stage(row):
-    """Classify bloom stage based on NDVI and slope"""
-    ndvi = row['ndvi']
-    slope = row['ndvi_slope']
+def classify_bloom_stage(df):
+    """Classify bloom stage based on NDVI and slope (vectorized over rows)"""
+    ndvi = df['ndvi']
+    slope = df['ndvi_slope']
     
-    if ndvi < 0.3:
-        return 'Pre-bloom'
-    elif ndvi >= 0.3 and ndvi < 0.5 and slope > 0:
-        return 'Onset'
-    elif ndvi >= 0.5 and ndvi < 0.7:
-        return 'Peak'
-    elif slope < 0 and ndvi > 0.3:
-        return 'Decline'
-    else:
-        return 'Post-bloom'
+    # First matching rule wins, as in an if/elif chain
+    conditions = [
+        ndvi < 0.3,
+        (ndvi >= 0.3) & (ndvi < 0.5) & (slope > 0),
+        (ndvi >= 0.5) & (ndvi < 0.7),
+        (slope < 0) & (ndvi > 0.3),
+    ]
+    choices = ['Pre-bloom', 'Onset', 'Peak', 'Decline']
+    return pd.Series(np.select(conditions, choices, default='Post-bloom'), index=df.index)
 
-def calculate_bloom_intensity(row):
-    """Calculate bloom intensity from NDVI and EVI"""
-    avg = (row['ndvi'] + row['evi']) / 2
+def calculate_bloom_intensity(df):
+    """Calculate bloom intensity from NDVI and EVI (vectorized over rows)"""
+    avg = (df['ndvi'] + df['evi']) / 2
     
-    if avg < 0.4:
-        return 'Mild'
-    elif avg < 0.6:
-        return 'Moderate'
-    else:
-        return 'Peak'
+    conditions = [avg < 0.4, avg < 0.6]
+    return pd.Series(np.select(conditions, ['Mild', 'Moderate'], default='Peak'), index=df.index)
 
-def process_bloom_dataset(input_file, output_file):
+def process_bloom_frame(df):
     """
-    Main processing function
-    
-    Args:
-        input_file: Path to raw CSV data
-        output_file: Path to save processed data
+    Add time-series features, bloom stage and intensity to raw bloom data.
+    All per-region calculations run as grouped operations over the whole frame.
     """
-    print(f"Loading data from {input_file}...")
-    df = pd.read_csv(input_file)
-    
     # Convert date to datetime
     df['date'] = pd.to_datetime(df['date'])
     
     # Sort by region and date
-    df = df.sort_values(['region', 'date'])
-    
-    print("Processing features...")
-    
-    # Group by region for time-series calculations
-    processed_dfs = []
+    df = df.sort_values(['region', 'date']).reset_index(drop=True)
+    by_region = df.groupby('region', sort=False)
     
-    for region, group in df.groupby('region'):
-        print(f"  Processing region: {region}")
-        
-        # Calculate rolling averages
-        group['ndvi_rolling_avg'] = calculate_rolling_average(group['ndvi'])
-        group['evi_rolling_avg'] = calculate_rolling_average(group['evi'])
-        
-        # Calculate slopes
-        group['ndvi_slope'] = calculate_slope(group['ndvi'])
-        group['evi_slope'] = calculate_slope(group['evi'])
-        
-        # Detect anomalies
-        group['temperature_anomaly'] = detect_anomalies(group['temperature'])
-        group['precipitation_anomaly'] = detect_anomalies(group['precipitation'])
-        
-        processed_dfs.append(group)
+    # Calculate rolling averages
+    for col in ['ndvi', 'evi']:
+        df[f'{col}_rolling_avg'] = (
+            by_region[col].rolling(window=ROLLING_WINDOW, center=True, min_periods=1).mean()
+            .reset_index(level=0, drop=True)
+        )
     
-    # Combine all regions
-    df_processed = pd.concat(processed_dfs, ignore_index=True)
+    # Calculate slopes (first row of each region has no previous value)
+    df['ndvi_slope'] = by_region['ndvi'].diff().fillna(0)
+    df['evi_slope'] = by_region['evi'].diff().fillna(0)
     
-    # Fill NaN values from slope calculations
-    df_processed['ndvi_slope'] = df_processed['ndvi_slope'].fillna(0)
-    df_processed['evi_slope'] = df_processed['evi_slope'].fillna(0)
+    # Detect anomalies (z-score within each region); one call per region,
+    # using the same Series reductions as detect_anomalies
+    for col in ANOMALY_COLUMNS:
+        df[f'{col}_anomaly'] = by_region[col].transform(detect_anomalies)
     
     # Classify bloom stages and intensity
-    print("Classifying bloom stages...")
-    df_processed['bloom_stage'] = df_processed.apply(classify_bloom_stage, axis=1)
-    df_processed['bloom_intensity'] = df_processed.apply(calculate_bloom_intensity, axis=1)
+    df['bloom_stage'] = classify_bloom_stage(df)
+    df['bloom_intensity'] = calculate_bloom_intensity(df)
+    return df
+
+def _partition_by_region(input_file, spill_dir, chunksize):
+    """
+    Pass 1: split the raw CSV into one spill file per region (rows kept as
+    text, in input order) and accumulate per-region count/mean/M2 for the
+    anomaly columns. Returns (spill files by region, stats by region).
+    """
+    spills, stats = {}, {}
+    for chunk in pd.read_csv(input_file, chunksize=chunksize, dtype=str, keep_default_na=False):
+        for region, rows in chunk.groupby('region', sort=False):
+            if region not in spills:
+                spills[region] = os.path.join(spill_dir, f'{len(spills):06d}.csv')
+                rows.to_csv(spills[region], index=False)
+            else:
+                rows.to_csv(spills[region], mode='a', header=False, index=False)
+
+            for col in ANOMALY_COLUMNS:
+                x = pd.to_numeric(rows[col], errors='coerce').dropna()
+                n_b, mean_b = len(x), x.mean() if len(x) else 0.0
+                m2_b = ((x - mean_b) ** 2).sum()
+                n_a, mean_a, m2_a = stats.setdefault(region, {}).get(col, (0, 0.0, 0.0))
+                n = n_a + n_b
+                if n_b:
+                    # Chan et al. parallel update; stable for any chunk size
+                    delta = mean_b - mean_a
+                    stats[region][col] = (n, mean_a + delta * n_b / n, m2_a + m2_b + delta ** 2 * n_a * n_b / n)
+                else:
+                    stats[region][col] = (n_a, mean_a, m2_a)
+    return spills, stats
+
+def _stream_region(spill_file, stats, chunksize):
+    """
+    Pass 2: yield the processed rows of one region, chunk by chunk.
+    Only the last ROLLING_WINDOW - 1 rows are carried between chunks: half
+    already written (left context) and half waiting for their right context.
+    """
+    half = ROLLING_WINDOW // 2
+    anomaly = {}
+    for col, (n, mean, m2) in stats.items():
+        std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+        anomaly[col] = (mean, std)
+
+    carry, pending, last_date = None, 0, None
+    reader = pd.read_csv(spill_file, chunksize=chunksize)
+    chunk = next(reader, None)
+    while chunk is not None:
+        following = next(reader, None)
+        chunk['date'] = pd.to_datetime(chunk['date'])
+        dates = chunk['date']
+        if not dates.is_monotonic_increasing or (last_date is not None and dates.iloc[0] < last_date):
+            raise ValueError(f"Rows for region {chunk['region'].iloc[0]!r} are not in date order; "
+                             "use the in-memory mode (no chunksize) for unsorted input")
+        last_date = dates.iloc[-1]
+
+        frame = chunk if carry is None else pd.concat([carry, chunk], ignore_index=True)
+        for col in ['ndvi', 'evi']:
+            frame[f'{col}_rolling_avg'] = calculate_rolling_average(frame[col])
+        for col in ['ndvi', 'evi']:
+            frame[f'{col}_slope'] = calculate_slope(frame[col]).fillna(0)
+        for col, (mean, std) in anomaly.items():
+            frame[f'{col}_anomaly'] = (frame[col] - mean) / std
+
+        start = 0 if carry is None else len(carry) - pending
+        end = len(frame) if following is None else max(len(frame) - half, start)
+        out = frame.iloc[start:end].copy()
+        out['bloom_stage'] = classify_bloom_stage(out)
+        out['bloom_intensity'] = calculate_bloom_intensity(out)
+        yield out
+
+        carry = frame.iloc[max(0, end - half):][chunk.columns]
+        pending = len(frame) - end
+        chunk = following
+
+def process_bloom_dataset_chunked(input_file, output_file, chunksize=100000):
+    """
+    Out-of-core version of process_bloom_dataset with the same output.
+    Peak memory is bounded by chunksize: the input is partitioned into
+    per-region spill files in one pass, then each region is streamed in date
+    order and appended to the output. Input rows must be in date order within
+    each region (as written by generate_sample_data.py).
+    Returns summary statistics of the processed data.
+    """
+    summary = {'records': 0, 'date_min': None, 'date_max': None,
+               'bloom_stage': Counter(), 'bloom_intensity': Counter()}
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_file))) as spill_dir:
+        spills, stats = _partition_by_region(input_file, spill_dir, chunksize)
+        summary['regions'] = len(spills)
+
+        header = True
+        for region in sorted(spills):
+            for out in _stream_region(spills[region], stats[region], chunksize):
+                out.to_csv(output_file, mode='w' if header else 'a', header=header, index=False)
+                header = False
+                summary['records'] += len(out)
+                lo, hi = out['date'].min(), out['date'].max()
+                summary['date_min'] = lo if summary['date_min'] is None else min(summary['date_min'], lo)
+                summary['date_max'] = hi if summary['date_max'] is None else max(summary['date_max'], hi)
+                summary['bloom_stage'].update(out['bloom_stage'])
+                summary['bloom_intensity'].update(out['bloom_intensity'])
+    return summary
+
+def process_bloom_dataset(input_file, output_file, chunksize=None):
+    """
+    Main processing function
     
-    # Save processed data
-    print(f"Saving processed data to {output_file}...")
-    df_processed.to_csv(output_file, index=False)
+    Args:
+        input_file: Path to raw data (CSV, or Parquet dataset for other paths)
+        output_file: Path to save processed data (CSV or Parquet dataset)
+        chunksize: Rows per chunk; if set, process out-of-core with
+            process_bloom_dataset_chunked instead of loading the whole file
+            (CSV input and output only)
+    """
+    if chunksize:
+        if not (is_csv(input_file) and is_csv(output_file)):
+            raise ValueError("Chunked processing reads and writes CSV files")
+        print(f"Processing {input_file} in chunks of {chunksize} rows...")
+        summary = process_bloom_dataset_chunked(input_file, output_file, chunksize)
+        print(f"Saved processed data to {output_file}")
+        stage_counts = pd.Series(summary['bloom_stage'], name='count').sort_values(ascending=False)
+        intensity_counts = pd.Series(summary['bloom_intensity'], name='count').sort_values(ascending=False)
+        records, date_min, date_max, regions = (
+            summary['records'], summary['date_min'], summary['date_max'], summary['regions'])
+    else:
+        print(f"Loading data from {input_file}...")
+        df = load_table(input_file)
+        
+        print("Processing features...")
+        df_processed = process_bloom_frame(df)
+        
+        # Save processed data
+        print(f"Saving processed data to {output_file}...")
+        save_table(df_processed, output_file)
+        stage_counts = df_processed['bloom_stage'].value_counts()
+        intensity_counts = df_processed['bloom_intensity'].value_counts()
+        records, date_min, date_max, regions = (
+            len(df_processed), df_processed['date'].min(), df_processed['date'].max(),
+            df_processed['region'].nunique())
     
     # Print statistics
     print("\nProcessing complete!")
-    print(f"Total records: {len(df_processed)}")
-    print(f"Date range: {df_processed['date'].min()} to {df_processed['date'].max()}")
-    print(f"Regions: {df_processed['region'].nunique()}")
+    print(f"Total records: {records}")
+    print(f"Date range: {date_min} to {date_max}")
+    print(f"Regions: {regions}")
     print("\nBloom stage distribution:")
-    print(df_processed['bloom_stage'].value_counts())
+    print(stage_counts)
     print("\nBloom intensity distribution:")
-    print(df_processed['bloom_intensity'].value_counts())
+    print(intensity_counts)
 
 if __name__ == "__main__":
-    # Example usage
-    input_file = "bloom_raw_data.csv"
-    output_file = "bloom_processed_data.csv"
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default="bloom_raw_data.csv")
+    parser.add_argument("--output", default="bloom_processed_data.csv")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="process out-of-core, this many rows at a time")
+    args = parser.parse_args()
     
-    process_bloom_dataset(input_file, output_file)
+    process_bloom_dataset(args.input, args.output, args.chunksize)
     
     print("\nData processing pipeline complete!")
@@ -3,28 +3,90 @@ Train LSTM-based time series model for bloom forecasting
 Predicts future bloom stages and timing
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 import joblib
+from bloom_storage import load_table
 
 # Note: This is a simplified version. For production, use TensorFlow/PyTorch
 # For now, we'll use a simpler approach with sklearn
 
 from sklearn.ensemble import GradientBoostingClassifier
 
+# Columns read from the processed data; lag features are derived from these
+DATA_COLUMNS = [
+    'date', 'region', 'ndvi', 'evi', 'soilMoisture', 'temperature', 'precipitation',
+    'ndvi_slope', 'ndvi_rolling_avg', 'bloom_stage'
+]
+
+# Lagged variables and the prefix of their feature columns
+LAG_VARIABLES = [('ndvi', 'ndvi'), ('evi', 'evi'), ('temperature', 'temp')]
+
+def lag_feature_columns(lag_periods=[1, 2, 3, 4]):
+    """Lag feature names, in the order create_lag_features adds them"""
+    return [f'{prefix}_lag_{lag}' for lag in lag_periods for _, prefix in LAG_VARIABLES]
+
+def _lag_values(df, lag_periods):
+    """
+    All lags of all LAG_VARIABLES in one pass: rows are stably ordered by
+    region into one contiguous (rows, variables) array, each lag is a shifted
+    slice of it, and values crossing a region boundary are NaN. Same result
+    as groupby('region').shift(lag) for every variable and lag.
+    """
+    codes, _ = pd.factorize(df['region'])
+    values = df[[col for col, _ in LAG_VARIABLES]].to_numpy(dtype=float)
+    # Usually already grouped (sorted by region and date); skip the reorder then
+    grouped = bool(np.all(codes[1:] >= codes[:-1]))
+    if not grouped:
+        order = np.argsort(codes, kind='stable')
+        codes, values = codes[order], values[order]
+    
+    n, n_vars = values.shape
+    lagged = np.full((n, len(lag_periods) * n_vars), np.nan)
+    for j, lag in enumerate(lag_periods):
+        if lag >= n:
+            continue
+        block = lagged[lag:, j * n_vars:(j + 1) * n_vars]
+        block[:] = values[:-lag]
+        # Rows without a region (code -1) get no lags, as groupby drops them
+        block[(codes[lag:] != codes[:-lag]) | (codes[lag:] < 0)] = np.nan
+    
+    if grouped:
+        return lagged
+    out = np.empty_like(lagged)
+    out[order] = lagged
+    return out
+
 def create_lag_features(df, lag_periods=[1, 2, 3, 4]):
     """Create lagged features for time series prediction"""
     df = df.copy()
-    
-    for lag in lag_periods:
-        df[f'ndvi_lag_{lag}'] = df.groupby('region')['ndvi'].shift(lag)
-        df[f'evi_lag_{lag}'] = df.groupby('region')['evi'].shift(lag)
-        df[f'temp_lag_{lag}'] = df.groupby('region')['temperature'].shift(lag)
-    
+    df[lag_feature_columns(lag_periods)] = _lag_values(df, lag_periods)
     return df.dropna()
 
+def lag_tail(df, lag_periods=[1, 2, 3, 4]):
+    """
+    Last max(lag_periods) rows of each region: all the history that
+    append_lag_features needs to extend the series.
+    """
+    columns = [c for c in ['region', 'date'] if c in df.columns] + [col for col, _ in LAG_VARIABLES]
+    return df.groupby('region', sort=False).tail(max(lag_periods))[columns].reset_index(drop=True)
+
+def append_lag_features(new_rows, tail, lag_periods=[1, 2, 3, 4]):
+    """
+    Lag features for rows that extend each region's series (e.g. this week's
+    data), computed from the cached tail instead of the full history.
+    new_rows must continue each region in time order.
+    Returns (features, new tail). features equals create_lag_features on the
+    full history restricted to new_rows.
+    """
+    state = pd.concat([tail, new_rows[tail.columns]], ignore_index=True)
+    df = new_rows.copy()
+    df[lag_feature_columns(lag_periods)] = _lag_values(state, lag_periods)[len(tail):]
+    return df.dropna(), lag_tail(state, lag_periods)
+
 def prepare_forecast_features(df):
     """Prepare features for forecasting model"""
     features = [
@@ -45,11 +107,11 @@ def train_bloom_forecast_model(data_file, model_output='bloom_forecast_model.pkl
     Train bloom forecasting model
     
     Args:
-        data_file: Path to processed CSV data
+        data_file: Path to processed data (CSV or Parquet dataset)
         model_output: Path to save trained model
     """
     print("Loading processed data...")
-    df = pd.read_csv(data_file)
+    df = load_table(data_file, columns=DATA_COLUMNS)
     df['date'] = pd.to_datetime(df['date'])
     df = df.sort_values(['region', 'date'])
     
@@ -57,6 +119,7 @@ def train_bloom_forecast_model(data_file, model_output='bloom_forecast_model.pkl
     
     # Create lag features
     print("Creating lag features...")
+    tail = lag_tail(df)
     df = create_lag_features(df)
     
     print(f"Records after lag features: {len(df)}")
@@ -105,10 +168,17 @@ def train_bloom_forecast_model(data_file, model_output='bloom_forecast_model.pkl
     print(f"\nSaving model to {model_output}...")
     joblib.dump(model, model_output)
     joblib.dump(list(X.columns), 'bloom_forecast_features.pkl')
+    # Lag state for refreshing features with append_lag_features
+    joblib.dump(tail, 'bloom_forecast_lag_tail.pkl')
     
     print("Forecast model training complete!")
     
     return model
 
 if __name__ == "__main__":
-    model = train_bloom_forecast_model('bloom_processed_data.csv')
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="bloom_processed_data.csv",
+                        help="processed CSV, or Parquet dataset directory")
+    args = parser.parse_args()
+    
+    model = train_bloom_forecast_model(args.data)
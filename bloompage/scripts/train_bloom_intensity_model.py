@@ -3,27 +3,29 @@ Train regression model for bloom intensity prediction
 Predicts continuous bloom intensity score
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 import joblib
+from bloom_storage import load_table
+
+FEATURES = [
+    'ndvi',
+    'evi',
+    'soilMoisture',
+    'temperature',
+    'precipitation',
+    'ndvi_slope',
+    'ndvi_rolling_avg',
+    'evi_rolling_avg'
+]
 
 def prepare_features(df):
     """Prepare feature matrix for training"""
-    features = [
-        'ndvi',
-        'evi',
-        'soilMoisture',
-        'temperature',
-        'precipitation',
-        'ndvi_slope',
-        'ndvi_rolling_avg',
-        'evi_rolling_avg'
-    ]
-    
-    X = df[features].fillna(0)
+    X = df[FEATURES].fillna(0)
     
     # Create continuous intensity target from NDVI and EVI
     y = (df['ndvi'] + df['evi']) / 2
@@ -35,11 +37,11 @@ def train_bloom_intensity_regressor(data_file, model_output='bloom_intensity_mod
     Train bloom intensity regression model
     
     Args:
-        data_file: Path to processed CSV data
+        data_file: Path to processed data (CSV or Parquet dataset)
         model_output: Path to save trained model
     """
     print("Loading processed data...")
-    df = pd.read_csv(data_file)
+    df = load_table(data_file, columns=FEATURES)
     
     print(f"Total records: {len(df)}")
     
@@ -106,4 +108,9 @@ def train_bloom_intensity_regressor(data_file, model_output='bloom_intensity_mod
     return model, feature_importance
 
 if __name__ == "__main__":
-    model, importance = train_bloom_intensity_regressor('bloom_processed_data.csv')
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="bloom_processed_data.csv",
+                        help="processed CSV, or Parquet dataset directory")
+    args = parser.parse_args()
+    
+    model, importance = train_bloom_intensity_regressor(args.data)
@@ -3,27 +3,29 @@ Train Random Forest model for bloom stage classification
 Uses NDVI, EVI, soil moisture, temperature, and precipitation
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix
 import joblib
+from bloom_storage import load_table
+
+FEATURES = [
+    'ndvi',
+    'evi',
+    'soilMoisture',
+    'temperature',
+    'precipitation',
+    'ndvi_slope',
+    'ndvi_rolling_avg',
+    'evi_rolling_avg'
+]
 
 def prepare_features(df):
     """Prepare feature matrix for training"""
-    features = [
-        'ndvi',
-        'evi',
-        'soilMoisture',
-        'temperature',
-        'precipitation',
-        'ndvi_slope',
-        'ndvi_rolling_avg',
-        'evi_rolling_avg'
-    ]
-    
-    X = df[features].fillna(0)
+    X = df[FEATURES].fillna(0)
     y = df['bloom_stage']
     
     return X, y
@@ -33,11 +35,11 @@ def train_bloom_stage_classifier(data_file, model_output='bloom_stage_model.pkl'
     Train bloom stage classification model
     
     Args:
-        data_file: Path to processed CSV data
+        data_file: Path to processed data (CSV or Parquet dataset)
         model_output: Path to save trained model
     """
     print("Loading processed data...")
-    df = pd.read_csv(data_file)
+    df = load_table(data_file, columns=FEATURES + ['bloom_stage'])
     
     print(f"Total records: {len(df)}")
     print(f"Bloom stages: {df['bloom_stage'].unique()}")
@@ -106,4 +108,9 @@ def train_bloom_stage_classifier(data_file, model_output='bloom_stage_model.pkl'
     return model, feature_importance
 
 if __name__ == "__main__":
-    model, importance = train_bloom_stage_classifier('bloom_processed_data.csv')
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="bloom_processed_data.csv",
+                        help="processed CSV, or Parquet dataset directory")
+    args = parser.parse_args()
+    
+    model, importance = train_bloom_stage_classifier(args.data)
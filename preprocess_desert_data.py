@@ -1,47 +1,105 @@
+import argparse
+import json
+import math
+import struct
 import pandas as pd
 import numpy as np
 
-# Load the data
-df = pd.read_csv('DesertRisk_Predictions.csv')
-
-# Add random lat/lon for MENA region
-# MENA bounds: lat 12-37, lon -5 to 63
-np.random.seed(42)  # For reproducibility
-df['latitude'] = np.random.uniform(12, 37, len(df))
-df['longitude'] = np.random.uniform(-5, 63, len(df))
-
-# Save as new CSV
-df.to_csv('DesertRisk_WithCoords.csv', index=False)
-
-# Convert to GeoJSON
-geojson = {
-    "type": "FeatureCollection",
-    "features": []
-}
-
-for _, row in df.iterrows():
-    feature = {
-        "type": "Feature",
-        "geometry": {
-            "type": "Point",
-            "coordinates": [row['longitude'], row['latitude']]
-        },
-        "properties": {
-            "PredictedRisk": row['PredictedRisk'],
-            "NDVI": row['NDVI'],
-            "EVI": row['EVI'],
-            "Rainfall": row['Rainfall'],
-            "Temperature": row['Temperature'],
-            "SoilMoisture": row['SoilMoisture'],
-            "Evapotranspiration": row['Evapotranspiration'],
-            "FireIndex": row['FireIndex'] if not pd.isna(row['FireIndex']) else 0,
-            "elevation": row['elevation']
-        }
-    }
-    geojson["features"].append(feature)
+PROPERTIES = ['PredictedRisk', 'NDVI', 'EVI', 'Rainfall', 'Temperature', 'SoilMoisture',
+              'Evapotranspiration', 'FireIndex', 'elevation']
+CHUNK_ROWS = 50000
+BINARY_MAGIC = b"DRSK0001"
 
-import json
-with open('DesertRisk.geojson', 'w') as f:
-    json.dump(geojson, f)
+def add_coordinates(df, seed=42):
+    """Add random lat/lon for the MENA region (lat 12-37, lon -5 to 63)."""
+    np.random.seed(seed)  # For reproducibility
+    df['latitude'] = np.random.uniform(12, 37, len(df))
+    df['longitude'] = np.random.uniform(-5, 63, len(df))
+    return df
+
+def _json_values(values, precision):
+    # JSON text per value: repr of floats (all digits, as json.dumps writes
+    # them) or rounded to precision decimals; NaN/inf become null
+    if values.dtype.kind == 'f':
+        if precision is not None:
+            values = np.round(values, precision)
+        return np.array([repr(v) if math.isfinite(v) else 'null' for v in values.tolist()], dtype=object)
+    return np.array([json.dumps(v) for v in values.tolist()], dtype=object)
+
+def _feature_strings(chunk, properties, precision, property_precision):
+    # Build each row's JSON by concatenating per-column string arrays; no
+    # per-row dicts or Series
+    coords = ('[' + _json_values(chunk['longitude'].to_numpy(), precision) + ','
+              + _json_values(chunk['latitude'].to_numpy(), precision) + ']')
+    props = '{'
+    for k, name in enumerate(properties):
+        props = props + ((',' if k else '') + json.dumps(name) + ':') + _json_values(chunk[name].to_numpy(), property_precision)
+    props = props + '}'
+    return ('{"type":"Feature","geometry":{"type":"Point","coordinates":' + coords + '},"properties":'
+            + props + '}').tolist()
+
+def write_geojson(df, path, properties=PROPERTIES, precision=None, property_precision=None,
+                  ndjson=False, chunk_rows=CHUNK_ROWS):
+    """
+    Stream df to a GeoJSON FeatureCollection (or NDJSON, one Feature per line)
+    chunk_rows rows at a time.
+    precision: decimals kept for coordinates (None keeps full precision)
+    property_precision: decimals kept for numeric properties (None keeps full precision)
+    """
+    with open(path, 'w') as f:
+        if not ndjson:
+            f.write('{"type":"FeatureCollection","features":[')
+        for start in range(0, len(df), chunk_rows):
+            features = _feature_strings(df.iloc[start:start + chunk_rows], properties, precision, property_precision)
+            if ndjson:
+                f.write('\n'.join(features) + '\n')
+            else:
+                f.write((',' if start else '') + ','.join(features))
+        if not ndjson:
+            f.write(']}')
+
+def write_binary(df, path, properties=PROPERTIES):
+    """
+    Compact columnar alternative to GeoJSON:
+    8-byte magic, uint32 header length, JSON header {"count", "columns"},
+    then each column as a contiguous little-endian float32 array
+    (longitude, latitude, properties...). NaN marks missing values.
+    """
+    columns = ['longitude', 'latitude'] + list(properties)
+    header = json.dumps({"count": len(df), "dtype": "float32", "columns": columns}).encode()
+    header += b" " * (-(len(BINARY_MAGIC) + 4 + len(header)) % 4)  # keep arrays 4-byte aligned
+    with open(path, 'wb') as f:
+        f.write(BINARY_MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for col in columns:
+            f.write(df[col].to_numpy(dtype='<f4').tobytes())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default="DesertRisk_Predictions.csv")
+    parser.add_argument("--precision", type=int, default=None, help="decimals kept for coordinates")
+    parser.add_argument("--property-precision", type=int, default=None, help="decimals kept for numeric properties")
+    parser.add_argument("--properties", default=",".join(PROPERTIES), help="comma-separated properties to export")
+    parser.add_argument("--ndjson", action="store_true", help="also write DesertRisk.ndjson")
+    parser.add_argument("--binary", action="store_true", help="also write the columnar DesertRisk.bin")
+    args = parser.parse_args()
+
+    # Load the data
+    df = pd.read_csv(args.input)
+    df = add_coordinates(df)
+
+    # Save as new CSV
+    df.to_csv('DesertRisk_WithCoords.csv', index=False)
+
+    df['FireIndex'] = df['FireIndex'].fillna(0)
+    properties = args.properties.split(',')
+    write_geojson(df, 'DesertRisk.geojson', properties, precision=args.precision,
+                  property_precision=args.property_precision)
+    if args.ndjson:
+        write_geojson(df, 'DesertRisk.ndjson', properties, precision=args.precision,
+                      property_precision=args.property_precision, ndjson=True)
+    if args.binary:
+        write_binary(df, 'DesertRisk.bin', properties)
 
-print("Data preprocessed and saved as DesertRisk_WithCoords.csv and DesertRisk.geojson")
+    print("Data preprocessed and saved as DesertRisk_WithCoords.csv and DesertRisk.geojson")